@@ -0,0 +1,15 @@
+"""
+Description: The sort order of account numbers shared by the modules
+that read, process and write transactions in account order.
+Usage: To incorporate this function into a class or program,
+import this using:
+from account_number.account_number import account_number_key
+"""
+
+def account_number_key(account_number) -> tuple:
+    """
+    Sorts account numbers numerically when they are digits, even when
+    they were read from csv as text, and after them as text otherwise.
+    """
+    text = str(account_number)
+    return (0, int(text), "") if text.isdecimal() else (1, 0, text)
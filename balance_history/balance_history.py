@@ -0,0 +1,178 @@
+"""
+Description: A class created to keep the running balance of every
+account after each transaction, so the balance on any date can be looked
+up without replaying the input.
+Usage: To incorporate this class into a class or program,
+import this using:
+from balance_history.balance_history import BalanceHistory
+"""
+
+import json
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, groupby
+
+class BalanceHistory:
+    """
+    A class that stores a time-ordered balance series per account.
+
+    The series are built in bulk: the rows are sorted once by account
+    and date, then the running balances are segmented cumulative sums
+    computed by itertools.accumulate, one segment per account. The
+    series of all accounts are stored end to end in flat columns with
+    the start and end of every account's segment.
+
+    Attributes:
+        __segments (dict): the (start, end) of every account's segment
+        __dates (list): the date of every row
+        __transaction_ids (list): the Transaction ID of every row
+        __balances (array): the balance after every row
+
+    Methods (instance methods):
+        history (list): the (Date, Transaction ID, balance) series of an account.
+        balance_at (float): the balance of an account at the end of a date.
+        to_records (generator): one dict per account, for writing.
+
+    Methods (class methods):
+        build (BalanceHistory): builds the history from transactions.
+        from_file (BalanceHistory): reads a history written by OutputHandler.
+    """
+
+    BALANCE_SIGNS = {"deposit": 1, "withdrawal": -1}
+    """
+    How each transaction type changes the balance, matching
+    DataProcessor.update_account_summary.
+    """
+
+    def __init__(self, segments: dict, dates: list,
+                 transaction_ids: list, balances: array):
+        """
+        Initialize a BalanceHistory from its columns. Use build or
+        from_file instead of calling this directly.
+        """
+        self.__segments = segments
+        self.__dates = dates
+        self.__transaction_ids = transaction_ids
+        self.__balances = balances
+
+    @property
+    def account_numbers(self) -> list:
+        """
+        Accessor for a list of the accounts in the history.
+        """
+        return list(self.__segments)
+
+    @classmethod
+    def build(cls, transactions: list, value_rows: list = ()) -> "BalanceHistory":
+        """
+        Builds the balance history of every account. Rows that do not
+        change the balance are left out.
+
+        Args:
+            transactions(list): the processed transactions.
+            value_rows(list): more processed transactions as (Account
+            number, Date, Transaction ID, Transaction type, Amount) tuples,
+            such as the rows DataProcessor.process_columns keeps; they
+            come after transactions in input order.
+
+        Returns:
+            BalanceHistory
+        """
+        rows = [(str(transaction["Account number"]), transaction["Date"], index,
+                 transaction["Account number"], transaction.get("Transaction ID"),
+                 transaction["Transaction type"], transaction["Amount"])
+                for index, transaction in enumerate(transactions)
+                if transaction["Transaction type"] in cls.BALANCE_SIGNS]
+        start = len(transactions)
+        rows.extend((str(account_number), transaction_date, start + index, account_number,
+                     transaction_id, transaction_type, amount)
+                    for index, (account_number, transaction_date, transaction_id,
+                                transaction_type, amount) in enumerate(value_rows)
+                    if transaction_type in cls.BALANCE_SIGNS)
+        rows.sort()
+
+        segments = {}
+        dates = [row[1] for row in rows]
+        transaction_ids = [row[4] for row in rows]
+        balances = array("d")
+        start = 0
+        for account_number, group in groupby(rows, key=lambda row: row[3]):
+            group = list(group)
+            balances.extend(accumulate(
+                cls.BALANCE_SIGNS[row[5]] * float(row[6]) for row in group))
+            segments[account_number] = (start, start + len(group))
+            start += len(group)
+
+        return cls(segments, dates, transaction_ids, balances)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "BalanceHistory":
+        """
+        Reads a history written by OutputHandler.write_balance_history.
+
+        Args:
+            file_path(str): the file to read.
+
+        Returns:
+            BalanceHistory
+        """
+        segments = {}
+        dates = []
+        transaction_ids = []
+        balances = array("d")
+        with open(file_path, "r") as input_file:
+            for line in input_file:
+                record = json.loads(line)
+                segments[record["account_number"]] = (
+                    len(dates), len(dates) + len(record["dates"]))
+                dates.extend(record["dates"])
+                transaction_ids.extend(record["transaction_ids"])
+                balances.extend(record["balances"])
+        return cls(segments, dates, transaction_ids, balances)
+
+    def history(self, account_number) -> list:
+        """
+        Gets the balance series of an account.
+
+        Args:
+            account_number: the account to look up.
+
+        Returns:
+            a list of (Date, Transaction ID, balance) in date order
+        """
+        start, end = self.__segments.get(account_number, (0, 0))
+        return list(zip(self.__dates[start:end],
+                        self.__transaction_ids[start:end],
+                        self.__balances[start:end]))
+
+    def balance_at(self, account_number, date: str) -> float:
+        """
+        Gets the balance of an account at the end of a date with a binary
+        search over the account's dates.
+
+        Args:
+            account_number: the account to look up.
+            date(str): the date in YYYY-MM-DD format.
+
+        Returns:
+            the balance, or 0 if the account had no transactions yet
+        """
+        start, end = self.__segments.get(account_number, (0, 0))
+        index = bisect_right(self.__dates, date, start, end)
+        return self.__balances[index - 1] if index > start else 0
+
+    def to_records(self):
+        """
+        Yields the columns of every account's series.
+
+        Returns:
+            a generator of dicts with account_number, dates,
+            transaction_ids and balances
+        """
+        for account_number, (start, end) in self.__segments.items():
+            yield {
+                "account_number": account_number,
+                "dates": self.__dates[start:end],
+                "transaction_ids": self.__transaction_ids[start:end],
+                "balances": self.__balances[start:end].tolist()
+            }
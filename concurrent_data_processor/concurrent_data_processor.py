@@ -0,0 +1,235 @@
+"""
+Description: A class created to let several producer threads process
+transactions at the same time and get results that do not depend on
+how the transactions were split between the threads.
+Usage: To incorporate this class into a class or program,
+import this using:
+from concurrent_data_processor.concurrent_data_processor import ConcurrentDataProcessor
+"""
+
+import logging
+import math
+import threading
+from itertools import count
+from data_processor.data_processor import DataProcessor
+
+def add_exactly(partials: list, amount: float) -> None:
+    """
+    Adds an amount to a sum kept as a short list of non-overlapping
+    floats, the partials math.fsum uses, so no rounding error is lost.
+    math.fsum(partials) is then the correctly rounded sum of every amount
+    added, whatever order they were added in.
+
+    Args:
+        partials(list): the partials of the sum, changed in place.
+        amount(float): the amount to add.
+
+    Returns:
+        None
+    """
+    index = 0
+    for partial in partials:
+        if abs(amount) < abs(partial):
+            amount, partial = partial, amount
+        high = amount + partial
+        low = partial - (high - amount)
+        if low:
+            partials[index] = low
+            index += 1
+        amount = high
+    partials[index:] = [amount]
+
+class ConcurrentDataProcessor:
+    """
+    A class that processes batches of transactions from several threads.
+
+    Every call to process sums its batch into its own aggregates, one per
+    account and transaction type, so the threads share nothing but a
+    short lock to hand the finished aggregates over, and finish only
+    merges one aggregate per account and type of each batch.
+
+    Floating point addition is not associative, so adding per-batch
+    totals cannot give exactly the sums of process_data, which adds the
+    amounts one by one in input order. Instead every total is kept as the
+    partials of math.fsum, which merge without losing anything: the
+    results are the correctly rounded sums of the amounts, the same for
+    any batch sizes and thread timing, and within rounding of process_data.
+
+    Transfers are added to the transfer graph in finish, in sequence
+    order. Near-duplicate and split patterns depend on the transactions
+    before them in input order, so when detect_patterns is True they are
+    also checked in finish, one transaction at a time.
+
+    Attributes:
+        __lock (Lock): guards the partials and the sequence numbers
+        __partials (dict): the aggregates of every batch by sequence
+        __sequence (count): the next sequence number for batches without one
+        __detect_patterns (bool): look for near-duplicate and split transactions
+        __rules (DataProcessor): an empty processor whose rules are used per row
+        __data_processor (DataProcessor): the processor the partials are merged into
+
+    Methods (instance methods):
+        process (int): processes a batch, safe to call from several threads.
+        finish (dict): merges every batch in sequence order.
+    """
+
+    def __init__(self, detect_patterns: bool = True):
+        """
+        Initialize a new ConcurrentDataProcessor.
+
+        Args:
+            detect_patterns(bool): look for near-duplicate and split transactions.
+
+        Returns:
+            None
+        """
+        self.__lock = threading.Lock()
+        self.__partials = {}
+        self.__sequence = count()
+        self.__detect_patterns = detect_patterns
+        self.__rules = DataProcessor([], detect_patterns=False, retain_transactions=False)
+        self.__data_processor = None
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def data_processor(self) -> DataProcessor:
+        """
+        Accessor for the DataProcessor holding the merged results, None
+        until finish is called.
+        """
+        return self.__data_processor
+
+    def process(self, transactions: list, sequence: int = None) -> int:
+        """
+        Processes a batch of transactions. Several threads may call this
+        at the same time.
+
+        Args:
+            transactions(list): the transactions of the batch.
+            sequence(int): the position of the batch in the input, so the
+            results do not depend on which thread finishes first. None to
+            number batches in the order the calls start, which is only
+            deterministic with one producer.
+
+        Returns:
+            the sequence number of the batch
+
+        Raises:
+            ValueError: the sequence number was already processed, or
+            finish was already called
+        """
+        if sequence is None:
+            with self.__lock:
+                sequence = next(self.__sequence)
+
+        # [balance, total_deposits, total_withdrawals] partials per account
+        account_totals = {}
+        # [total_amount partials, transaction_count] per transaction type
+        type_totals = {}
+        suspicious_transactions = []
+        transfers = []
+        for transaction in transactions:
+            account_number = transaction["Account number"]
+            transaction_type = transaction["Transaction type"]
+            amount = float(transaction["Amount"])
+
+            totals = account_totals.get(account_number)
+            if totals is None:
+                totals = account_totals[account_number] = ([], [], [])
+            if transaction_type == "deposit":
+                add_exactly(totals[0], amount)
+                add_exactly(totals[1], amount)
+            elif transaction_type == "withdrawal":
+                add_exactly(totals[0], -amount)
+                add_exactly(totals[2], amount)
+            elif transaction.get(DataProcessor.COUNTERPARTY_FIELD) not in (None, ""):
+                transfers.append(transaction)
+
+            totals = type_totals.get(transaction_type)
+            if totals is None:
+                totals = type_totals[transaction_type] = [[], 0]
+            add_exactly(totals[0], amount)
+            totals[1] += 1
+
+            if self.__rules.is_suspicious(transaction):
+                suspicious_transactions.append(transaction)
+                self.logger.warning(f"Suspicious transaction: {transaction}")
+
+        with self.__lock:
+            if self.__data_processor is not None:
+                raise ValueError("The batches were already merged by finish")
+            if sequence in self.__partials:
+                raise ValueError(f"Batch {sequence} was already processed")
+            self.__partials[sequence] = (transactions, account_totals, type_totals,
+                                         suspicious_transactions, transfers)
+
+        self.logger.info(f"Batch {sequence} processed: {len(transactions)} transactions")
+        return sequence
+
+    def finish(self) -> dict:
+        """
+        Merges every processed batch in sequence order. Call it once,
+        after every producer is done.
+
+        Returns:
+            the same dict as DataProcessor.process_data
+
+        Raises:
+            ValueError: finish was already called
+        """
+        with self.__lock:
+            if self.__data_processor is not None:
+                raise ValueError("The batches were already merged by finish")
+            partials = [self.__partials.pop(sequence) for sequence in sorted(self.__partials)]
+            self.__data_processor = DataProcessor(
+                [transaction for partial in partials for transaction in partial[0]],
+                detect_patterns=self.__detect_patterns)
+
+        account_totals = {}
+        type_totals = {}
+        suspicious_transactions = []
+        for _, batch_accounts, batch_types, batch_suspicious, _ in partials:
+            for account_number, batch_totals in batch_accounts.items():
+                totals = account_totals.setdefault(account_number, ([], [], []))
+                for total, batch_total in zip(totals, batch_totals):
+                    for partial in batch_total:
+                        add_exactly(total, partial)
+            for transaction_type, (batch_total, batch_count) in batch_types.items():
+                totals = type_totals.setdefault(transaction_type, [[], 0])
+                for partial in batch_total:
+                    add_exactly(totals[0], partial)
+                totals[1] += batch_count
+            suspicious_transactions.extend(batch_suspicious)
+
+        data_processor = self.__data_processor
+        data_processor.merge(
+            {account_number: {"account_number": account_number,
+                              "balance": math.fsum(balance),
+                              "total_deposits": math.fsum(deposits),
+                              "total_withdrawals": math.fsum(withdrawals)}
+             for account_number, (balance, deposits, withdrawals) in account_totals.items()},
+            {transaction_type: {"total_amount": math.fsum(total),
+                                "transaction_count": transaction_count}
+             for transaction_type, (total, transaction_count) in type_totals.items()},
+            suspicious_transactions,
+            transaction_count=len(data_processor.input_data))
+        for account_number in account_totals:
+            # Log info if the account_summary is updated
+            self.logger.info(f"Account summary updated: {account_number}")
+
+        for partial in partials:
+            for transaction in partial[4]:
+                data_processor.update_transfer_graph(transaction)
+        if self.__detect_patterns:
+            for transaction in data_processor.input_data:
+                data_processor.check_transaction_patterns(transaction)
+
+        # Log info when processing is completed
+        self.logger.info("Data Processing Complete")
+
+        return {
+            "account_summaries": data_processor.account_summaries,
+            "suspicious_transactions": data_processor.suspicious_transactions,
+            "transaction_statistics": data_processor.transaction_statistics,
+            "transaction_patterns": data_processor.transaction_patterns,
+        }
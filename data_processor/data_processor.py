@@ -9,6 +9,12 @@ __author__ = "Shannon Petkau"
 __version__ = "branch_issue_5"
 
 import logging
+import math
+from transfer_graph.transfer_graph import TransferGraph
+from pattern_detector.pattern_detector import PatternDetector
+from balance_history.balance_history import BalanceHistory
+from results_query.results_query import ResultsQuery
+from account_number.account_number import account_number_key
 
 class DataProcessor:
     """
@@ -24,6 +30,27 @@ class DataProcessor:
         check_suspicious_transactions(): checks if transaction is a suspicious transaction.
         update_transaction_statistics(): updates transaction_statistics
         get_average_transaction_amount(): gets what the average transaction is       
+        process_transactions (dict): processes newly arrived transactions and
+                                returns only what they changed.
+        is_duplicate (bool): checks if the transaction was already processed.
+        update_transfer_graph(): adds a transfer between two accounts to the graph.
+        check_transaction_patterns(): checks for near-duplicate and split transactions.
+        process_transaction (bool): applies one transaction to every summary.
+        get_balance_history (BalanceHistory): gets the running balance of every account.
+        is_suspicious (bool): checks the suspicious rules without recording.
+        add_to_account_summary() / add_to_transaction_statistics() /
+        is_suspicious_values (bool): the rules for fields held as separate values.
+        estimate_totals (dict): scales a sample up to estimated totals.
+        combine_estimates (dict): adds up the estimates of separately sampled inputs.
+        query (ResultsQuery): answers indexed questions about the results.
+        process_columns (dict): processes transactions held as columns.
+        process_table (dict): processes a pandas DataFrame or Arrow table.
+        to_pandas (dict) / to_arrow (dict): gets the results as tables.
+        merge(): adds results processed elsewhere, such as in another process.
+        restore(): replaces results with ones saved earlier, such as from a journal.
+        is_sorted_by_account (bool): checks if the transactions are sorted by account.
+        iter_sorted_account_summaries (generator): yields each account summary
+                                as soon as its account's transactions end.
     """
 
     LARGE_TRANSACTION_THRESHOLD = 10000
@@ -38,10 +65,24 @@ class DataProcessor:
     suspicious transaction.
     """
 
+    VALID_TRANSACTION_TYPES = ["deposit", "withdrawal", "transfer"]
+    """
+    Transaction types accepted by process_columns, matching
+    InputHandler.data_validation.
+    """
+
+    COUNTERPARTY_FIELD = "Counterparty account"
+    """
+    Optional field naming the account that receives a transfer.
+    """
+
     def __init__(self, transactions: list,
                  logging_level = logging.INFO,
                  logging_format = "%(asctime)s - %(levelname)s - %(message)s",
-                 log_file = None):
+                 log_file = None,
+                 deduplicator = None,
+                 detect_patterns = True,
+                 retain_transactions = True):
         """
         Initialize a new DataProcessor list, with transactions,
         account_summaries, suspicious_transactions, and transaction_statistics.
@@ -50,7 +91,14 @@ class DataProcessor:
             transactions(list): the transaction type.
             logging_level(str): the logging level
             logging_format(str): the format to show logging on console
-            log_file(str): the file that contains the logs
+            log_file(str): the file that contains the logs, only configures
+            logging when given; programs should call logging.basicConfig once
+            deduplicator(TransactionDeduplicator): skips transactions whose
+            Transaction ID was already processed, None to process every row
+            detect_patterns(bool): look for near-duplicate and split transactions
+            retain_transactions(bool): keep the transactions given to
+            process_transactions in input_data for get_balance_history;
+            long-running callers pass False so memory does not keep growing
             account_summaries(dict): a summary of account activity
             suspicious_transactions(list): list of any suspicious transactions
             transaction_statistics(dict): a dictionary of an average of what types
@@ -60,16 +108,29 @@ class DataProcessor:
             None
         """
         
-        logging.basicConfig(level=logging_level,
-                            format=logging_format,
-                            filename=log_file if log_file else None,
-                            filemode='w' if log_file else None)
+        # Logging is configured once by the program that runs the
+        # processor; log_file is only kept for callers that relied on it.
+        if log_file:
+            logging.basicConfig(level=logging_level,
+                                format=logging_format,
+                                filename=log_file,
+                                filemode='w')
         self.logger = logging.getLogger(__name__)
        
         self.__transactions = transactions
         self.__account_summaries = {}
         self.__suspicious_transactions = []
         self.__transaction_statistics = {}
+        self.__deduplicator = deduplicator
+        self.__retain_transactions = retain_transactions
+        self.__column_rows = []
+        self.__uncommon_currencies = frozenset(self.UNCOMMON_CURRENCIES)
+        self.__version = 0
+        self.__query = None
+        self.__transfer_graph = TransferGraph()
+        self.__pattern_detector = None
+        if detect_patterns:
+            self.__pattern_detector = PatternDetector(self.LARGE_TRANSACTION_THRESHOLD)
 
     @property
     def input_data(self) -> list:
@@ -99,6 +160,37 @@ class DataProcessor:
         """
         return self.__transaction_statistics
 
+    @property
+    def version(self) -> int:
+        """
+        Accessor for a counter that changes whenever a transaction is
+        processed, so cached query results know when they are stale.
+        """
+        return self.__version
+
+    @property
+    def retain_transactions(self) -> bool:
+        """
+        Accessor for whether processed transactions are kept in input_data.
+        """
+        return self.__retain_transactions
+
+    @property
+    def transfer_graph(self) -> TransferGraph:
+        """
+        Accessor for the TransferGraph of transfers between accounts.
+        """
+        return self.__transfer_graph
+
+    @property
+    def transaction_patterns(self) -> list:
+        """
+        Accessor for a list of near-duplicate and split transactions.
+        """
+        if self.__pattern_detector is None:
+            return []
+        return self.__pattern_detector.findings
+
     def process_data(self) -> dict:
         """
         Processes the data of the account and turns it into a dictionary.
@@ -111,10 +203,383 @@ class DataProcessor:
             been completed
         """
 
+        if self.__deduplicator is None:
+            for transaction in self.__transactions:
+                self.process_transaction(transaction)
+        else:
+            # Keep only the transactions that were processed
+            self.__transactions[:] = [transaction
+                                      for transaction in self.__transactions
+                                      if self.process_transaction(transaction)]
+
+        # Log info when processing is completed
+        self.logger.info("Data Processing Complete")
+
+        return {
+            "account_summaries": self.__account_summaries,
+            "suspicious_transactions": self.__suspicious_transactions,
+            "transaction_statistics": self.__transaction_statistics,
+            "transaction_patterns": self.transaction_patterns,
+        }
+
+    def merge(self, account_summaries: dict, transaction_statistics: dict,
+              suspicious_transactions: list = (), transaction_patterns: list = (),
+              transaction_count: int = 0) -> None:
+        """
+        Adds results that were processed from other transactions, for
+        example by a worker process, to these results. Suspicious
+        transactions and patterns are appended in the order given.
+
+        Args:
+            account_summaries(dict): the account summaries to add.
+            transaction_statistics(dict): the transaction statistics to add.
+            suspicious_transactions(list): the suspicious transactions to append.
+            transaction_patterns(list): the transaction patterns to append.
+            transaction_count(int): the number of transactions merged.
+
+        Returns:
+            None
+        """
+        for account_number, partial in account_summaries.items():
+            summary = self.__account_summaries.get(account_number)
+            if summary is None:
+                self.__account_summaries[account_number] = dict(partial)
+            else:
+                for field in ("balance", "total_deposits", "total_withdrawals"):
+                    summary[field] += partial[field]
+
+        for transaction_type, partial in transaction_statistics.items():
+            statistic = self.__transaction_statistics.setdefault(
+                transaction_type, {"total_amount": 0, "transaction_count": 0})
+            statistic["total_amount"] += partial["total_amount"]
+            statistic["transaction_count"] += partial["transaction_count"]
+
+        self.__suspicious_transactions.extend(suspicious_transactions)
+        if self.__pattern_detector is not None:
+            self.__pattern_detector.findings.extend(transaction_patterns)
+        self.__version += transaction_count
+
+    def restore(self, account_summaries: dict, transaction_statistics: dict,
+                suspicious_transactions: list = (), transaction_patterns: list = (),
+                transaction_count: int = 0) -> None:
+        """
+        Replaces the summaries of the given accounts and transaction types
+        with saved ones, for example from the changes returned by
+        process_transactions, and appends the saved suspicious
+        transactions and patterns. Applying the same saved summaries
+        twice gives the same results.
+
+        Args:
+            account_summaries(dict): the saved account summaries.
+            transaction_statistics(dict): the saved transaction statistics.
+            suspicious_transactions(list): the suspicious transactions to append.
+            transaction_patterns(list): the transaction patterns to append.
+            transaction_count(int): the number of transactions restored.
+
+        Returns:
+            None
+        """
+        for account_number, summary in account_summaries.items():
+            self.__account_summaries[account_number] = dict(summary)
+        for transaction_type, statistic in transaction_statistics.items():
+            self.__transaction_statistics[transaction_type] = dict(statistic)
+
+        self.__suspicious_transactions.extend(suspicious_transactions)
+        if self.__pattern_detector is not None:
+            self.__pattern_detector.findings.extend(transaction_patterns)
+        self.__version += transaction_count
+
+    def is_sorted_by_account(self) -> bool:
+        """
+        Checks if the transactions are in ascending Account number order,
+        numerically when the account numbers are digits.
+
+        Returns:
+            True if every account's transactions are next to each other in order
+        """
+        previous = None
         for transaction in self.__transactions:
-            self.update_account_summary(transaction)
-            self.check_suspicious_transactions(transaction)
-            self.update_transaction_statistics(transaction)
+            key = account_number_key(transaction["Account number"])
+            if previous is not None and key < previous:
+                return False
+            previous = key
+        return True
+
+    def iter_sorted_account_summaries(self, sorted_by_account: bool = None):
+        """
+        Processes the transactions like process_data, but when they are sorted
+        by Account number each account summary is yielded and forgotten as
+        soon as the account number changes, so only one account summary is
+        held in memory. The transactions themselves are still the list given
+        to the constructor and stay in input_data. The other results are
+        available from the properties once the generator is finished.
+
+        Args:
+            sorted_by_account(bool): True when the transactions are known to be
+            sorted, None to check with is_sorted_by_account first. Unsorted
+            transactions are processed with process_data and yielded at the end.
+
+        Returns:
+            a generator of account summaries
+
+        Raises:
+            ValueError: if the transactions were declared sorted but are not.
+        """
+        if sorted_by_account is None:
+            sorted_by_account = self.is_sorted_by_account()
+
+        if not sorted_by_account:
+            yield from self.process_data()["account_summaries"].values()
+            return
+
+        current = None
+        current_key = None
+        for transaction in self.__transactions:
+            account_number = transaction["Account number"]
+            if account_number != current:
+                key = account_number_key(account_number)
+                if current_key is not None and key < current_key:
+                    raise ValueError(f"Transactions are not sorted by Account number "
+                                     f"at Transaction ID {transaction['Transaction ID']}")
+                if current in self.__account_summaries:
+                    yield self.__account_summaries.pop(current)
+                current = account_number
+                current_key = key
+
+            self.process_transaction(transaction)
+
+        if current in self.__account_summaries:
+            yield self.__account_summaries.pop(current)
+
+        # Log info when processing is completed
+        self.logger.info("Data Processing Complete")
+
+    def process_transaction(self, transaction: dict) -> bool:
+        """
+        Applies one transaction to every summary, unless it was already
+        processed.
+
+        Args:
+            transaction(dict): the transaction to process.
+
+        Returns:
+            False if the transaction was skipped as a duplicate
+        """
+        if self.is_duplicate(transaction):
+            return False
+
+        self.update_account_summary(transaction)
+        self.check_suspicious_transactions(transaction)
+        self.update_transaction_statistics(transaction)
+        self.update_transfer_graph(transaction)
+        self.check_transaction_patterns(transaction)
+        self.__version += 1
+        return True
+
+    def query(self) -> ResultsQuery:
+        """
+        Gets a ResultsQuery over these results. The same instance is
+        returned every time so its indexes are reused between calls.
+
+        Returns:
+            ResultsQuery
+        """
+        if self.__query is None:
+            self.__query = ResultsQuery(self)
+        return self.__query
+
+    def process_transactions(self, transactions: list) -> dict:
+        """
+        Processes transactions that arrived after the last call, updating the
+        aggregates in place instead of starting again from the whole input.
+
+        Args:
+            transactions(list): the newly arrived transactions.
+
+        Returns:
+            account_summaries: only the accounts the new transactions changed
+            suspicious_transactions: only the new suspicious transactions
+            transaction_statistics: only the transaction types that changed
+        """
+        suspicious_count = len(self.__suspicious_transactions)
+        changed_accounts = {}
+        changed_types = {}
+
+        for transaction in transactions:
+            if not self.process_transaction(transaction):
+                continue
+
+            if self.__retain_transactions:
+                self.__transactions.append(transaction)
+            changed_accounts[transaction["Account number"]] = True
+            changed_types[transaction["Transaction type"]] = True
+
+        return {
+            "account_summaries": {
+                account_number: self.__account_summaries[account_number]
+                for account_number in changed_accounts
+            },
+            "suspicious_transactions":
+                self.__suspicious_transactions[suspicious_count:],
+            "transaction_statistics": {
+                transaction_type: self.__transaction_statistics[transaction_type]
+                for transaction_type in changed_types
+            },
+        }
+
+    def is_duplicate(self, transaction: dict) -> bool:
+        """
+        Checks the Transaction ID against the deduplicator, so a re-sent
+        transaction is not counted twice.
+
+        Args:
+            transaction(dict): the transaction about to be processed.
+
+        Returns:
+            True if the transaction was already processed
+        """
+        if self.__deduplicator is None or "Transaction ID" not in transaction:
+            return False
+
+        if self.__deduplicator.is_duplicate(transaction["Transaction ID"]):
+            # Log info if the transaction is skipped
+            self.logger.info(f"Duplicate transaction skipped: {transaction['Transaction ID']}")
+            return True
+
+        return False
+
+    def process_columns(self, columns: dict, symbols: dict = None) -> dict:
+        """
+        Processes transactions held as columns, for example from a
+        DataFrame or an Arrow table, looping over the columns together
+        without building a dict for every row. Rows are validated with the
+        same rules as InputHandler.data_validation and go through the same
+        scalar helpers as process_transaction, such as
+        add_to_account_summary; only suspicious rows are turned into dicts.
+        The rows are not added to input_data, but unless
+        retain_transactions is False the values get_balance_history needs
+        are kept for each processed row.
+
+        Args:
+            columns(dict): a sequence of values per field name. "Account
+            number", "Transaction type", "Amount" and "Currency" are
+            required, the other fields are optional.
+            symbols(dict): the symbol table of every column that holds
+            codes instead of values, as returned by
+            InputHandler.read_encoded_data. Every row then shares the
+            table's string for its value.
+
+        Returns:
+            the same dict as process_data
+
+        Raises:
+            KeyError: a required column is missing
+        """
+        missing = [name for name in ("Account number", "Transaction type",
+                                     "Amount", "Currency")
+                   if name not in columns]
+        if missing:
+            raise KeyError(f"Missing columns: {missing}")
+
+        row_count = len(columns["Amount"])
+        symbols = symbols or {}
+        # Type, currency and description are compared and kept as codes,
+        # and only looked up in their symbol table when the string is needed.
+        coded_fields = ("Transaction type", "Currency", "Description")
+
+        def column(name: str):
+            values = columns.get(name)
+            if values is None:
+                return [None] * row_count
+            if name in symbols and name not in coded_fields:
+                return map(symbols[name].__getitem__, values)
+            return values
+
+        def decoder(name: str):
+            table = symbols.get(name)
+            return (lambda value: value) if table is None else table.__getitem__
+
+        types = symbols.get("Transaction type")
+        valid_transaction_types = frozenset(self.VALID_TRANSACTION_TYPES) if types is None \
+            else frozenset(code for code, value in enumerate(types)
+                           if value in self.VALID_TRANSACTION_TYPES)
+        uncommon_currencies = self.__uncommon_currencies if "Currency" not in symbols \
+            else frozenset(code for code, value in enumerate(symbols["Currency"])
+                           if value in self.__uncommon_currencies)
+        decode_type = decoder("Transaction type")
+        decode_currency = decoder("Currency")
+        decode_description = decoder("Description")
+        deduplicator = self.__deduplicator
+        pattern_detector = self.__pattern_detector
+        column_rows = self.__column_rows if self.__retain_transactions else None
+
+        for transaction_id, account_number, transaction_date, transaction_type, \
+                amount, currency, description, counterparty in zip(
+                    column("Transaction ID"), column("Account number"),
+                    column("Date"), column("Transaction type"), column("Amount"),
+                    column("Currency"), column("Description"),
+                    column(self.COUNTERPARTY_FIELD)):
+
+            if not isinstance(amount, (int, float)) or not amount >= 0 \
+                or transaction_type not in valid_transaction_types:
+                continue
+
+            if deduplicator is not None and transaction_id is not None \
+                and deduplicator.is_duplicate(transaction_id):
+                # Log info if the transaction is skipped
+                self.logger.info(f"Duplicate transaction skipped: {transaction_id}")
+                continue
+
+            value = float(amount)
+            suspicious = self.is_suspicious_values(value, currency, uncommon_currencies)
+            transaction_type = decode_type(transaction_type)
+            if suspicious or pattern_detector is not None:
+                currency = decode_currency(currency)
+                description = decode_description(description)
+
+            self.add_to_account_summary(account_number, transaction_type, value)
+            self.add_to_transaction_statistics(transaction_type, value)
+
+            if transaction_type == "transfer" and counterparty not in (None, ""):
+                try:
+                    self.__transfer_graph.add_transfer(account_number, counterparty,
+                                                       transaction_date)
+                except (TypeError, ValueError):
+                    # Log warning if the date cannot be read
+                    self.logger.warning(f"Transfer with invalid date: {transaction_id}")
+
+            if suspicious:
+                # Only suspicious rows are kept, so only they become dicts
+                transaction = {
+                    "Transaction ID": transaction_id,
+                    "Account number": account_number,
+                    "Date": transaction_date,
+                    "Transaction type": transaction_type,
+                    "Amount": amount,
+                    "Currency": currency,
+                    "Description": description
+                }
+                if counterparty is not None:
+                    transaction[self.COUNTERPARTY_FIELD] = counterparty
+                self.__suspicious_transactions.append(transaction)
+
+                # Log warning if the transaction is suspicious
+                self.logger.warning(f"Suspicious transaction: {transaction}")
+
+            if pattern_detector is not None:
+                finding_count = len(pattern_detector.findings)
+                pattern_detector.check_values(transaction_id, account_number,
+                                              transaction_date, value, currency,
+                                              description)
+                for finding in pattern_detector.findings[finding_count:]:
+                    # Log warning if the transaction completes a pattern
+                    self.logger.warning(f"Transaction pattern {finding['Pattern']}: "
+                                        f"{transaction_id}")
+
+            if column_rows is not None:
+                column_rows.append((account_number, transaction_date, transaction_id,
+                                    transaction_type, amount))
+            self.__version += 1
 
         # Log info when processing is completed
         self.logger.info("Data Processing Complete")
@@ -123,6 +588,118 @@ class DataProcessor:
             "account_summaries": self.__account_summaries,
             "suspicious_transactions": self.__suspicious_transactions,
             "transaction_statistics": self.__transaction_statistics,
+            "transaction_patterns": self.transaction_patterns,
+        }
+
+    def process_table(self, table) -> dict:
+        """
+        Processes a pandas DataFrame or a pyarrow RecordBatch or Table by
+        reading each column once with process_columns. Only the columns
+        process_columns reads are converted, and pandas categorical and
+        Arrow dictionary columns are passed as their codes with their
+        categories as the symbol table, so their values are not copied
+        per row. Neither library is imported; the table only needs their
+        column methods.
+
+        Args:
+            table: a pandas DataFrame, pyarrow RecordBatch or pyarrow Table.
+
+        Returns:
+            the same dict as process_data
+        """
+        fields = ["Transaction ID", "Account number", "Date", "Transaction type",
+                  "Amount", "Currency", "Description", self.COUNTERPARTY_FIELD]
+        columns = {}
+        symbols = {}
+        if hasattr(table, "column_names"):
+            for name in fields:
+                if name not in table.column_names:
+                    continue
+                column = table.column(name)
+                if hasattr(column, "combine_chunks"):
+                    column = column.combine_chunks()
+                if hasattr(column, "dictionary") and column.null_count == 0:
+                    columns[name] = column.indices.to_pylist()
+                    symbols[name] = column.dictionary.to_pylist()
+                else:
+                    columns[name] = column.to_pylist()
+        else:
+            for name in fields:
+                if name not in table.columns:
+                    continue
+                column = table[name]
+                if str(column.dtype) == "category" and not column.isna().any():
+                    columns[name] = column.cat.codes.tolist()
+                    symbols[name] = column.cat.categories.tolist()
+                else:
+                    columns[name] = column.tolist()
+        return self.process_columns(columns, symbols)
+
+    def to_pandas(self) -> dict:
+        """
+        Gets the account summaries, suspicious transactions and transaction
+        statistics as pandas DataFrames. pandas is only imported here.
+
+        Returns:
+            a dict of DataFrames with the keys of process_data
+
+        Raises:
+            ImportError: pandas is not installed
+        """
+        try:
+            import pandas
+        except ImportError as error:
+            raise ImportError("to_pandas needs pandas: pip install pandas") from error
+
+        return {name: pandas.DataFrame(columns)
+                for name, columns in self.__result_columns().items()}
+
+    def to_arrow(self) -> dict:
+        """
+        Gets the account summaries, suspicious transactions and transaction
+        statistics as pyarrow Tables. pyarrow is only imported here.
+
+        Returns:
+            a dict of Tables with the keys of process_data
+
+        Raises:
+            ImportError: pyarrow is not installed
+        """
+        try:
+            import pyarrow
+        except ImportError as error:
+            raise ImportError("to_arrow needs pyarrow: pip install pyarrow") from error
+
+        return {name: pyarrow.table(columns)
+                for name, columns in self.__result_columns().items()}
+
+    def __result_columns(self) -> dict:
+        """
+        Turns the results into one list per column, the form both pandas
+        and pyarrow build tables from.
+        """
+        summaries = list(self.__account_summaries.values())
+        statistics = self.__transaction_statistics
+        suspicious = self.__suspicious_transactions
+        return {
+            "account_summaries": {
+                field: [summary[field] for summary in summaries]
+                for field in ("account_number", "balance",
+                              "total_deposits", "total_withdrawals")
+            },
+            "suspicious_transactions": {
+                field: [transaction.get(field) for transaction in suspicious]
+                for field in ("Transaction ID", "Account number", "Date",
+                              "Transaction type", "Amount", "Currency",
+                              "Description")
+            },
+            "transaction_statistics": {
+                "transaction_type": list(statistics),
+                "total_amount": [statistic["total_amount"]
+                                 for statistic in statistics.values()],
+                "transaction_count": [statistic["transaction_count"]
+                                      for statistic in statistics.values()]
+            }
         }
 
     def update_account_summary(self, transaction: dict) -> None:
@@ -138,10 +715,24 @@ class DataProcessor:
         Returns:
             None
         """
-        account_number = transaction["Account number"]
-        transaction_type = transaction["Transaction type"]
-        amount = float(transaction["Amount"])
+        self.add_to_account_summary(transaction["Account number"],
+                                    transaction["Transaction type"],
+                                    float(transaction["Amount"]))
 
+    def add_to_account_summary(self, account_number, transaction_type: str,
+                               amount: float) -> None:
+        """
+        Does the work of update_account_summary for callers that hold the
+        fields as separate values, such as process_columns.
+
+        Args:
+            account_number: the account number of the account processed.
+            transaction_type(str): the type of the transaction.
+            amount(float): the amount of the transaction.
+
+        Returns:
+            None
+        """
         if account_number not in self.__account_summaries:
             self.__account_summaries[account_number] = {
                 "account_number": account_number,
@@ -164,7 +755,6 @@ class DataProcessor:
             # Log info if the account_summary is updated
             self.logger.info(f"Account summary updated: {account_number}")
 
-
     def check_suspicious_transactions(self, transaction: dict) -> None:
         """
         Checks if the transaction is suspicious by looking to see if amount is 
@@ -178,16 +768,46 @@ class DataProcessor:
         Returns:
             None
         """
-        amount = float(transaction["Amount"])
-        currency = transaction["Currency"]
-
-        if amount > self.LARGE_TRANSACTION_THRESHOLD \
-            or currency in self.UNCOMMON_CURRENCIES:
+        if self.is_suspicious(transaction):
             self.__suspicious_transactions.append(transaction)
 
             # Log warning if the transaction is suspicious
             self.logger.warning(f"Suspicious transaction: {transaction}")
 
+    def is_suspicious(self, transaction: dict) -> bool:
+        """
+        Checks the rules of check_suspicious_transactions without
+        recording the transaction.
+
+        Args:
+            transaction(dict): the transaction to check.
+
+        Returns:
+            True if the transaction is suspicious
+        """
+        return self.is_suspicious_values(float(transaction["Amount"]),
+                                         transaction["Currency"])
+
+    def is_suspicious_values(self, amount: float, currency,
+                             uncommon_currencies: frozenset = None) -> bool:
+        """
+        Does the work of is_suspicious for callers that hold the fields
+        as separate values, such as process_columns.
+
+        Args:
+            amount(float): the amount of the transaction.
+            currency: the currency of the transaction, or its code.
+            uncommon_currencies(frozenset): the codes of UNCOMMON_CURRENCIES
+            when currency is a code, None when it is the string.
+
+        Returns:
+            True if the transaction is suspicious
+        """
+        if uncommon_currencies is None:
+            uncommon_currencies = self.__uncommon_currencies
+        return amount > self.LARGE_TRANSACTION_THRESHOLD \
+            or currency in uncommon_currencies
+
     def update_transaction_statistics(self, transaction: dict) -> None:
         """
         Updates transaction statistics when to transaction dictionary 
@@ -200,9 +820,21 @@ class DataProcessor:
         Returns:
             None
         """
-        transaction_type = transaction["Transaction type"]
-        amount = float(transaction["Amount"])
+        self.add_to_transaction_statistics(transaction["Transaction type"],
+                                           float(transaction["Amount"]))
+
+    def add_to_transaction_statistics(self, transaction_type: str, amount: float) -> None:
+        """
+        Does the work of update_transaction_statistics for callers that
+        hold the fields as separate values, such as process_columns.
 
+        Args:
+            transaction_type(str): the type of the transaction.
+            amount(float): the amount of the transaction.
+
+        Returns:
+            None
+        """
         if transaction_type not in self.__transaction_statistics:
             self.__transaction_statistics[transaction_type] = {
                 "total_amount": 0,
@@ -213,6 +845,177 @@ class DataProcessor:
         self.__transaction_statistics[transaction_type]["transaction_count"] += 1
         self.logger.info(f"Updated transaction for {transaction_type}")
 
+    def update_transfer_graph(self, transaction: dict) -> None:
+        """
+        Adds a transfer to the transfer graph when the transaction names
+        the account that received it.
+
+        Args:
+            transaction(dict): the transaction processed.
+
+        Returns:
+            None
+        """
+        counterparty = transaction.get(self.COUNTERPARTY_FIELD)
+        if transaction["Transaction type"] != "transfer" or counterparty in (None, ""):
+            return
+
+        try:
+            self.__transfer_graph.add_transfer(transaction["Account number"],
+                                               counterparty,
+                                               transaction["Date"])
+        except ValueError:
+            # Log warning if the date cannot be read
+            self.logger.warning(f"Transfer with invalid date: {transaction}")
+
+    def check_transaction_patterns(self, transaction: dict) -> None:
+        """
+        Checks if the transaction is a near-duplicate of recent transactions
+        on the account, or completes a group of smaller transactions that
+        sum to just over LARGE_TRANSACTION_THRESHOLD.
+
+        Args:
+            transaction(dict): the transaction processed.
+
+        Returns:
+            None
+        """
+        if self.__pattern_detector is None:
+            return
+
+        finding_count = len(self.__pattern_detector.findings)
+        self.__pattern_detector.check_transaction(transaction)
+        for finding in self.__pattern_detector.findings[finding_count:]:
+            # Log warning if the transaction completes a pattern
+            self.logger.warning(f"Transaction pattern {finding['Pattern']}: {transaction}")
+
+    def get_balance_history(self) -> BalanceHistory:
+        """
+        Gets the running balance of every account after each of its
+        transactions.
+
+        Returns:
+            a BalanceHistory of the processed transactions
+        """
+        return BalanceHistory.build(self.__transactions, self.__column_rows)
+
+    def estimate_totals(self, sampled_rows: int, estimated_rows: int,
+                        z_score: float = 1.96) -> dict:
+        """
+        Treats the transactions as a uniform random sample and scales them
+        up to estimated totals for the whole input, with confidence
+        intervals from the sample variance and the finite population
+        correction. Rows of the sample that failed validation count as
+        zero in every group.
+
+        Args:
+            sampled_rows(int): how many rows were sampled, valid or not.
+            estimated_rows(int): how many rows the whole input has.
+            z_score(float): 1.96 for 95% confidence intervals.
+
+        Returns:
+            estimate: always True, so results are never mistaken for totals
+            transaction_types: estimated total_amount and transaction_count
+            per transaction type, each with estimate, low and high
+            currencies: the same per currency
+            suspicious_rate: the estimated share of suspicious rows
+        """
+        groups = {"transaction_types": {}, "currencies": {}}
+        suspicious_count = 0
+
+        for transaction in self.__transactions:
+            amount = float(transaction["Amount"])
+            for group, key in (("transaction_types", transaction["Transaction type"]),
+                               ("currencies", transaction["Currency"])):
+                sums = groups[group].setdefault(key, [0, 0.0, 0.0])
+                sums[0] += 1
+                sums[1] += amount
+                sums[2] += amount * amount
+            if self.is_suspicious(transaction):
+                suspicious_count += 1
+
+        sample_size = max(sampled_rows, 1)
+        correction = math.sqrt(max(0.0, 1 - sample_size / max(estimated_rows, sample_size)))
+
+        def interval(total: float, total_of_squares: float) -> dict:
+            mean = total / sample_size
+            variance = 0.0
+            if sample_size > 1:
+                variance = max(0.0, (total_of_squares - sample_size * mean * mean)
+                               / (sample_size - 1))
+            margin = z_score * estimated_rows * math.sqrt(variance / sample_size) * correction
+            estimate = estimated_rows * mean
+            return {"estimate": estimate,
+                    "low": max(0.0, estimate - margin),
+                    "high": estimate + margin}
+
+        estimates = {
+            "estimate": True,
+            "z_score": z_score,
+            "sampled_rows": sampled_rows,
+            "estimated_rows": estimated_rows
+        }
+        for group, keys in groups.items():
+            estimates[group] = {
+                key: {
+                    "total_amount": interval(total, total_of_squares),
+                    "transaction_count": interval(count, count)
+                }
+                for key, (count, total, total_of_squares) in keys.items()
+            }
+
+        rate = interval(suspicious_count, suspicious_count)
+        estimates["suspicious_rate"] = {
+            name: value / max(estimated_rows, 1) for name, value in rate.items()}
+        return estimates
+
+    @staticmethod
+    def combine_estimates(estimates: list) -> dict:
+        """
+        Adds up the estimates of separately sampled inputs, such as one
+        per input file. Estimates and rows are added, and the margins of
+        the independent samples are combined as the square root of the
+        sum of their squares.
+
+        Args:
+            estimates(list): dicts returned by estimate_totals.
+
+        Returns:
+            the same dict as estimate_totals, for all the inputs together
+        """
+        estimated_rows = sum(estimate["estimated_rows"] for estimate in estimates)
+        combined = {
+            "estimate": True,
+            "z_score": estimates[0]["z_score"] if estimates else 1.96,
+            "sampled_rows": sum(estimate["sampled_rows"] for estimate in estimates),
+            "estimated_rows": estimated_rows
+        }
+
+        def add(intervals: list) -> dict:
+            total = sum(interval["estimate"] for interval in intervals)
+            margin = math.sqrt(sum((interval["high"] - interval["estimate"]) ** 2
+                                   for interval in intervals))
+            return {"estimate": total, "low": max(0.0, total - margin),
+                    "high": total + margin}
+
+        for group in ("transaction_types", "currencies"):
+            combined[group] = {}
+            keys = dict.fromkeys(key for estimate in estimates for key in estimate[group])
+            for key in keys:
+                combined[group][key] = {
+                    measure: add([estimate[group][key][measure] for estimate in estimates
+                                  if key in estimate[group]])
+                    for measure in ("total_amount", "transaction_count")
+                }
+
+        # Rates are turned back into suspicious row counts before adding
+        suspicious = add([{name: value * estimate["estimated_rows"]
+                           for name, value in estimate["suspicious_rate"].items()}
+                          for estimate in estimates])
+        combined["suspicious_rate"] = {
+            name: value / max(estimated_rows, 1) for name, value in suspicious.items()}
+        return combined
+
     def get_average_transaction_amount(self, transaction_type: str) -> float:
         """
         Gets the average transaction amount.
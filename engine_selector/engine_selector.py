@@ -0,0 +1,402 @@
+"""
+Description: A class created to choose how a DataProcessor runs from the
+size of the input and the cores and memory of the machine, and to record
+every choice with its timing so the limits can be tuned from real runs.
+Usage: To incorporate this class into a class or program,
+import this using:
+from engine_selector.engine_selector import EngineSelector
+"""
+
+import json
+import logging
+import os
+import time
+import zlib
+from input_handler.input_handler import InputHandler
+from data_processor.data_processor import DataProcessor
+
+def process_partition(transactions: list, positions: list,
+                      detect_patterns: bool) -> dict:
+    """
+    Processes the transactions of some accounts in a worker process.
+    Every suspicious transaction and pattern is returned with the input
+    position of the transaction that caused it, so the results of all
+    partitions can be put back in input order.
+
+    Args:
+        transactions(list): the transactions of the partition.
+        positions(list): the input position of every transaction.
+        detect_patterns(bool): look for near-duplicate and split transactions.
+
+    Returns:
+        account_summaries, transaction_statistics, suspicious_transactions
+        and transaction_patterns
+    """
+    data_processor = DataProcessor(transactions, detect_patterns=detect_patterns)
+    suspicious = data_processor.suspicious_transactions
+    patterns = data_processor.transaction_patterns
+    positioned_suspicious = []
+    positioned_patterns = []
+
+    for position, transaction in zip(positions, transactions):
+        suspicious_count = len(suspicious)
+        pattern_count = len(patterns)
+        data_processor.process_transaction(transaction)
+        positioned_suspicious.extend((position, row) for row in suspicious[suspicious_count:])
+        positioned_patterns.extend((position, row) for row in patterns[pattern_count:])
+
+    return {
+        "account_summaries": data_processor.account_summaries,
+        "transaction_statistics": data_processor.transaction_statistics,
+        "suspicious_transactions": positioned_suspicious,
+        "transaction_patterns": positioned_patterns
+    }
+
+class EngineSelector:
+    """
+    A class that picks and runs a processing engine.
+
+    "row" runs DataProcessor.process_data, which has no setup cost.
+    "columnar" runs DataProcessor.process_columns, which skips the dict
+    of every row. That only pays off when the columns are read straight
+    from the files with InputHandler.read_encoded_data, see
+    process_encoded; turning dicts already read into columns and back is
+    slower than the row engine, so auto never chooses columnar for them.
+    "multiprocess" splits the accounts into partitions processed by
+    worker processes, which only pays for the pool start-up and for
+    copying the rows on large inputs.
+
+    Attributes:
+        __timing_log_path (str): the file that choices and timings are appended to
+        __sample_size (int): the rows sampled to estimate the row count
+
+    Methods (instance methods):
+        estimate_rows (int): estimates the rows of the input files.
+        choose (dict): picks the engine and its batch size or workers.
+        process (tuple): runs a choice on transactions and records its timing.
+        process_encoded (tuple): runs the columnar engine on encoded columns.
+        record(): appends a choice and its timing to the timing log.
+    """
+
+    ENGINES = ["row", "columnar", "multiprocess"]
+    """
+    The engines that can be chosen.
+    """
+
+    COLUMNAR_MIN_ROWS = 20_000
+    """
+    Fewest rows for which reading the files as columns pays for itself.
+    """
+
+    MULTIPROCESS_MIN_ROWS = 500_000
+    """
+    Fewest rows for which starting worker processes pays for itself.
+    """
+
+    ROWS_PER_WORKER = 250_000
+    """
+    Fewest rows given to each worker process.
+    """
+
+    BATCH_ROWS = 65_536
+    """
+    Most rows turned into columns at once by the columnar engine.
+    """
+
+    ROW_MEMORY_BYTES = 1024
+    """
+    Rough memory of one transaction dict, used to keep the multiprocess
+    engine, which holds every row twice, inside the available memory.
+    """
+
+    def __init__(self, timing_log_path: str = None, sample_size: int = 1000):
+        """
+        Initialize a new EngineSelector.
+
+        Args:
+            timing_log_path(str): the file that choices and timings are
+            appended to as lines of JSON, None to only log them.
+            sample_size(int): the rows sampled from each file to estimate
+            its row count.
+
+        Returns:
+            None
+        """
+        self.__timing_log_path = timing_log_path
+        self.__sample_size = sample_size
+        self.logger = logging.getLogger(__name__)
+
+    def estimate_rows(self, input_file_paths: list) -> int:
+        """
+        Estimates the rows of the input files from their sizes and a
+        small sample of rows, see InputHandler.read_sample_data. The rows
+        of a transaction archive are counted from its footer.
+
+        Args:
+            input_file_paths(list): the csv, json or txa input files.
+
+        Returns:
+            the estimated number of rows
+        """
+        estimated_rows = 0
+        for file_path in input_file_paths:
+            input_handler = InputHandler(file_path)
+            if input_handler.get_file_format() == "txa":
+                from transaction_archive.transaction_archive import TransactionArchive
+
+                estimated_rows += sum(block["rows"]
+                                      for block in TransactionArchive(file_path).blocks())
+            else:
+                estimated_rows += input_handler.read_sample_data(
+                    self.__sample_size)["estimated_rows"]
+        return estimated_rows
+
+    def choose(self, input_file_paths: list, engine: str = "auto",
+               deduplicate: bool = False, read_columns: bool = False) -> dict:
+        """
+        Picks the engine for the input files. Small inputs use the row
+        engine, large inputs on a machine with several cores and enough
+        memory use the multiprocess engine. In between the columnar engine
+        is used if the files can be read as columns, and the row engine if
+        they are read as transactions. A deduplicator cannot be shared
+        between processes, so deduplicated runs never use the multiprocess
+        engine.
+
+        Args:
+            input_file_paths(list): the csv, json or txa input files.
+            engine(str): "auto", or one of ENGINES to only size it.
+            deduplicate(bool): the run skips already processed transactions.
+            read_columns(bool): the files can be read with
+            InputHandler.read_encoded_data and given to process_encoded.
+
+        Returns:
+            engine, estimated_rows, cores, memory_bytes, batch_rows and workers
+
+        Raises:
+            ValueError: engine is not "auto" or one of ENGINES
+        """
+        if engine != "auto" and engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+
+        estimated_rows = self.estimate_rows(input_file_paths)
+        cores = self.__cores()
+        memory_bytes = self.__memory_bytes()
+        fits_twice = memory_bytes is None \
+            or 2 * estimated_rows * self.ROW_MEMORY_BYTES < memory_bytes
+
+        if engine == "auto":
+            if estimated_rows < self.COLUMNAR_MIN_ROWS:
+                engine = "row"
+            elif estimated_rows >= self.MULTIPROCESS_MIN_ROWS and cores > 1 \
+                and fits_twice and not deduplicate:
+                engine = "multiprocess"
+            elif read_columns:
+                engine = "columnar"
+            else:
+                engine = "row"
+
+        workers = 1
+        if engine == "multiprocess":
+            workers = max(1, min(cores, estimated_rows // self.ROWS_PER_WORKER))
+
+        choice = {
+            "engine": engine,
+            "estimated_rows": estimated_rows,
+            "cores": cores,
+            "memory_bytes": memory_bytes,
+            "batch_rows": max(1, min(self.BATCH_ROWS, estimated_rows)),
+            "workers": workers
+        }
+        self.logger.info(f"Engine chosen: {choice}")
+        return choice
+
+    def process(self, transactions: list, choice: dict, deduplicator = None,
+                detect_patterns: bool = True) -> tuple:
+        """
+        Processes the transactions with the chosen engine, then records
+        the choice with the time it took. The columnar engine turns the
+        transactions into columns in batches, which is slower than the row
+        engine; use process_encoded for files read as columns.
+
+        Args:
+            transactions(list): the transactions to process.
+            choice(dict): a choice returned by choose.
+            deduplicator(TransactionDeduplicator): skips transactions whose
+            Transaction ID was already processed, and gives the results
+            they produced to the processor first; None to process every row
+            detect_patterns(bool): look for near-duplicate and split transactions
+
+        Returns:
+            the DataProcessor and the dict returned by process_data
+
+        Raises:
+            ValueError: the multiprocess engine is given a deduplicator
+        """
+        if choice["engine"] == "multiprocess" and deduplicator is not None:
+            raise ValueError("The multiprocess engine cannot deduplicate transactions")
+
+        start = time.perf_counter()
+        # The columnar engine adds only the rows it processed to input_data,
+        # like process_data does for the row engine when deduplicating.
+        data_processor = DataProcessor(
+            [] if choice["engine"] == "columnar" else transactions,
+            deduplicator=deduplicator, detect_patterns=detect_patterns)
+        if deduplicator is not None:
+            deduplicator.restore_results(data_processor)
+
+        if choice["engine"] == "row":
+            processed_data = data_processor.process_data()
+        elif choice["engine"] == "columnar":
+            fields = ["Transaction ID", "Account number", "Date", "Transaction type",
+                      "Amount", "Currency", "Description", DataProcessor.COUNTERPARTY_FIELD]
+            batch_rows = choice["batch_rows"]
+            for start_row in range(0, len(transactions), batch_rows) or [0]:
+                batch = transactions[start_row:start_row + batch_rows]
+                processed_data = data_processor.process_columns(
+                    {field: [transaction.get(field) for transaction in batch]
+                     for field in fields})
+        else:
+            processed_data = self.__process_in_workers(data_processor, transactions,
+                                                       choice["workers"], detect_patterns)
+
+        self.record(choice, time.perf_counter() - start, len(transactions))
+        return data_processor, processed_data
+
+    def process_encoded(self, encoded_inputs: list, choice: dict, deduplicator = None,
+                        detect_patterns: bool = True) -> tuple:
+        """
+        Processes files read with InputHandler.read_encoded_data with the
+        columnar engine, then records the choice with the time it took.
+        The columns go to DataProcessor.process_columns as they were read,
+        so no dict is built for any row.
+
+        Args:
+            encoded_inputs(list): the dicts returned by read_encoded_data,
+            one per input file, in input order.
+            choice(dict): a columnar choice returned by choose.
+            deduplicator(TransactionDeduplicator): skips transactions whose
+            Transaction ID was already processed, and gives the results
+            they produced to the processor first; None to process every row
+            detect_patterns(bool): look for near-duplicate and split transactions
+
+        Returns:
+            the DataProcessor and the dict returned by process_data
+
+        Raises:
+            ValueError: the choice is not the columnar engine
+        """
+        if choice["engine"] != "columnar":
+            raise ValueError("Only the columnar engine processes encoded columns")
+
+        start = time.perf_counter()
+        data_processor = DataProcessor([], deduplicator=deduplicator,
+                                       detect_patterns=detect_patterns)
+        if deduplicator is not None:
+            deduplicator.restore_results(data_processor)
+        processed_data = data_processor.process_data()
+        rows = 0
+        for encoded in encoded_inputs:
+            columns = encoded["columns"]
+            if not len(columns.get("Amount", ())):
+                continue
+            rows += len(columns["Amount"])
+            processed_data = data_processor.process_columns(columns, encoded["symbols"])
+
+        self.record(choice, time.perf_counter() - start, rows)
+        return data_processor, processed_data
+
+    def record(self, choice: dict, seconds: float, rows: int) -> None:
+        """
+        Logs a choice with its timing and appends it to the timing log,
+        so estimated and actual rows and the speed of every engine can be
+        compared across runs.
+
+        Args:
+            choice(dict): the choice that ran.
+            seconds(float): how long processing took.
+            rows(int): the rows that were processed.
+
+        Returns:
+            None
+        """
+        entry = dict(choice, rows=rows, seconds=round(seconds, 6),
+                     rows_per_second=round(rows / seconds) if seconds > 0 else None,
+                     time=time.time())
+        self.logger.info(f"Engine timing: {entry}")
+
+        if self.__timing_log_path:
+            with open(self.__timing_log_path, "a") as timing_log:
+                timing_log.write(json.dumps(entry) + "\n")
+
+    def __process_in_workers(self, data_processor: DataProcessor, transactions: list,
+                             workers: int, detect_patterns: bool) -> dict:
+        """
+        Splits the transactions by the CRC-32 of their account number, so
+        every account and its pattern windows stay in one worker, and
+        merges the partitions back in input order.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        partitions = [([], []) for _ in range(workers)]
+        first_positions = {}
+        for position, transaction in enumerate(transactions):
+            account_number = transaction["Account number"]
+            partition = partitions[zlib.crc32(str(account_number).encode()) % workers]
+            partition[0].append(transaction)
+            partition[1].append(position)
+            first_positions.setdefault(("account", account_number), position)
+            first_positions.setdefault(("type", transaction["Transaction type"]), position)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(process_partition,
+                                        *zip(*partitions),
+                                        [detect_patterns] * workers))
+
+        # Accounts and transaction types are kept in the order they first
+        # appear in the input, as process_data would create them.
+        account_summaries = {}
+        transaction_statistics = {}
+        for result in results:
+            account_summaries.update(result["account_summaries"])
+            for transaction_type, statistic in result["transaction_statistics"].items():
+                total = transaction_statistics.setdefault(
+                    transaction_type, {"total_amount": 0, "transaction_count": 0})
+                total["total_amount"] += statistic["total_amount"]
+                total["transaction_count"] += statistic["transaction_count"]
+
+        def in_input_order(name: str) -> list:
+            rows = [row for result in results for row in result[name]]
+            return [row for _, row in sorted(rows, key=lambda row: row[0])]
+
+        data_processor.merge(
+            dict(sorted(account_summaries.items(),
+                        key=lambda item: first_positions[("account", item[0])])),
+            dict(sorted(transaction_statistics.items(),
+                        key=lambda item: first_positions[("type", item[0])])),
+            in_input_order("suspicious_transactions"),
+            in_input_order("transaction_patterns"),
+            len(transactions))
+
+        # Transfers cross partitions, so the graph is built here.
+        for transaction in transactions:
+            data_processor.update_transfer_graph(transaction)
+
+        return {
+            "account_summaries": data_processor.account_summaries,
+            "suspicious_transactions": data_processor.suspicious_transactions,
+            "transaction_statistics": data_processor.transaction_statistics,
+            "transaction_patterns": data_processor.transaction_patterns,
+        }
+
+    @staticmethod
+    def __cores() -> int:
+        if hasattr(os, "sched_getaffinity"):
+            return len(os.sched_getaffinity(0))
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def __memory_bytes():
+        try:
+            return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (AttributeError, ValueError, OSError):
+            return None
@@ -0,0 +1,441 @@
+"""
+Description: A class created to accept transactions pushed over a local
+HTTP socket, group them into micro-batches and feed a resident
+DataProcessor, together with a load generator to measure it.
+Usage: To incorporate this class into a class or program,
+import this using:
+from ingestion_server.ingestion_server import IngestionServer
+To run from the terminal type:
+py -m ingestion_server.ingestion_server serve --port 8080
+py -m ingestion_server.ingestion_server load --port 8080
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import statistics
+import time
+from datetime import date
+from input_handler.input_handler import InputHandler
+from data_processor.data_processor import DataProcessor
+
+class IngestionServer:
+    """
+    A class that ingests transactions over HTTP in micro-batches.
+
+    Every field the processor reads is checked before a request is
+    queued, so a bad record is answered with 400 before anything is
+    applied. Within a batch every transaction is applied on its own, so
+    one that still fails does not fail the others. A request is answered
+    with 500 only when none of its transactions were applied, so
+    retrying it never counts a transaction twice.
+
+    Attributes:
+        __data_processor (DataProcessor): the resident processor
+        __input_handler (InputHandler): validates the pushed transactions
+        __queue (asyncio.Queue): requests waiting for the next batch
+        __batch_size (int): the number of transactions that closes a batch
+        __batch_interval (float): the seconds that close a batch
+
+    Methods (instance methods):
+        start (int): starts listening and returns the bound port.
+        stop(): stops listening and flushes the last batch.
+        serve_forever(): starts and runs until cancelled.
+
+    Endpoints:
+        POST /transactions: a JSON object or list, or a csv document with
+                            a header row.
+        GET /account_summaries, GET /account_summaries/<account number>,
+        GET /suspicious_transactions, GET /transaction_statistics,
+        GET /metrics
+    """
+
+    REQUIRED_FIELDS = ["Account number", "Date", "Transaction type", "Amount", "Currency"]
+    """
+    Fields every pushed transaction needs before it can be validated.
+    """
+
+    VALUE_FIELDS = ["Transaction ID", DataProcessor.COUNTERPARTY_FIELD]
+    """
+    Optional fields that must be text or a whole number when given, like
+    the Account number, because they are used as keys.
+    """
+
+    def __init__(self, host: str = "127.0.0.1",
+                 port: int = 8080,
+                 batch_size: int = 500,
+                 batch_interval: float = 0.05,
+                 log_file = None):
+        """
+        Initialize a new IngestionServer with an empty DataProcessor.
+
+        Args:
+            host(str): the interface to listen on.
+            port(int): the port to listen on, 0 for any free port.
+            batch_size(int): the number of transactions that closes a batch.
+            batch_interval(float): the seconds after the first transaction
+            of a batch that close it.
+            log_file(str): the file that contains the logs
+
+        Returns:
+            None
+        """
+        self.__host = host
+        self.__port = port
+        self.__batch_size = batch_size
+        self.__batch_interval = batch_interval
+        self.__data_processor = DataProcessor([], log_file=log_file,
+                                              retain_transactions=False)
+        self.__input_handler = InputHandler("<socket>")
+        self.__queue = None
+        self.__server = None
+        self.__batch_task = None
+        self.__metrics = {"batches": 0, "transactions": 0, "rejected": 0,
+                          "failed_transactions": 0}
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def data_processor(self) -> DataProcessor:
+        """
+        Accessor for the resident DataProcessor.
+        """
+        return self.__data_processor
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Accessor for a dict of batch, transaction, rejection and failed
+        transaction counts.
+        """
+        return self.__metrics
+
+    async def start(self) -> int:
+        """
+        Starts listening and processing batches.
+
+        Returns:
+            the port the server is bound to
+        """
+        self.__queue = asyncio.Queue()
+        self.__batch_task = asyncio.create_task(self.__batch_loop())
+        self.__server = await asyncio.start_server(self.__handle_connection,
+                                                   self.__host, self.__port)
+        self.__port = self.__server.sockets[0].getsockname()[1]
+        self.logger.info(f"Ingestion server listening on port {self.__port}")
+        return self.__port
+
+    async def stop(self) -> None:
+        """
+        Stops listening, waits for queued transactions to be processed
+        and stops the batch loop.
+        """
+        self.__server.close()
+        await self.__server.wait_closed()
+        await self.__queue.join()
+        self.__batch_task.cancel()
+
+    async def serve_forever(self) -> None:
+        """
+        Starts the server and runs until the task is cancelled.
+        """
+        await self.start()
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def __batch_loop(self) -> None:
+        """
+        Takes requests off the queue until batch_size transactions are
+        collected or batch_interval has passed since the first one, then
+        processes them and answers every request in the batch with the
+        number of its transactions applied and the errors of the others.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            transactions, future = await self.__queue.get()
+            requests = [(transactions, future)]
+            batch_rows = len(transactions)
+            deadline = loop.time() + self.__batch_interval
+
+            while batch_rows < self.__batch_size:
+                if self.__queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        transactions, future = await asyncio.wait_for(
+                            self.__queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    transactions, future = self.__queue.get_nowait()
+                requests.append((transactions, future))
+                batch_rows += len(transactions)
+
+            for transactions, future in requests:
+                applied = 0
+                errors = []
+                for transaction in transactions:
+                    try:
+                        self.__data_processor.process_transactions([transaction])
+                    except Exception as exception:
+                        # A failed transaction must not fail the rest of
+                        # the batch or stop the loop, or every later
+                        # request would wait forever for its answer.
+                        self.logger.exception(f"Transaction failed: {transaction}")
+                        errors.append(exception)
+                    else:
+                        applied += 1
+
+                self.__metrics["transactions"] += applied
+                self.__metrics["failed_transactions"] += len(errors)
+                if not future.done():
+                    future.set_result((applied, errors))
+                self.__queue.task_done()
+            self.__metrics["batches"] += 1
+
+    async def __handle_connection(self, reader: asyncio.StreamReader,
+                                  writer: asyncio.StreamWriter) -> None:
+        """
+        Reads HTTP/1.1 requests from one connection, keeping it open
+        until the client closes it or asks to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(
+                    int(headers.get("content-length", 0)))
+                status, payload = await self.__route(method, target,
+                                                     headers, body)
+
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status}\r\n"
+                             "Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n"
+                             .encode() + data)
+                await writer.drain()
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def __route(self, method: str, target: str,
+                      headers: dict, body: bytes) -> tuple:
+        """
+        Answers one request.
+
+        Returns:
+            the HTTP status line and the JSON payload
+        """
+        if method == "POST" and target == "/transactions":
+            try:
+                records = self.__parse_records(headers, body)
+            except ValueError as error:
+                return "400 Bad Request", {"error": str(error)}
+
+            valid_transactions = self.__input_handler.data_validation(records)
+            rejected = len(records) - len(valid_transactions)
+            self.__metrics["rejected"] += rejected
+
+            response = {"accepted": 0, "rejected": rejected}
+            if valid_transactions:
+                future = asyncio.get_running_loop().create_future()
+                await self.__queue.put((valid_transactions, future))
+                applied, errors = await future
+                response["accepted"] = applied
+                if errors:
+                    response["failed"] = len(errors)
+                    response["error"] = f"Transactions could not be processed: {errors[0]}"
+                    if not applied:
+                        # Nothing was applied, so the request can be retried
+                        return "500 Internal Server Error", response
+            return "200 OK", response
+
+        if method == "GET" and target == "/account_summaries":
+            return "200 OK", list(
+                self.__data_processor.account_summaries.values())
+
+        if method == "GET" and target.startswith("/account_summaries/"):
+            account_number = target.rsplit("/", 1)[1]
+            account_summaries = self.__data_processor.account_summaries
+            summary = account_summaries.get(account_number)
+            if summary is None and account_number.isdigit():
+                summary = account_summaries.get(int(account_number))
+            if summary is None:
+                return "404 Not Found", {"error": "Unknown account number"}
+            return "200 OK", summary
+
+        if method == "GET" and target == "/suspicious_transactions":
+            return "200 OK", self.__data_processor.suspicious_transactions
+
+        if method == "GET" and target == "/transaction_statistics":
+            return "200 OK", self.__data_processor.transaction_statistics
+
+        if method == "GET" and target == "/metrics":
+            return "200 OK", self.__metrics
+
+        return "404 Not Found", {"error": f"No route for {method} {target}"}
+
+    def __parse_records(self, headers: dict, body: bytes) -> list:
+        """
+        Turns a JSON or csv request body into a list of transactions.
+
+        Raises:
+            ValueError: the body is not valid JSON or csv
+            ValueError: a record is missing one of the REQUIRED_FIELDS
+            ValueError: an Account number, Currency or one of the
+            VALUE_FIELDS is not a single value
+            ValueError: a Date or Description is not text, or a Date is
+            not in YYYY-MM-DD format
+        """
+        text = body.decode()
+        if "csv" in headers.get("content-type", ""):
+            records = [self.__input_handler.convert_amount(row)
+                       for row in csv.DictReader(text.splitlines())]
+        else:
+            records = json.loads(text)
+            if isinstance(records, dict):
+                records = [records]
+
+        for record in records:
+            if not isinstance(record, dict) \
+                or any(field not in record for field in self.REQUIRED_FIELDS):
+                raise ValueError(f"Transactions need the fields {self.REQUIRED_FIELDS}")
+            account_number = record["Account number"]
+            if isinstance(account_number, bool) \
+                or not isinstance(account_number, (str, int)) \
+                or not isinstance(record["Currency"], str):
+                raise ValueError("Account number must be text or a whole number "
+                                 "and Currency must be text")
+            for field in self.VALUE_FIELDS:
+                value = record.get(field)
+                if value is not None and (isinstance(value, bool)
+                                          or not isinstance(value, (str, int))):
+                    raise ValueError(f"{field} must be text or a whole number")
+            if not isinstance(record.get("Description", ""), str):
+                raise ValueError("Description must be text")
+            try:
+                date.fromisoformat(record["Date"])
+            except (TypeError, ValueError):
+                raise ValueError(f"Date must be in YYYY-MM-DD format: {record['Date']!r}")
+        return records
+
+async def send_request(reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter,
+                       method: str, target: str,
+                       payload = None) -> tuple:
+    """
+    Sends one request over an open keep-alive connection.
+
+    Returns:
+        the HTTP status code and the decoded JSON response
+    """
+    data = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {target} HTTP/1.1\r\n"
+                 "Content-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    return status, json.loads(await reader.readexactly(content_length))
+
+async def generate_load(host: str = "127.0.0.1", port: int = 8080,
+                        requests: int = 1000,
+                        records_per_request: int = 10,
+                        concurrency: int = 10) -> dict:
+    """
+    Pushes generated transactions from several keep-alive connections
+    and measures the time until each request was processed.
+
+    Returns:
+        the transactions per second and the p50, p95 and p99 latencies
+        in milliseconds
+    """
+    latencies = []
+    counter = iter(range(requests))
+
+    async def producer(worker: int) -> None:
+        reader, writer = await asyncio.open_connection(host, port)
+        for request_number in counter:
+            records = [{
+                "Transaction ID": request_number * records_per_request + index,
+                "Account number": 1000 + (request_number + index) % 100,
+                "Date": "2023-03-01",
+                "Transaction type": "deposit" if index % 2 else "withdrawal",
+                "Amount": 100 + index,
+                "Currency": "CAD",
+                "Description": f"Load {worker}"
+            } for index in range(records_per_request)]
+
+            start = time.perf_counter()
+            await send_request(reader, writer, "POST", "/transactions", records)
+            latencies.append((time.perf_counter() - start) * 1000)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(producer(worker) for worker in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "transactions_per_second": requests * records_per_request / elapsed,
+        "p50_ms": percentiles[49],
+        "p95_ms": percentiles[94],
+        "p99_ms": percentiles[98]
+    }
+
+def main() -> None:
+    """Runs the ingestion server or the load generator."""
+    parser = argparse.ArgumentParser(
+        description="Ingest transactions over a local HTTP socket.")
+    parser.add_argument("command", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--batch-interval", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--records-per-request", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--log-file", default="output/fdp_team_8.log")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = IngestionServer(args.host, args.port, args.batch_size,
+                                 args.batch_interval, args.log_file)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(generate_load(
+            args.host, args.port, args.requests,
+            args.records_per_request, args.concurrency)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ __version__ = "branch_issue_01"
 # IMPORTS
 import csv
 import json
+import os
+import struct
+from array import array
 from os import path
 
 # CLASS
@@ -28,6 +31,37 @@ class InputHandler:
         read_input_data(self) -> list
         read_csv_data(self) -> list
         read_json_data(self) -> list
+        read_appended_data(self, offset) -> tuple
+        read_sample_data(self, sample_size, seed) -> dict
+        read_filtered_data(self, ...) -> list
+        read_archive_data(self, ...) -> list
+        build_account_index(self) -> dict
+        read_account_transactions(self, account_number) -> list
+        get_symbol_table(self, field) -> list
+        read_encoded_data(self) -> dict
+    """
+
+    SYMBOL_FIELDS = ["Transaction type", "Currency", "Description"]
+    """
+    Fields that repeat a few values over and over. Every valid transaction shares one string
+    per distinct value of these fields instead of keeping its own copy.
+    """
+
+    MAX_SYMBOLS = 65536
+    """
+    Most distinct values kept per field, so a field that turns out not to repeat does not
+    grow its symbol table without limit.
+    """
+
+    INDEX_MAGIC = b"TXACIDX1"
+    """
+    First bytes of a sidecar account index, so an index in another format is rebuilt.
+    """
+
+    INDEX_HEADER = struct.Struct("<8sQqQQ")
+    """
+    Header of a sidecar account index: magic, file size and modification time in nanoseconds
+    the index was built for, account count and width of the account number field.
     """
 
 # METHODS
@@ -40,6 +74,7 @@ class InputHandler:
         """
 
         self.__file_path = file_path
+        self.__symbols = {field: {} for field in self.SYMBOL_FIELDS}
 
     @property   ## ACCESSOR
     def file_path(self) -> str:
@@ -63,6 +98,7 @@ class InputHandler:
     def read_input_data(self) -> list:
         """
         This method is reading the file after choosing the format and saving it to a transactions list.
+        Csv amounts are converted with convert_amount, the same way read_filtered_data does.
         
         Return:
             list
@@ -73,9 +109,11 @@ class InputHandler:
         file_format = self.get_file_format()
         
         if file_format == "csv":
-            transactions =  self.read_csv_data()
+            transactions = [self.convert_amount(row) for row in self.read_csv_data()]
         elif file_format == "json":
             transactions = self.read_json_data()
+        elif file_format == "txa":
+            transactions = self.read_archive_data()
 
         valid_transactions = self.data_validation(transactions)
         return valid_transactions
@@ -129,6 +167,8 @@ class InputHandler:
     def data_validation(self, transactions:list) -> list:
         """
         The method returns a list of dictionaries containing only valid transactions.
+        The repeated fields of the valid transactions are replaced by the shared string in the
+        symbol table of the file, so rows that are kept do not each hold a copy.
 
         Args:
             transactions (list): A list of dictionaries containing transaction data.
@@ -143,8 +183,594 @@ class InputHandler:
 
             # Check if amount is numeric and non-negative, and validate transaction type
             if isinstance(amount, (int, float)) and amount >= 0 and transaction_type in ["deposit", "withdrawal", "transfer"]:
+                for field, symbols in self.__symbols.items():
+                    value = record.get(field)
+                    if isinstance(value, str):
+                        record[field] = self.__symbol(symbols, value)
                 valid_data.append(record)
 
         return valid_data
-    
 
+    def get_symbol_table(self, field: str) -> list:
+        """
+        This method is returning the distinct values of one of SYMBOL_FIELDS read so far. The
+        position of a value in the list is the code read_encoded_data uses for it.
+
+        Parameters:
+            field (str): One of SYMBOL_FIELDS.
+
+        Return:
+            list
+        """
+        return list(self.__symbols[field])
+
+    def read_encoded_data(self) -> dict:
+        """
+        This method is reading the valid transactions as columns instead of dicts. The
+        SYMBOL_FIELDS columns hold small integer codes into the symbol tables of the file, so
+        they can be given to DataProcessor.process_columns with the symbol tables. A csv file is
+        read row by row and a transaction archive block by block, without building a dict for
+        each row.
+
+        Return:
+            dict: columns (a list of values, or an array of codes, per field) and symbols (the
+            symbol table of every SYMBOL_FIELDS column)
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        if self.get_file_format() == "txa":
+            return self.__read_encoded_archive()
+
+        input_file = None
+        if self.get_file_format() != "csv":
+            transactions = self.read_input_data()
+            fields = list(dict.fromkeys(field for record in transactions for field in record))
+            rows = ([record.get(field) for field in fields] for record in transactions)
+        else:
+            input_file = open(self.__file_path, "r", newline="")
+            reader = csv.reader(input_file)
+            fields = next(reader, [])
+            rows = reader
+
+        columns = {field: [] for field in fields}
+        codes = {field: {} for field in self.SYMBOL_FIELDS if field in columns}
+        for field in codes:
+            columns[field] = array("I")
+            for code, value in enumerate(self.__symbols[field]):
+                codes[field][value] = code
+
+        if "Amount" not in fields or "Transaction type" not in fields:
+            rows = []
+        else:
+            amount_index = fields.index("Amount")
+            type_index = fields.index("Transaction type")
+
+        try:
+            for row in rows:
+                if len(row) != len(fields):
+                    continue
+                amount = row[amount_index]
+                if isinstance(amount, str):
+                    amount = self.convert_amount({"Amount": amount})["Amount"]
+                if not isinstance(amount, (int, float)) or not amount >= 0 \
+                    or row[type_index] not in ["deposit", "withdrawal", "transfer"]:
+                    continue
+                row[amount_index] = amount
+
+                for field, value in zip(fields, row):
+                    field_codes = codes.get(field)
+                    if field_codes is None:
+                        columns[field].append(value)
+                        continue
+                    code = field_codes.get(value)
+                    if code is None:
+                        if len(field_codes) >= self.MAX_SYMBOLS:
+                            # The table is full, so the field keeps its raw values
+                            table = list(field_codes)
+                            columns[field] = [table[code] for code in columns[field]]
+                            columns[field].append(value)
+                            del codes[field]
+                            continue
+                        code = field_codes[value] = len(field_codes)
+                        self.__symbol(self.__symbols[field], value)
+                    columns[field].append(code)
+        finally:
+            if input_file is not None:
+                input_file.close()
+
+        return {"columns": columns,
+                "symbols": {field: list(field_codes) for field, field_codes in codes.items()}}
+
+    def __read_encoded_archive(self) -> dict:
+        """
+        Reads a transaction archive for read_encoded_data. Its columns are extended block by
+        block and only the dictionary of each block is renumbered into the symbol tables, so
+        no row is turned into a list or a dict. The rows were validated when they were archived.
+        """
+        from transaction_archive.transaction_archive import TransactionArchive
+
+        archive = TransactionArchive(self.__file_path)
+        fields = archive.fields()
+        columns = {field: [] for field in fields}
+        codes = {field: {} for field in self.SYMBOL_FIELDS if field in columns}
+        for field in codes:
+            columns[field] = array("I")
+            for code, value in enumerate(self.__symbols[field]):
+                codes[field][value] = code
+
+        for block in archive.read_encoded_columns():
+            for field, values in block["columns"].items():
+                dictionary = block["dictionaries"].get(field)
+                field_codes = codes.get(field)
+                if field_codes is not None and dictionary is not None:
+                    added = [value for value in dict.fromkeys(dictionary)
+                             if value not in field_codes]
+                    if len(field_codes) + len(added) <= self.MAX_SYMBOLS:
+                        for value in added:
+                            field_codes[value] = len(field_codes)
+                            self.__symbol(self.__symbols[field], value)
+                        renumbered = [field_codes[value] for value in dictionary]
+                        columns[field].extend(map(renumbered.__getitem__, values))
+                        continue
+                    # The table is full, so the field keeps its raw values
+                    table = list(field_codes)
+                    columns[field] = [table[code] for code in columns[field]]
+                    del codes[field]
+                if dictionary is not None:
+                    values = map(dictionary.__getitem__, values)
+                columns[field].extend(values)
+
+        return {"columns": columns,
+                "symbols": {field: list(field_codes) for field, field_codes in codes.items()}}
+
+    def __symbol(self, symbols: dict, value: str) -> str:
+        """
+        Returns the shared copy of a value, adding it while the table has room.
+        """
+        symbol = symbols.get(value)
+        if symbol is None:
+            if len(symbols) >= self.MAX_SYMBOLS:
+                return value
+            symbol = symbols[value] = value
+        return symbol
+
+    def read_appended_data(self, offset: int = 0) -> tuple:
+        """
+        This method is reading only the csv rows that were appended after the given byte offset.
+        A trailing row without a newline is left for the next call, because the writer may
+        still be in the middle of it. Numeric text amounts are converted so that csv rows
+        pass the same validation rules as json rows.
+
+        Parameters:
+            offset (int): The byte offset returned by the previous call, 0 for the start of the file.
+
+        Return:
+            tuple: (list of valid transactions, new byte offset)
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+            ValueError: "Only csv files can be read incrementally."
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        if self.get_file_format() != "csv":
+            raise ValueError("Only csv files can be read incrementally.")
+
+        with open(self.__file_path, "rb") as input_file:
+            header = input_file.readline()
+            if not header.endswith(b"\n"):
+                return [], 0
+
+            fieldnames = next(csv.reader([header.decode()]))
+            offset = max(offset, len(header))
+            input_file.seek(offset)
+            lines = []
+            for line in input_file:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if line.strip():
+                    lines.append(line.decode())
+
+        transactions = [self.convert_amount(row)
+                        for row in csv.DictReader(lines, fieldnames=fieldnames)]
+        return self.data_validation(transactions), offset
+
+    def convert_amount(self, record: dict) -> dict:
+        """
+        This method is converting a numeric text amount into an int or float.
+        Amounts that are not numeric are left as they are so data_validation still rejects them.
+
+        Parameters:
+            record (dict): A transaction read from a csv file.
+
+        Return:
+            dict
+        """
+        amount = record.get("Amount")
+        if isinstance(amount, str):
+            try:
+                record["Amount"] = int(amount)
+            except ValueError:
+                try:
+                    record["Amount"] = float(amount)
+                except ValueError:
+                    pass
+        return record
+
+    def read_sample_data(self, sample_size: int = 10000, seed: int = None) -> dict:
+        """
+        This method is reading a uniform random sample of rows instead of the whole file.
+        Small csv files are read fully with reservoir sampling, and json files and transaction
+        archives are read fully and sampled. For a csv file
+        larger than a few times the sample, it seeks to random byte offsets and takes the row
+        each one falls in, so the time does not depend on the file size. Long rows are hit more
+        often, so each row is kept with a chance inversely proportional to its length, and the
+        row count is estimated from the file size and the mean of 1 / length of the hit rows.
+
+        Parameters:
+            sample_size (int): The number of rows to sample.
+            seed (int): The seed of the random generator, to repeat a sample.
+
+        Return:
+            dict: transactions (the valid sampled rows), sampled_rows (every sampled row,
+            valid or not), estimated_rows and exact (True if every row was read)
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        import random
+
+        generator = random.Random(seed)
+
+        if self.get_file_format() in ("json", "txa"):
+            rows = self.read_json_data() if self.get_file_format() == "json" \
+                else self.read_archive_data()
+            row_count = len(rows)
+            sample = generator.sample(rows, min(sample_size, row_count))
+            return self.__sample_result(sample, row_count, True)
+
+        with open(self.__file_path, "rb") as input_file:
+            header = input_file.readline()
+            fieldnames = next(csv.reader([header.decode()]))
+            data_size = path.getsize(self.__file_path) - len(header)
+
+            if data_size <= sample_size * 1024:
+                sample = []
+                row_count = 0
+                for line in input_file:
+                    if not line.strip():
+                        continue
+                    row_count += 1
+                    if len(sample) < sample_size:
+                        sample.append(line)
+                    else:
+                        index = generator.randrange(row_count)
+                        if index < sample_size:
+                            sample[index] = line
+                exact = True
+            else:
+                # The row under a random byte offset is picked with a chance
+                # proportional to its length, so it is kept only with a chance
+                # of shortest / length, where no row can be shorter than its
+                # separators. The row count uses the mean of 1 / length over
+                # every picked row, which this length bias makes unbiased.
+                shortest = len(fieldnames)
+                sample = []
+                inverse_lengths = 0.0
+                picks = 0
+                while len(sample) < sample_size and picks < sample_size * 1000:
+                    line = self.__row_at(input_file, len(header),
+                                         len(header) + generator.randrange(data_size))
+                    picks += 1
+                    inverse_lengths += 1 / len(line)
+                    if line.strip() and generator.random() < shortest / len(line):
+                        sample.append(line)
+                row_count = round(data_size * inverse_lengths / picks)
+                exact = False
+
+        rows = [self.convert_amount(row) for row in
+                csv.DictReader([line.decode() for line in sample], fieldnames=fieldnames)]
+        return self.__sample_result(rows, row_count, exact)
+
+    def read_filtered_data(self, start_date: str = None, end_date: str = None,
+                           account_numbers = None, transaction_types = None,
+                           currencies = None, sorted_by_date: bool = False) -> list:
+        """
+        This method is reading only the rows that match the filters. For csv files the filters
+        are checked on the raw fields of each row before a dict is built or the amount is
+        converted, so rows that are filtered out cost very little. When the file is sorted by
+        Date, a binary search over byte offsets finds the first row of the date range and the
+        read stops after the last one.
+
+        Parameters:
+            start_date (str): The first Date to keep, in YYYY-MM-DD format.
+            end_date (str): The last Date to keep, in YYYY-MM-DD format.
+            account_numbers: The account numbers to keep.
+            transaction_types: The transaction types to keep.
+            currencies: The currencies to keep.
+            sorted_by_date (bool): The csv file is sorted by Date.
+
+        Return:
+            list
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+        """
+        accounts = None if account_numbers is None else {str(account) for account in account_numbers}
+        types = None if transaction_types is None else set(transaction_types)
+        currency_set = None if currencies is None else set(currencies)
+
+        def matches(transaction_date, account_number, transaction_type, currency) -> bool:
+            return (start_date is None or transaction_date >= start_date) \
+                and (end_date is None or transaction_date <= end_date) \
+                and (accounts is None or str(account_number) in accounts) \
+                and (types is None or transaction_type in types) \
+                and (currency_set is None or currency in currency_set)
+
+        if self.get_file_format() == "txa":
+            return self.data_validation([
+                record for record in self.read_archive_data(start_date, end_date, account_numbers)
+                if matches(record["Date"], record["Account number"],
+                           record["Transaction type"], record["Currency"])])
+
+        if self.get_file_format() == "json":
+            return self.data_validation([
+                record for record in self.read_json_data()
+                if matches(record["Date"], record["Account number"],
+                           record["Transaction type"], record["Currency"])])
+
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        transactions = []
+        with open(self.__file_path, "rb") as input_file:
+            header = input_file.readline()
+            fieldnames = next(csv.reader([header.decode()]))
+            date_index = fieldnames.index("Date")
+            account_index = fieldnames.index("Account number")
+            type_index = fieldnames.index("Transaction type")
+            currency_index = fieldnames.index("Currency")
+
+            if sorted_by_date and start_date is not None:
+                input_file.seek(self.__find_first_date(input_file, len(header),
+                                                       date_index, start_date))
+
+            for row in csv.reader(line.decode() for line in input_file):
+                if not row:
+                    continue
+                if sorted_by_date and end_date is not None and row[date_index] > end_date:
+                    break
+                if matches(row[date_index], row[account_index],
+                           row[type_index], row[currency_index]):
+                    transactions.append(self.convert_amount(dict(zip(fieldnames, row))))
+
+        return self.data_validation(transactions)
+
+    def __find_first_date(self, input_file, data_start: int,
+                          date_index: int, start_date: str) -> int:
+        """
+        Binary search over byte offsets for the start of the first row with a Date on or after
+        start_date, in a csv file sorted by Date.
+        """
+        def line_start(position: int) -> int:
+            if position <= data_start:
+                return data_start
+            input_file.seek(position - 1)
+            input_file.readline()
+            return input_file.tell()
+
+        low = data_start
+        high = path.getsize(self.__file_path)
+        while low < high:
+            middle = (low + high) // 2
+            input_file.seek(line_start(middle))
+            line = input_file.readline()
+            row = next(csv.reader([line.decode()]), None) if line.strip() else None
+            if row is None or row[date_index] >= start_date:
+                high = middle
+            else:
+                low = middle + 1
+        return line_start(low)
+
+    def read_archive_data(self, start_date: str = None, end_date: str = None,
+                          account_numbers = None) -> list:
+        """
+        This method is reading a transaction archive written by TransactionArchive. Blocks
+        whose dates or account numbers cannot match the filters are skipped without being read.
+
+        Parameters:
+            start_date (str): The first Date to keep, in YYYY-MM-DD format.
+            end_date (str): The last Date to keep, in YYYY-MM-DD format.
+            account_numbers: The account numbers to keep.
+
+        Return:
+            list
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        from transaction_archive.transaction_archive import TransactionArchive
+
+        return TransactionArchive(self.__file_path).read_transactions(
+            start_date, end_date, account_numbers)
+
+    def get_index_path(self) -> str:
+        """
+        This method is returning the path of the sidecar account index of the file.
+
+        Return:
+            str
+        """
+        return self.__file_path + ".idx"
+
+    def build_account_index(self) -> dict:
+        """
+        This method is scanning the csv file once and writing a sidecar index next to it that maps
+        every account number to the byte offsets of its rows. The index starts with a fixed-size
+        header holding the file size and modification time it was built for, then one fixed-width
+        entry per account sorted by account number, each holding the account number and the
+        position and count of its offsets, and then all offsets as 8-byte integers grouped by
+        account. The file is fingerprinted before the scan and only the rows within that size are
+        indexed, so rows appended during the scan make the index stale instead of being marked
+        as indexed.
+
+        Return:
+            dict: the index header
+
+        Raises:
+            FileNotFoundError: "File: ... does not exist."
+        """
+        if not path.isfile(self.__file_path):
+            raise FileNotFoundError(f"File: {self.__file_path} does not exist.")
+
+        fingerprint = self.__fingerprint()
+        offsets_by_account = {}
+        with open(self.__file_path, "rb") as input_file:
+            header = input_file.readline()
+            account_index = next(csv.reader([header.decode()])).index("Account number")
+            offset = len(header)
+            for line in input_file:
+                if offset + len(line) > fingerprint[0]:
+                    break
+                if line.strip():
+                    if b'"' in line:
+                        account_number = next(csv.reader([line.decode()]))[account_index]
+                    else:
+                        account_number = line.split(b",")[account_index].decode()
+                    offsets = offsets_by_account.get(account_number.encode())
+                    if offsets is None:
+                        offsets = offsets_by_account[account_number.encode()] = array("Q")
+                    offsets.append(offset)
+                offset += len(line)
+
+        accounts = sorted(offsets_by_account)
+        key_width = max((len(account) for account in accounts), default=1)
+        entry = struct.Struct(f"<{key_width}sQQ")
+
+        temporary_path = self.get_index_path() + ".tmp"
+        with open(temporary_path, "wb") as index_file:
+            index_file.write(self.INDEX_HEADER.pack(self.INDEX_MAGIC, *fingerprint,
+                                                    len(accounts), key_width))
+            position = 0
+            for account in accounts:
+                index_file.write(entry.pack(account, position, len(offsets_by_account[account])))
+                position += len(offsets_by_account[account])
+            for account in accounts:
+                offsets_by_account[account].tofile(index_file)
+        os.replace(temporary_path, self.get_index_path())
+
+        return {"fingerprint": fingerprint, "accounts": len(accounts), "key_width": key_width}
+
+    def read_account_transactions(self, account_number, start_date: str = None,
+                                  end_date: str = None) -> list:
+        """
+        This method is reading only the rows of one account by seeking to the offsets in the
+        sidecar index. The index is built first if it is missing, or rebuilt if the file has
+        changed since it was built. Only the header, the entries met by a binary search and the
+        offsets of the account are read from the index.
+
+        Parameters:
+            account_number: The account to read.
+            start_date (str): The first Date to keep, in YYYY-MM-DD format.
+            end_date (str): The last Date to keep, in YYYY-MM-DD format.
+
+        Return:
+            list
+        """
+        offsets = self.__find_account_offsets(str(account_number))
+        if offsets is None:
+            self.build_account_index()
+            offsets = self.__find_account_offsets(str(account_number)) or array("Q")
+
+        transactions = []
+        with open(self.__file_path, "rb") as input_file:
+            fieldnames = next(csv.reader([input_file.readline().decode()]))
+            for offset in offsets:
+                input_file.seek(offset)
+                row = next(csv.reader([input_file.readline().decode()]))
+                transaction = dict(zip(fieldnames, row))
+                if (start_date is None or transaction["Date"] >= start_date) \
+                    and (end_date is None or transaction["Date"] <= end_date):
+                    transactions.append(self.convert_amount(transaction))
+
+        return self.data_validation(transactions)
+
+    def __find_account_offsets(self, account_number: str):
+        """
+        Binary searches the entries of the sidecar index for the account and reads only its
+        offsets. Returns None when the index is missing or was built for another version of the
+        file.
+        """
+        if not path.isfile(self.get_index_path()):
+            return None
+
+        with open(self.get_index_path(), "rb") as index_file:
+            header = index_file.read(self.INDEX_HEADER.size)
+            if len(header) < self.INDEX_HEADER.size:
+                return None
+            magic, size, modified, account_count, key_width = self.INDEX_HEADER.unpack(header)
+            if magic != self.INDEX_MAGIC or [size, modified] != self.__fingerprint():
+                return None
+
+            offsets = array("Q")
+            key = account_number.encode()
+            if len(key) > key_width:
+                return offsets
+            key = key.ljust(key_width, b"\0")
+
+            entry = struct.Struct(f"<{key_width}sQQ")
+            low, high = 0, account_count
+            while low < high:
+                middle = (low + high) // 2
+                index_file.seek(self.INDEX_HEADER.size + middle * entry.size)
+                account, position, count = entry.unpack(index_file.read(entry.size))
+                if account < key:
+                    low = middle + 1
+                elif account > key:
+                    high = middle
+                else:
+                    index_file.seek(self.INDEX_HEADER.size + account_count * entry.size
+                                    + position * offsets.itemsize)
+                    offsets.frombytes(index_file.read(count * offsets.itemsize))
+                    break
+
+        return offsets
+
+    def __fingerprint(self) -> list:
+        status = os.stat(self.__file_path)
+        return [status.st_size, status.st_mtime_ns]
+
+    def __row_at(self, input_file, data_start: int, offset: int) -> bytes:
+        # Steps back from the offset to the start of the row it falls in
+        # and reads that row.
+        start = offset
+        while start > data_start:
+            chunk_start = max(data_start, start - 4096)
+            input_file.seek(chunk_start)
+            newline = input_file.read(start - chunk_start).rfind(b"\n")
+            if newline != -1:
+                start = chunk_start + newline + 1
+                break
+            start = chunk_start
+        input_file.seek(start)
+        return input_file.readline()
+
+    def __sample_result(self, rows: list, row_count: int, exact: bool) -> dict:
+        return {
+            "transactions": self.data_validation(rows),
+            "sampled_rows": len(rows),
+            "estimated_rows": row_count,
+            "exact": exact
+        }
@@ -1,76 +1,340 @@
 """
-Description: A program that will process input files and 
-will then create output files that will show data account 
-summaries, suspicious transactions from the data, and 
+Description: A program that will process input files and
+will then create output files that will show data account
+summaries, suspicious transactions from the data, and
 transaction statistics from the data.
 Usage: To run: Press the play button in the top left
-corner of VS code or in the terminal type: 
+corner of VS code or in the terminal type:
 py main.py
+py main.py --help to see the options for inputs, outputs and engines.
 """
 
 __author__ = "Shannon Petkau"
 __version__ = "branch_issue_5"
 
+import argparse
+import logging
+import os
+import sys
 from os import path
 from input_handler.input_handler import InputHandler
 from data_processor.data_processor import DataProcessor
 from output_handler.output_handler import OutputHandler
 
-def main() -> None:
-    """Main function to read input data, process it, and write the 
+# Retrieves the directory name of the current script or module file.
+CURRENT_DIRECTORY = path.dirname(path.abspath(__file__))
+
+def parse_arguments(argv: list) -> argparse.Namespace:
+    """Parses the command line options.
+
+    Args:
+        argv (list): the command line arguments without the program name.
+
+    Returns:
+        argparse.Namespace: the parsed options.
+    """
+    parser = argparse.ArgumentParser(
+        description="Process transaction files into account summaries, "
+                    "suspicious transactions and transaction statistics.")
+    parser.add_argument("--input", nargs="+", dest="input_files",
+                        default=[path.join(CURRENT_DIRECTORY, "input/input_data.csv")],
+                        help="csv or json input files")
+    parser.add_argument("--output-dir",
+                        default=path.join(CURRENT_DIRECTORY, "output"),
+                        help="directory for the output files")
+    parser.add_argument("--prefix", default="output_data",
+                        help="prefix of the output file names")
+    parser.add_argument("--log-file", default=path.join(CURRENT_DIRECTORY,
+                                                        "output/fdp_team_8.log"))
+    parser.add_argument("--log-level", default="INFO",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+
+    filters = parser.add_argument_group("filters")
+    filters.add_argument("--start-date", default=None, help="first Date, YYYY-MM-DD")
+    filters.add_argument("--end-date", default=None, help="last Date, YYYY-MM-DD")
+    filters.add_argument("--accounts", nargs="+", default=None)
+    filters.add_argument("--types", nargs="+", default=None)
+    filters.add_argument("--currencies", nargs="+", default=None)
+    filters.add_argument("--sorted-by-date", action="store_true",
+                         help="the csv inputs are sorted by Date")
+
+    outputs = parser.add_argument_group("outputs")
+    outputs.add_argument("--sort-accounts", default=None,
+                         choices=["account_number", "balance",
+                                  "total_deposits", "total_withdrawals"],
+                         help="write account summaries sorted by this field")
+    outputs.add_argument("--sort-suspicious", action="store_true",
+                         help="write suspicious transactions sorted by Date and Amount")
+    outputs.add_argument("--memory-budget-rows", type=int, default=1_000_000,
+                         help="most rows sorted in memory before spilling to disk")
+    outputs.add_argument("--partitions", type=int, default=0,
+                         help="also write this many hash partitions and a manifest")
+    outputs.add_argument("--sqlite", default=None,
+                         help="also load the results into this SQLite database")
+    outputs.add_argument("--archive", default=None,
+                         help="also archive the valid transactions to this .txa file, "
+                              "which can be given to --input to replay them, fastest "
+                              "with --engine columnar")
+
+    engine = parser.add_argument_group("engine")
+    engine.add_argument("--preview", type=int, default=0, metavar="SAMPLE_SIZE",
+                        help="estimate totals from a random sample of this many rows "
+                             "per input file")
+    engine.add_argument("--daemon", action="store_true",
+                        help="keep running and process rows appended to the inputs")
+    engine.add_argument("--poll-interval", type=float, default=0.5)
+    engine.add_argument("--dedup-state", default=None,
+                        help="file of processed Transaction IDs and the results they "
+                             "produced, kept between runs; the balance history and "
+                             "transfer graph cover only the new transactions")
+    engine.add_argument("--no-patterns", action="store_true",
+                        help="skip near-duplicate and split transaction detection")
+    engine.add_argument("--sorted-by-account", action="store_true",
+                        help="the inputs are sorted by Account number, so account "
+                             "summaries are written as each account ends")
+    engine.add_argument("--engine", default="row",
+                        choices=["row", "columnar", "multiprocess", "auto"],
+                        help="how to process the transactions, auto to choose "
+                             "from the input size, cores and memory")
+    engine.add_argument("--journal", default=None, metavar="DIRECTORY",
+                        help="journal processed batches here and resume from "
+                             "them after a crash")
+    engine.add_argument("--snapshot-interval", type=int, default=100,
+                        help="journaled batches between snapshots")
+    arguments = parser.parse_args(argv)
+    if arguments.sorted_by_account and (arguments.partitions or arguments.sqlite):
+        parser.error("--sorted-by-account does not keep the account summaries "
+                     "needed by --partitions and --sqlite")
+    if arguments.sorted_by_account and arguments.dedup_state:
+        parser.error("--sorted-by-account writes each account as its transactions "
+                     "end, so it cannot include the results kept by --dedup-state")
+    if arguments.sorted_by_account and arguments.engine != "row":
+        parser.error("--sorted-by-account only runs with the row engine")
+    if arguments.journal and (arguments.sorted_by_account or arguments.engine != "row"):
+        parser.error("--journal only runs with the row engine")
+    return arguments
+
+def configure_logging(log_level: str, log_file: str) -> None:
+    """Configures logging once for the whole program.
+
+    Args:
+        log_level (str): the name of the logging level.
+        log_file (str): the file that contains the logs.
+    """
+    logging.basicConfig(level=getattr(logging, log_level),
+                        format="%(asctime)s - %(levelname)s - %(message)s",
+                        filename=log_file,
+                        filemode="w")
+
+def main(argv: list = None) -> None:
+    """Main function to read input data, process it, and write the
     results to output files.
 
-    - Reads input data from a CSV file using InputHandler.
+    - Reads input data from the input files using InputHandler.
     - Processes the data using DataProcessor.
-    - Writes the processed data to CSV and JSON files using 
+    - Writes the processed data to CSV and JSON files using
     OutputHandler.
+
+    Modules that only some options need are imported inside those
+    options so the default run starts quickly.
+
+    Args:
+        argv (list): the command line arguments without the program
+        name, None to use the defaults.
     """
-    # Create log_file path
-    log_file = "output/fdp_team_8.log"
+    arguments = parse_arguments(argv if argv is not None else [])
+    configure_logging(arguments.log_level, arguments.log_file)
+
+    # Joins the output folder, the prefix and the filename to create a
+    # complete path to each of the output files.
+    def output_path(filename: str) -> str:
+        return path.join(arguments.output_dir, f"{arguments.prefix}_{filename}")
+
+    if arguments.daemon:
+        from tail_daemon.tail_daemon import TailDaemon
 
-    # Create log_file path
-    log_file = "output/fdp_team_8.log"
+        daemon = TailDaemon(arguments.input_files, output_path("delta.jsonl"),
+                            arguments.poll_interval,
+                            dedup_state_path=arguments.dedup_state,
+                            database_path=arguments.sqlite)
+        daemon.run()
+        return
 
-    # Retrieves the directory name of the current script or module file.
-    current_directory = path.dirname(path.abspath(__file__))
+    if arguments.preview:
+        # Each file is estimated from its own sample and the estimates are
+        # added, so a small file's sample does not stand in for the rows
+        # of a large one.
+        estimates = []
+        for input_file in arguments.input_files:
+            sample = InputHandler(input_file).read_sample_data(arguments.preview)
+            estimates.append(
+                DataProcessor(sample["transactions"], detect_patterns=False)
+                .estimate_totals(sample["sampled_rows"], sample["estimated_rows"]))
 
-    # Joins the current directory, the relative path to the input folder 
-    # and the filename to create a complete path to the file.
-    input_file_path = path.join(current_directory, "input/input_data.csv")
+        OutputHandler({}, [], {}).write_estimates_to_csv(
+            output_path("estimates.csv"), DataProcessor.combine_estimates(estimates))
+        return
 
-    input_handler = InputHandler(input_file_path)
-    transactions = input_handler.read_input_data()
+    deduplicator = None
+    if arguments.dedup_state:
+        from transaction_deduplicator.transaction_deduplicator import TransactionDeduplicator
 
-    data_processor = DataProcessor(transactions, log_file=log_file)
-    processed_data = data_processor.process_data()
+        deduplicator = TransactionDeduplicator.load(arguments.dedup_state)
 
+    filtered = any(value is not None for value in (
+        arguments.start_date, arguments.end_date, arguments.accounts,
+        arguments.types, arguments.currencies))
+
+    choice = None
+    if arguments.engine != "row":
+        from engine_selector.engine_selector import EngineSelector
+
+        # Every choice and its timing is appended to the log so the
+        # limits between the engines can be tuned from real runs. Only
+        # unfiltered inputs that are not archived can be read as columns.
+        engine_selector = EngineSelector(output_path("engine_timings.jsonl"))
+        choice = engine_selector.choose(
+            arguments.input_files, arguments.engine,
+            deduplicate=deduplicator is not None,
+            read_columns=not filtered and not arguments.archive)
+
+    transactions = []
+    encoded_inputs = None
+    if choice is not None and choice["engine"] == "columnar" \
+        and not filtered and not arguments.archive:
+        # The columnar engine is given the columns as they are read, so no
+        # dict is built for any row.
+        encoded_inputs = [InputHandler(input_file).read_encoded_data()
+                          for input_file in arguments.input_files]
+    else:
+        for input_file in arguments.input_files:
+            input_handler = InputHandler(input_file)
+            if filtered:
+                transactions.extend(input_handler.read_filtered_data(
+                    arguments.start_date, arguments.end_date, arguments.accounts,
+                    arguments.types, arguments.currencies, arguments.sorted_by_date))
+            else:
+                transactions.extend(input_handler.read_input_data())
+
+    if arguments.archive:
+        from transaction_archive.transaction_archive import TransactionArchive
+
+        TransactionArchive(arguments.archive).write(transactions)
+
+    if encoded_inputs is not None:
+        data_processor, processed_data = engine_selector.process_encoded(
+            encoded_inputs, choice, deduplicator, not arguments.no_patterns)
+    elif choice is not None:
+        data_processor, processed_data = engine_selector.process(
+            transactions, choice, deduplicator, not arguments.no_patterns)
+    else:
+        # The journal adds the transactions to input_data itself while it
+        # processes them, so its processor starts empty.
+        data_processor = DataProcessor([] if arguments.journal else transactions,
+                                       deduplicator=deduplicator,
+                                       detect_patterns=not arguments.no_patterns)
+        if deduplicator is not None:
+            # The transactions of earlier runs are skipped as duplicates,
+            # so their results come from the dedup state.
+            deduplicator.restore_results(data_processor)
+        if arguments.sorted_by_account:
+            # Each summary is written as soon as its account ends instead of
+            # being kept until every transaction is processed. It goes to a
+            # temporary file that is published below with the other outputs,
+            # so the old outputs and their marker stay intact until then.
+            summaries_stream_path = path.join(
+                arguments.output_dir, f".{arguments.prefix}_account_summaries.csv.stream")
+            try:
+                OutputHandler({}, [], {}).write_account_summaries_stream(
+                    summaries_stream_path,
+                    data_processor.iter_sorted_account_summaries(sorted_by_account=True))
+            except BaseException:
+                if path.exists(summaries_stream_path):
+                    os.remove(summaries_stream_path)
+                raise
+            processed_data = {
+                "account_summaries": {},
+                "suspicious_transactions": data_processor.suspicious_transactions,
+                "transaction_statistics": data_processor.transaction_statistics,
+                "transaction_patterns": data_processor.transaction_patterns
+            }
+        elif arguments.journal:
+            from processing_journal.processing_journal import ProcessingJournal
+
+            # The journal refuses to resume from other input files or
+            # filters, whose positions would point at other transactions.
+            journal = ProcessingJournal(arguments.journal, arguments.snapshot_interval)
+            processed_data = journal.process(
+                data_processor, transactions,
+                input_fingerprint=ProcessingJournal.input_fingerprint(
+                    arguments.input_files,
+                    {"start_date": arguments.start_date, "end_date": arguments.end_date,
+                     "accounts": arguments.accounts, "types": arguments.types,
+                     "currencies": arguments.currencies}))
+        else:
+            processed_data = data_processor.process_data()
 
     account_summaries = processed_data["account_summaries"]
     suspicious_transactions = processed_data["suspicious_transactions"]
     transaction_statistics = processed_data["transaction_statistics"]
-    output_handler = OutputHandler(account_summaries, 
-                                   suspicious_transactions, 
+    output_handler = OutputHandler(account_summaries,
+                                   suspicious_transactions,
                                    transaction_statistics)
-    
-    # Joins the current directory, the relative path to the output 
-    # folder and the filename to create a complete path to each of the 
-    # output files.
-    file_prefix = "output_data"
-    filenames = [
-        "account_summaries", 
-        "suspicious_transactions", 
-        "transaction_statistics"
-    ]
-
-    file_path = {}
-
-    for filename in filenames:
-        file_path[filename] = path.join(current_directory,
-                                        f"output/{file_prefix}_{filename}.csv")
-
-    output_handler.write_account_summaries_to_csv(file_path["account_summaries"])
-    output_handler.write_suspicious_transactions_to_csv(file_path["suspicious_transactions"])
-    output_handler.write_transaction_statistics_to_csv(file_path["transaction_statistics"])
+
+    file_writers = {
+        output_path("transaction_statistics.csv"):
+            output_handler.write_transaction_statistics_to_csv,
+        output_path("transfer_graph.csv"):
+            lambda file_path: output_handler.write_transfer_graph_to_csv(
+                file_path, data_processor.transfer_graph.analyze()),
+        output_path("transaction_patterns.csv"):
+            lambda file_path: output_handler.write_transaction_patterns_to_csv(
+                file_path, processed_data["transaction_patterns"]),
+        output_path("balance_history.jsonl"):
+            lambda file_path: output_handler.write_balance_history(
+                file_path, data_processor.get_balance_history())
+    }
+
+    if arguments.sorted_by_account:
+        # Already written while processing, so only moved into place.
+        file_writers[output_path("account_summaries.csv")] = \
+            lambda file_path: os.replace(summaries_stream_path, file_path)
+    elif arguments.sort_accounts:
+        file_writers[output_path("account_summaries.csv")] = \
+            lambda file_path: output_handler.write_sorted_account_summaries_to_csv(
+                file_path, arguments.sort_accounts,
+                memory_budget_rows=arguments.memory_budget_rows)
+    else:
+        file_writers[output_path("account_summaries.csv")] = \
+            output_handler.write_account_summaries_to_csv
+
+    if arguments.sort_suspicious:
+        file_writers[output_path("suspicious_transactions.csv")] = \
+            lambda file_path: output_handler.write_sorted_suspicious_transactions_to_csv(
+                file_path, memory_budget_rows=arguments.memory_budget_rows)
+    else:
+        file_writers[output_path("suspicious_transactions.csv")] = \
+            output_handler.write_suspicious_transactions_to_csv
+
+    # Writes every output at once and publishes them together with a
+    # completion marker, so a crash never leaves a truncated output.
+    output_handler.write_files_atomically(file_writers, output_path("SUCCESS"))
+
+    if arguments.journal:
+        # The job is done, so the next run starts from the beginning.
+        journal.clear()
+
+    if arguments.partitions:
+        output_handler.write_partitioned_outputs(output_path("partitions"),
+                                                 arguments.partitions)
+
+    if arguments.sqlite:
+        output_handler.write_results_to_sqlite(arguments.sqlite)
+
+    if deduplicator is not None:
+        # Saved only once every output is published, so a crash before
+        # this processes the transactions again instead of losing them.
+        deduplicator.save(arguments.dedup_state, data_processor)
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -5,11 +5,149 @@ __author__ = ""
 __version__ = ""
 
 import csv
+import json
+import os
+import time
+import zlib
+from bisect import bisect_right
+from itertools import islice
+from account_number.account_number import account_number_key
+
+def write_csv_partition(file_path: str, header: list, rows: list) -> dict:
+    """
+    Writes one partition file and checksums it while writing. This is a
+    module-level function so worker processes can import it.
+
+    Args:
+        file_path(str): the partition file to write.
+        header(list): the column names.
+        rows(list): the rows of the partition.
+
+    Returns:
+        the file name, row count and SHA-256 of the partition
+    """
+    import hashlib
+
+    with open(file_path, "w", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    checksum = hashlib.sha256()
+    with open(file_path, "rb") as written_file:
+        for block in iter(lambda: written_file.read(1 << 20), b""):
+            checksum.update(block)
+
+    return {
+        "file": os.path.basename(file_path),
+        "rows": len(rows),
+        "sha256": checksum.hexdigest()
+    }
+
+def external_sort(rows, key, reverse: bool = False,
+                  memory_budget_rows: int = 1_000_000,
+                  temporary_directory: str = None):
+    """
+    Sorts rows that may not fit in memory. Rows are read in runs of at
+    most memory_budget_rows; when everything fits in one run it is sorted
+    in memory, otherwise every run is sorted and spilled to a temporary
+    file and the runs are combined with a k-way heapq.merge.
+
+    Args:
+        rows: an iterable of rows.
+        key: the function giving the sort key of a row.
+        reverse(bool): sort in descending order.
+        memory_budget_rows(int): the most rows held in memory at once.
+        temporary_directory(str): where to spill runs, None for the default.
+
+    Returns:
+        a generator of the sorted rows
+    """
+    rows = iter(rows)
+    run = sorted(islice(rows, memory_budget_rows), key=key, reverse=reverse)
+    if len(run) < memory_budget_rows:
+        yield from run
+        return
+
+    # Imported here so runs that fit in memory do not pay for them
+    import heapq
+    import pickle
+    import tempfile
+
+    run_files = []
+    try:
+        while run:
+            run_file = tempfile.TemporaryFile(dir=temporary_directory)
+            for start in range(0, len(run), 1000):
+                pickle.dump(run[start:start + 1000], run_file, pickle.HIGHEST_PROTOCOL)
+            run_file.seek(0)
+            run_files.append(run_file)
+            run = sorted(islice(rows, memory_budget_rows), key=key, reverse=reverse)
+
+        def read_run(run_file):
+            while True:
+                try:
+                    yield from pickle.load(run_file)
+                except EOFError:
+                    return
+
+        yield from heapq.merge(*(read_run(run_file) for run_file in run_files),
+                               key=key, reverse=reverse)
+    finally:
+        for run_file in run_files:
+            run_file.close()
 
 class OutputHandler:
     """REQUIRED: CLASS DOCSTRING
     """
 
+    SQLITE_PRAGMAS = [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -65536",
+        "PRAGMA temp_store = MEMORY"
+    ]
+    """
+    Pragmas for the SQLite output: write-ahead logging so readers are not
+    blocked, fsync only at checkpoints, and a 64 MB page cache.
+    """
+
+    SQLITE_SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS account_summaries (
+            account_number TEXT PRIMARY KEY,
+            balance REAL,
+            total_deposits REAL,
+            total_withdrawals REAL)""",
+        """CREATE TABLE IF NOT EXISTS suspicious_transactions (
+            transaction_id TEXT PRIMARY KEY,
+            account_number TEXT,
+            date TEXT,
+            transaction_type TEXT,
+            amount REAL,
+            currency TEXT,
+            description TEXT)""",
+        """CREATE TABLE IF NOT EXISTS transaction_statistics (
+            transaction_type TEXT PRIMARY KEY,
+            total_amount REAL,
+            transaction_count INTEGER)"""
+    ]
+    """
+    Tables of the SQLite output.
+    """
+
+    SQLITE_INDEXES = [
+        """CREATE INDEX IF NOT EXISTS suspicious_transactions_account_number
+            ON suspicious_transactions (account_number)""",
+        """CREATE INDEX IF NOT EXISTS suspicious_transactions_date
+            ON suspicious_transactions (date)""",
+        """CREATE INDEX IF NOT EXISTS suspicious_transactions_currency
+            ON suspicious_transactions (currency)"""
+    ]
+    """
+    Secondary indexes of the SQLite output, created after the first bulk
+    load so the rows are not inserted into them one by one.
+    """
+
     def __init__(self, account_summaries: dict, 
                        suspicious_transactions: list, 
                        transaction_statistics: dict):
@@ -57,6 +195,122 @@ class OutputHandler:
                     summary["total_withdrawals"]
                 ])
 
+    def write_account_summaries_stream(self, file_path: str, account_summaries) -> int:
+        """
+        Writes account summaries like write_account_summaries_to_csv, one row
+        as each summary arrives, so the summaries do not have to be kept in
+        memory. The file is written in place; write it to a temporary path
+        and publish it with write_files_atomically when readers must never
+        see it partly written.
+
+        Args:
+            file_path(str): the file to write.
+            account_summaries: an iterable of account summaries, such as
+            DataProcessor.iter_sorted_account_summaries().
+
+        Returns:
+            the number of account summaries written
+        """
+        count = 0
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Account number",
+                "Balance",
+                "Total Deposits",
+                "Total Withdrawals"
+            ])
+
+            for summary in account_summaries:
+                writer.writerow([
+                    summary["account_number"],
+                    summary["balance"],
+                    summary["total_deposits"],
+                    summary["total_withdrawals"]
+                ])
+                count += 1
+
+        return count
+
+    def write_sorted_account_summaries_to_csv(self, file_path: str,
+                                              sort_key: str = "account_number",
+                                              reverse: bool = False,
+                                              memory_budget_rows: int = 1_000_000) -> None:
+        """
+        Writes the account summaries like write_account_summaries_to_csv,
+        sorted by one of their fields with external_sort.
+
+        Args:
+            file_path(str): the file to write.
+            sort_key(str): "account_number", "balance", "total_deposits"
+            or "total_withdrawals".
+            reverse(bool): sort in descending order.
+            memory_budget_rows(int): the most rows sorted in memory at once.
+
+        Returns:
+            None
+        """
+        if sort_key == "account_number":
+            key = lambda row: account_number_key(row[0])
+        else:
+            column = ["balance", "total_deposits", "total_withdrawals"].index(sort_key) + 1
+            key = lambda row: (row[column], account_number_key(row[0]))
+
+        rows = ([account_number,
+                 summary["balance"],
+                 summary["total_deposits"],
+                 summary["total_withdrawals"]]
+                for account_number, summary in self.__account_summaries.items())
+
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Account number",
+                "Balance",
+                "Total Deposits",
+                "Total Withdrawals"
+            ])
+            writer.writerows(external_sort(rows, key, reverse, memory_budget_rows))
+
+    def write_sorted_suspicious_transactions_to_csv(self, file_path: str,
+                                                    reverse: bool = False,
+                                                    memory_budget_rows: int = 1_000_000) -> None:
+        """
+        Writes the suspicious transactions like
+        write_suspicious_transactions_to_csv, sorted by Date and then
+        Amount with external_sort.
+
+        Args:
+            file_path(str): the file to write.
+            reverse(bool): sort in descending order.
+            memory_budget_rows(int): the most rows sorted in memory at once.
+
+        Returns:
+            None
+        """
+        rows = ([transaction["Transaction ID"],
+                 transaction["Account number"],
+                 transaction["Date"],
+                 transaction["Transaction type"],
+                 transaction["Amount"],
+                 transaction["Currency"],
+                 transaction["Description"]]
+                for transaction in self.__suspicious_transactions)
+
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Transaction ID",
+                "Account number",
+                "Date",
+                "Transaction type",
+                "Amount",
+                "Currency",
+                "Description"
+            ])
+            writer.writerows(external_sort(rows, lambda row: (row[2], float(row[4])),
+                                           reverse, memory_budget_rows))
+
     def write_suspicious_transactions_to_csv(self, file_path: str) -> None:
         """REQUIRED: METHOD DOCSTRING
         """
@@ -99,4 +353,456 @@ class OutputHandler:
                     transaction_type,
                     statistic["total_amount"],
                     statistic["transaction_count"]
-                ])
\ No newline at end of file
+                ])
+
+    def write_delta_to_log(self, file_path: str, delta: dict) -> None:
+        """
+        Appends one line of JSON to a delta log with only what changed in
+        the last batch, so a long-running process does not rewrite every
+        output file each time new transactions arrive.
+
+        Args:
+            file_path(str): the delta log to append to.
+            delta(dict): the result of DataProcessor.process_transactions.
+
+        Returns:
+            None
+        """
+        with open(file_path, "a") as output_file:
+            output_file.write(json.dumps({
+                "account_summaries": list(delta["account_summaries"].values()),
+                "suspicious_transactions": delta["suspicious_transactions"],
+                "transaction_statistics": delta["transaction_statistics"]
+            }) + "\n")
+
+    def write_transfer_graph_to_csv(self, file_path: str, analysis: dict) -> None:
+        """
+        Writes the findings of TransferGraph.analyze, one row per strongly
+        connected component, hub account and short cycle.
+
+        Args:
+            file_path(str): the file to write.
+            analysis(dict): the result of TransferGraph.analyze.
+
+        Returns:
+            None
+        """
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Finding",
+                "Accounts",
+                "In degree",
+                "Out degree",
+                "Start date",
+                "End date"
+            ])
+
+            for component in analysis["components"]:
+                writer.writerow([
+                    "component",
+                    " ".join(str(account) for account in component),
+                    "", "", "", ""
+                ])
+
+            for hub in analysis["hubs"]:
+                writer.writerow([
+                    "hub",
+                    hub["account_number"],
+                    hub["in_degree"],
+                    hub["out_degree"],
+                    "", ""
+                ])
+
+            for cycle in analysis["cycles"]:
+                writer.writerow([
+                    "cycle",
+                    " -> ".join(str(account) for account in cycle["accounts"]),
+                    "", "",
+                    cycle["start_date"],
+                    cycle["end_date"]
+                ])
+
+    def write_transaction_patterns_to_csv(self, file_path: str, patterns: list) -> None:
+        """
+        Writes the near-duplicate and split transactions found by
+        DataProcessor, with the IDs of the transactions in each split group.
+
+        Args:
+            file_path(str): the file to write.
+            patterns(list): DataProcessor.transaction_patterns.
+
+        Returns:
+            None
+        """
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Pattern",
+                "Matches",
+                "Transaction ID",
+                "Account number",
+                "Date",
+                "Amount",
+                "Currency",
+                "Description",
+                "Related transactions"
+            ])
+
+            for pattern in patterns:
+                writer.writerow([
+                    pattern["Pattern"],
+                    pattern["Matches"],
+                    pattern["Transaction ID"],
+                    pattern["Account number"],
+                    pattern["Date"],
+                    pattern["Amount"],
+                    pattern["Currency"],
+                    pattern["Description"],
+                    " ".join(str(transaction_id)
+                             for transaction_id in pattern["Related transactions"])
+                ])
+
+    def write_balance_history(self, file_path: str, balance_history) -> None:
+        """
+        Writes a BalanceHistory as one line of JSON per account holding
+        its dates, Transaction IDs and balances as columns, which
+        BalanceHistory.from_file reads back for point-in-time lookups.
+
+        Args:
+            file_path(str): the file to write.
+            balance_history(BalanceHistory): the history to write.
+
+        Returns:
+            None
+        """
+        with open(file_path, "w") as output_file:
+            for record in balance_history.to_records():
+                output_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def write_results_to_sqlite(self, database_path: str) -> None:
+        """
+        Loads all account summaries, suspicious transactions and
+        transaction statistics into a SQLite database, replacing rows
+        that are already there.
+
+        Args:
+            database_path(str): the SQLite database file.
+
+        Returns:
+            None
+        """
+        self.__write_sqlite(database_path,
+                            self.__account_summaries.values(),
+                            self.__suspicious_transactions,
+                            self.__transaction_statistics)
+
+    def write_delta_to_sqlite(self, database_path: str, delta: dict) -> None:
+        """
+        Upserts only what changed in the last batch into a SQLite
+        database instead of loading every account again.
+
+        Args:
+            database_path(str): the SQLite database file.
+            delta(dict): the result of DataProcessor.process_transactions.
+
+        Returns:
+            None
+        """
+        self.__write_sqlite(database_path,
+                            delta["account_summaries"].values(),
+                            delta["suspicious_transactions"],
+                            delta["transaction_statistics"])
+
+    def __write_sqlite(self, database_path: str, account_summaries,
+                       suspicious_transactions: list,
+                       transaction_statistics: dict) -> None:
+        """
+        Upserts the rows with executemany inside one transaction.
+        """
+        import sqlite3
+
+        connection = sqlite3.connect(database_path)
+        try:
+            for pragma in self.SQLITE_PRAGMAS:
+                connection.execute(pragma)
+
+            with connection:
+                for statement in self.SQLITE_SCHEMA:
+                    connection.execute(statement)
+
+                connection.executemany(
+                    """INSERT INTO account_summaries VALUES (?, ?, ?, ?)
+                    ON CONFLICT (account_number) DO UPDATE SET
+                        balance = excluded.balance,
+                        total_deposits = excluded.total_deposits,
+                        total_withdrawals = excluded.total_withdrawals""",
+                    ((str(summary["account_number"]),
+                      summary["balance"],
+                      summary["total_deposits"],
+                      summary["total_withdrawals"])
+                     for summary in account_summaries))
+
+                connection.executemany(
+                    """INSERT INTO suspicious_transactions
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (transaction_id) DO UPDATE SET
+                        account_number = excluded.account_number,
+                        date = excluded.date,
+                        transaction_type = excluded.transaction_type,
+                        amount = excluded.amount,
+                        currency = excluded.currency,
+                        description = excluded.description""",
+                    ((str(transaction["Transaction ID"]),
+                      str(transaction["Account number"]),
+                      transaction["Date"],
+                      transaction["Transaction type"],
+                      transaction["Amount"],
+                      transaction["Currency"],
+                      transaction["Description"])
+                     for transaction in suspicious_transactions))
+
+                connection.executemany(
+                    """INSERT INTO transaction_statistics VALUES (?, ?, ?)
+                    ON CONFLICT (transaction_type) DO UPDATE SET
+                        total_amount = excluded.total_amount,
+                        transaction_count = excluded.transaction_count""",
+                    ((transaction_type,
+                      statistic["total_amount"],
+                      statistic["transaction_count"])
+                     for transaction_type, statistic in transaction_statistics.items()))
+
+                for statement in self.SQLITE_INDEXES:
+                    connection.execute(statement)
+        finally:
+            connection.close()
+
+    def write_estimates_to_csv(self, file_path: str, estimates: dict) -> None:
+        """
+        Writes the estimated totals of a preview run. Every row repeats
+        the sample size and the estimated row count, so the file cannot be
+        mistaken for exact results.
+
+        Args:
+            file_path(str): the file to write.
+            estimates(dict): the result of DataProcessor.estimate_totals.
+
+        Returns:
+            None
+        """
+        with open(file_path, "w", newline="") as output_file:
+            writer = csv.writer(output_file)
+            writer.writerow([
+                "Group",
+                "Key",
+                "Measure",
+                "Estimate",
+                "Low",
+                "High",
+                "Sampled rows",
+                "Estimated rows"
+            ])
+
+            rows = [("suspicious", "", "rate", estimates["suspicious_rate"])]
+            for group in ("transaction_types", "currencies"):
+                for key, measures in estimates[group].items():
+                    for measure, interval in measures.items():
+                        rows.append((group, key, measure, interval))
+
+            for group, key, measure, interval in rows:
+                writer.writerow([
+                    group,
+                    key,
+                    measure,
+                    interval["estimate"],
+                    interval["low"],
+                    interval["high"],
+                    estimates["sampled_rows"],
+                    estimates["estimated_rows"]
+                ])
+
+    def write_partitioned_outputs(self, directory: str,
+                                  partition_count: int = 8,
+                                  partition_by: str = "hash",
+                                  max_workers: int = None,
+                                  use_processes: bool = False) -> dict:
+        """
+        Splits account summaries and suspicious transactions into
+        partition_count files by account number, writes the files
+        concurrently and writes a manifest.json listing every partition
+        with its row count and SHA-256 checksum.
+
+        Args:
+            directory(str): the directory for the partitions and manifest.
+            partition_count(int): the number of partitions per output.
+            partition_by(str): "hash" for the CRC-32 of the account number,
+            which is the same in every run, or "range" for contiguous
+            ranges of account numbers, sorted like account_number_key.
+            max_workers(int): the number of workers, None for the default.
+            use_processes(bool): write in worker processes instead of threads.
+
+        Returns:
+            the manifest
+
+        Raises:
+            ValueError: partition_by is not "hash" or "range"
+        """
+        if partition_by == "hash":
+            def partition_of(account_number) -> int:
+                return zlib.crc32(str(account_number).encode()) % partition_count
+        elif partition_by == "range":
+            # Keys rather than raw account numbers, so csv text and json
+            # numbers give the same numeric ranges.
+            account_keys = sorted(account_number_key(account_number)
+                                  for account_number in self.__account_summaries)
+            boundaries = [account_keys[len(account_keys) * index // partition_count]
+                          for index in range(1, partition_count)] if account_keys else []
+
+            def partition_of(account_number) -> int:
+                return bisect_right(boundaries, account_number_key(account_number))
+        else:
+            raise ValueError(f"Unknown partition_by: {partition_by}")
+
+        account_rows = [[] for _ in range(partition_count)]
+        for account_number, summary in self.__account_summaries.items():
+            account_rows[partition_of(account_number)].append([
+                account_number,
+                summary["balance"],
+                summary["total_deposits"],
+                summary["total_withdrawals"]
+            ])
+
+        suspicious_rows = [[] for _ in range(partition_count)]
+        for transaction in self.__suspicious_transactions:
+            suspicious_rows[partition_of(transaction["Account number"])].append([
+                transaction["Transaction ID"],
+                transaction["Account number"],
+                transaction["Date"],
+                transaction["Transaction type"],
+                transaction["Amount"],
+                transaction["Currency"],
+                transaction["Description"]
+            ])
+
+        outputs = {
+            "account_summaries": (["Account number", "Balance",
+                                   "Total Deposits", "Total Withdrawals"],
+                                  account_rows),
+            "suspicious_transactions": (["Transaction ID", "Account number", "Date",
+                                         "Transaction type", "Amount", "Currency",
+                                         "Description"],
+                                        suspicious_rows)
+        }
+
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        os.makedirs(directory, exist_ok=True)
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=max_workers) as executor:
+            futures = {
+                name: [executor.submit(
+                    write_csv_partition,
+                    os.path.join(directory,
+                                 f"{name}-{index:05d}-of-{partition_count:05d}.csv"),
+                    header, rows)
+                    for index, rows in enumerate(partitions)]
+                for name, (header, partitions) in outputs.items()
+            }
+            manifest = {
+                "partition_count": partition_count,
+                "partition_by": partition_by,
+                "outputs": {name: [future.result() for future in output_futures]
+                            for name, output_futures in futures.items()}
+            }
+
+        with open(os.path.join(directory, "manifest.json"), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        return manifest
+
+    def write_files_atomically(self, file_writers: dict,
+                               marker_path: str = None,
+                               max_workers: int = None) -> None:
+        """
+        Writes a set of output files concurrently so readers never see a
+        partial file. The marker is removed first, every file is written
+        to a temporary file in its target directory by its own worker and
+        fsynced, and only when all of them succeeded are they renamed over
+        the old files with os.replace. The marker, listing the files, is
+        written last, so its presence means the whole set is complete. If
+        any writer fails the temporary files are removed and the old
+        outputs are left as they were.
+
+        Args:
+            file_writers(dict): a function per final file path that writes
+            the file to the path it is given, such as
+            write_account_summaries_to_csv.
+            marker_path(str): the completion marker, None for no marker.
+            max_workers(int): the number of worker threads, None for one
+            per file.
+
+        Returns:
+            None
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        import tempfile
+
+        if marker_path and os.path.exists(marker_path):
+            os.remove(marker_path)
+
+        # mkstemp creates files readable only by the owner, so give them
+        # the permissions a plain open would have
+        umask = os.umask(0)
+        os.umask(umask)
+
+        def write_temporary(final_path: str, writer) -> str:
+            directory, filename = os.path.split(os.path.abspath(final_path))
+            handle, temporary_path = tempfile.mkstemp(prefix=f".{filename}.",
+                                                      suffix=".tmp", dir=directory)
+            os.close(handle)
+            try:
+                os.chmod(temporary_path, 0o666 & ~umask)
+                writer(temporary_path)
+                with open(temporary_path, "rb+") as written_file:
+                    os.fsync(written_file.fileno())
+            except BaseException:
+                os.remove(temporary_path)
+                raise
+            return temporary_path
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(file_writers) or 1) as executor:
+            futures = {final_path: executor.submit(write_temporary, final_path, writer)
+                       for final_path, writer in file_writers.items()}
+
+        errors = [future.exception() for future in futures.values()
+                  if future.exception() is not None]
+        if errors:
+            for future in futures.values():
+                if future.exception() is None:
+                    os.remove(future.result())
+            raise errors[0]
+
+        directories = set()
+        for final_path, future in futures.items():
+            os.replace(future.result(), final_path)
+            directories.add(os.path.dirname(os.path.abspath(final_path)))
+
+        if marker_path:
+            temporary_marker = f"{marker_path}.tmp"
+            with open(temporary_marker, "w") as marker_file:
+                json.dump({"completed": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                           "files": {os.path.basename(final_path): os.path.getsize(final_path)
+                                     for final_path in file_writers}},
+                          marker_file, indent=2)
+                marker_file.flush()
+                os.fsync(marker_file.fileno())
+            os.replace(temporary_marker, marker_path)
+            directories.add(os.path.dirname(os.path.abspath(marker_path)))
+
+        # The renames are only durable once the directories are synced
+        if hasattr(os, "O_DIRECTORY"):
+            for directory in directories:
+                handle = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(handle)
+                finally:
+                    os.close(handle)
@@ -0,0 +1,183 @@
+"""
+Description: A class created to find near-duplicate transactions and
+large amounts split into several smaller ones.
+Usage: To incorporate this class into a class or program,
+import this using:
+from pattern_detector.pattern_detector import PatternDetector
+"""
+
+import re
+from collections import OrderedDict, deque
+from datetime import date
+
+class PatternDetector:
+    """
+    A class that keeps a short window of recent transactions per account.
+
+    Each transaction is keyed by (amount bucket, currency, normalized
+    description) and counted in its account's hash buckets, and the
+    sub-threshold amounts per currency are kept as running sums. Adding
+    and expiring a transaction only touches those counters, so the work
+    per row is amortized O(1) and memory is bounded by window_size times
+    max_accounts.
+
+    Attributes:
+        __accounts (OrderedDict): the window of every recent account, least
+                                    recently seen first
+        __findings (list): the near-duplicate and split transactions found
+
+    Methods (instance methods):
+        check_transaction(): adds a transaction and records any finding.
+    """
+
+    NON_LETTERS = re.compile(r"[^a-z]+")
+    """
+    Everything that is dropped when normalizing a description, so
+    "Payment #123" and "PAYMENT 124" share a bucket.
+    """
+
+    def __init__(self, threshold: float = 10000,
+                 amount_bucket: float = 1.0,
+                 window_days: int = 7,
+                 window_size: int = 32,
+                 max_accounts: int = 100_000,
+                 min_duplicates: int = 3,
+                 split_margin: float = 0.1):
+        """
+        Initialize a new PatternDetector.
+
+        Args:
+            threshold(float): the amount that large transactions are split
+            to stay under.
+            amount_bucket(float): amounts within the same bucket are the same.
+            window_days(int): how many days a transaction stays in the window.
+            window_size(int): the most transactions kept per account.
+            max_accounts(int): the most accounts kept, least recent dropped first.
+            min_duplicates(int): how many matching transactions are flagged.
+            split_margin(float): how far over the threshold, as a fraction,
+            a split group may sum to.
+
+        Returns:
+            None
+        """
+        self.__threshold = threshold
+        self.__amount_bucket = amount_bucket
+        self.__window_days = window_days
+        self.__window_size = window_size
+        self.__max_accounts = max_accounts
+        self.__min_duplicates = min_duplicates
+        self.__split_limit = threshold * (1 + split_margin)
+        self.__accounts = OrderedDict()
+        self.__findings = []
+
+    @property
+    def findings(self) -> list:
+        """
+        Accessor for a list of the near-duplicate and split transactions found.
+        """
+        return self.__findings
+
+    def check_transaction(self, transaction: dict) -> None:
+        """
+        Adds a transaction to its account's window and records a finding
+        when it completes a near-duplicate or split pattern.
+
+        Args:
+            transaction(dict): the transaction processed.
+
+        Returns:
+            None
+        """
+        self.check_values(transaction.get("Transaction ID"),
+                          transaction["Account number"],
+                          transaction.get("Date"),
+                          transaction.get("Amount"),
+                          transaction.get("Currency"),
+                          transaction.get("Description", ""))
+
+    def check_values(self, transaction_id, account_number, transaction_date: str,
+                     amount, currency: str, description: str) -> None:
+        """
+        Does the work of check_transaction for callers that hold the
+        fields as separate values, such as columnar input, so no dict has
+        to be built per row.
+
+        Returns:
+            None
+        """
+        try:
+            day = date.fromisoformat(transaction_date).toordinal()
+            amount = float(amount)
+        except (TypeError, ValueError):
+            return
+
+        normalized = self.NON_LETTERS.sub(" ", str(description).lower()).strip()
+        key = (int(amount // self.__amount_bucket), currency, normalized)
+
+        window = self.__window(account_number)
+        self.__expire(window, day)
+
+        window["rows"].append((day, key, amount, currency, transaction_id))
+        matches = window["buckets"].get(key, 0) + 1
+        window["buckets"][key] = matches
+        if matches >= self.__min_duplicates:
+            self.__findings.append(self.__finding(
+                transaction_id, account_number, transaction_date, amount,
+                currency, description, "near_duplicate", matches))
+
+        if amount < self.__threshold:
+            previous_sum = window["sums"].get(currency, 0)
+            window["sums"][currency] = previous_sum + amount
+            if previous_sum <= self.__threshold < previous_sum + amount \
+                <= self.__split_limit:
+                group = [row[4] for row in window["rows"]
+                         if row[3] == currency and row[2] < self.__threshold]
+                if len(group) > 1:
+                    self.__findings.append(self.__finding(
+                        transaction_id, account_number, transaction_date, amount,
+                        currency, description, "split", len(group), group))
+
+    def __window(self, account_number) -> dict:
+        """
+        Returns the window of an account, dropping the least recently
+        seen account when there are more than max_accounts.
+        """
+        window = self.__accounts.get(account_number)
+        if window is None:
+            window = self.__accounts[account_number] = {
+                "rows": deque(), "buckets": {}, "sums": {}}
+            if len(self.__accounts) > self.__max_accounts:
+                self.__accounts.popitem(last=False)
+        else:
+            self.__accounts.move_to_end(account_number)
+        return window
+
+    def __expire(self, window: dict, day: int) -> None:
+        """
+        Removes transactions older than window_days, and the oldest one
+        when the window is full, from the counters.
+        """
+        rows = window["rows"]
+        while rows and (day - rows[0][0] > self.__window_days
+                        or len(rows) >= self.__window_size):
+            _, key, amount, currency, _ = rows.popleft()
+            window["buckets"][key] -= 1
+            if not window["buckets"][key]:
+                del window["buckets"][key]
+            if amount < self.__threshold:
+                window["sums"][currency] -= amount
+
+    def __finding(self, transaction_id, account_number, transaction_date: str,
+                  amount, currency: str, description: str, pattern: str,
+                  matches: int, group: list = None) -> dict:
+        return {
+            "Transaction ID": transaction_id,
+            "Account number": account_number,
+            "Date": transaction_date,
+            "Amount": amount,
+            "Currency": currency,
+            "Description": description,
+            "Pattern": pattern,
+            "Matches": matches,
+            "Related transactions": group or []
+        }
@@ -0,0 +1,399 @@
+"""
+Description: A class created to keep a write-ahead journal and snapshots
+of a DataProcessor's results, so a job that stops part of the way
+through its input can carry on from where it stopped.
+Usage: To incorporate this class into a class or program,
+import this using:
+from processing_journal.processing_journal import ProcessingJournal
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+
+class ProcessingJournal:
+    """
+    A class that journals the batches a DataProcessor applies.
+
+    After each batch, one record is appended to journal.bin with the
+    batch's Transaction IDs, the input position after it and the new
+    values of only the accounts and transaction types it changed, as
+    returned by DataProcessor.process_transactions. Every
+    snapshot_interval records the full results are written to
+    snapshot.json and the journal is emptied. Recovery loads the
+    snapshot and applies the records after it, so it reads at most
+    snapshot_interval batches whatever the size of the input.
+
+    Every record starts with its length, CRC-32 and sequence number, so
+    a record cut short by a crash is found and dropped. Records store new
+    values rather than differences, so applying one twice is harmless.
+    Records and snapshots are plain JSON, so reading a journal directory
+    never runs code from it.
+
+    The journal header and the snapshot keep the fingerprint of the
+    input files, see input_fingerprint. Positions only make sense for
+    the same input, so recover refuses a journal of other input files.
+
+    Attributes:
+        __directory (str): the directory of the journal and snapshot
+        __snapshot_interval (int): the records written between snapshots
+        __sync (bool): flush every record to disk before going on
+        __sequence (int): the sequence number of the last record
+        __records_since_snapshot (int): the records after the last snapshot
+        __input_fingerprint (dict): the fingerprint of the journaled input
+        __base (dict): the suspicious transactions, patterns and count the
+        processor held before the job, which snapshots leave out
+
+    Methods (instance methods):
+        recover (int): restores the results and gets the input position.
+        append (int): appends the record of one batch.
+        snapshot(): writes the full results and empties the journal.
+        process (dict): processes transactions in journaled batches.
+        clear(): removes the journal and snapshot once a job is done.
+
+    Methods (static methods):
+        input_fingerprint (dict): gets the fingerprint of input files.
+    """
+
+    FILE_MAGIC = b"TXJRNL02"
+    """
+    The first bytes of every journal.
+    """
+
+    FINGERPRINT_HEADER = struct.Struct("<I")
+    """
+    The length of the JSON input fingerprint that follows FILE_MAGIC.
+    """
+
+    RECORD_HEADER = struct.Struct("<IIQ")
+    """
+    The payload length, CRC-32 of the payload and sequence number that
+    start every record.
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 100,
+                 sync: bool = True):
+        """
+        Initialize a new ProcessingJournal.
+
+        Args:
+            directory(str): the directory of the journal and snapshot,
+            created if it does not exist.
+            snapshot_interval(int): the records written between snapshots.
+            sync(bool): flush every record to disk before going on.
+
+        Returns:
+            None
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__snapshot_interval = snapshot_interval
+        self.__sync = sync
+        self.__sequence = 0
+        self.__records_since_snapshot = 0
+        self.__input_fingerprint = None
+        self.__base = {"suspicious_transactions": 0, "transaction_patterns": 0,
+                       "transaction_count": 0}
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def journal_path(self) -> str:
+        """
+        Accessor for the journal file.
+        """
+        return os.path.join(self.__directory, "journal.bin")
+
+    @property
+    def snapshot_path(self) -> str:
+        """
+        Accessor for the snapshot file.
+        """
+        return os.path.join(self.__directory, "snapshot.json")
+
+    @staticmethod
+    def input_fingerprint(input_file_paths: list, options: dict = None) -> dict:
+        """
+        Gets the absolute path, size and modification time of every input
+        file, which change when a file is replaced or appended to, with
+        the options that change which of their transactions are read.
+
+        Args:
+            input_file_paths(list): the input files of the job, in order.
+            options(dict): options such as filters, None if there are none.
+
+        Returns:
+            files, a list of [path, size, modification time in
+            nanoseconds], and options
+        """
+        files = []
+        for file_path in input_file_paths:
+            status = os.stat(file_path)
+            files.append([os.path.abspath(file_path), status.st_size, status.st_mtime_ns])
+        return {"files": files, "options": options or {}}
+
+    def recover(self, data_processor, input_fingerprint: dict = None) -> int:
+        """
+        Restores the results of an earlier run into a new DataProcessor
+        from the snapshot and the journal records after it. A record cut
+        short at the end of the journal is removed.
+
+        Args:
+            data_processor(DataProcessor): a processor that has not
+            processed anything yet.
+            input_fingerprint(dict): the fingerprint of the input files,
+            see input_fingerprint, None if the input is not files.
+
+        Returns:
+            the number of input transactions already processed
+
+        Raises:
+            ValueError: the journal file is not a processing journal, or
+            it was written for other input files
+        """
+        # JSON gives lists back for tuples, so the JSON form is compared
+        self.__input_fingerprint = json.loads(json.dumps(input_fingerprint))
+        position = 0
+        snapshot_sequence = 0
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path, "r") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            self.__check_fingerprint(snapshot["input_fingerprint"], self.snapshot_path)
+            data_processor.restore(self.__summaries(snapshot["account_summaries"]),
+                                   snapshot["transaction_statistics"],
+                                   snapshot["suspicious_transactions"],
+                                   snapshot["transaction_patterns"],
+                                   snapshot["transaction_count"])
+            position = snapshot["position"]
+            snapshot_sequence = self.__sequence = snapshot["sequence"]
+
+        if not os.path.isfile(self.journal_path):
+            self.__start_journal()
+            return position
+
+        with open(self.journal_path, "r+b") as journal_file:
+            if journal_file.read(len(self.FILE_MAGIC)) != self.FILE_MAGIC:
+                raise ValueError(f"{self.journal_path} is not a processing journal.")
+            fingerprint_size = self.FINGERPRINT_HEADER.unpack(
+                journal_file.read(self.FINGERPRINT_HEADER.size))[0]
+            self.__check_fingerprint(json.loads(journal_file.read(fingerprint_size)),
+                                     self.journal_path)
+
+            while True:
+                record_start = journal_file.tell()
+                header = journal_file.read(self.RECORD_HEADER.size)
+                if not header:
+                    break
+
+                payload = b""
+                if len(header) == self.RECORD_HEADER.size:
+                    length, checksum, sequence = self.RECORD_HEADER.unpack(header)
+                    payload = journal_file.read(length)
+
+                if len(header) < self.RECORD_HEADER.size or len(payload) < length \
+                    or zlib.crc32(payload) != checksum:
+                    # Log warning if the last record was cut short
+                    self.logger.warning(f"Incomplete journal record dropped at byte {record_start}")
+                    journal_file.truncate(record_start)
+                    break
+
+                if sequence <= snapshot_sequence:
+                    continue
+
+                record = json.loads(zlib.decompress(payload))
+                data_processor.restore(self.__summaries(record["account_summaries"]),
+                                       record["transaction_statistics"],
+                                       record["suspicious_transactions"],
+                                       record["transaction_patterns"],
+                                       len(record["transaction_ids"]))
+                position = record["position"]
+                self.__sequence = sequence
+                self.__records_since_snapshot += 1
+
+        self.logger.info(f"Recovered {position} transactions from {self.__directory}")
+        return position
+
+    def append(self, changes: dict, transaction_ids: list, position: int,
+               transaction_patterns: list = ()) -> int:
+        """
+        Appends the record of one batch to the journal.
+
+        Args:
+            changes(dict): the changes returned by process_transactions.
+            transaction_ids(list): the Transaction IDs of the batch.
+            position(int): the number of input transactions processed
+            after the batch.
+            transaction_patterns(list): the patterns the batch found.
+
+        Returns:
+            the sequence number of the record
+        """
+        self.__sequence += 1
+        payload = zlib.compress(json.dumps({
+            "account_summaries": list(changes["account_summaries"].values()),
+            "transaction_statistics": changes["transaction_statistics"],
+            "suspicious_transactions": changes["suspicious_transactions"],
+            "transaction_patterns": list(transaction_patterns),
+            "transaction_ids": transaction_ids,
+            "position": position
+        }).encode(), 1)
+
+        with open(self.journal_path, "ab") as journal_file:
+            journal_file.write(self.RECORD_HEADER.pack(len(payload), zlib.crc32(payload),
+                                                       self.__sequence) + payload)
+            if self.__sync:
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+        self.__records_since_snapshot += 1
+        return self.__sequence
+
+    def snapshot(self, data_processor, position: int) -> None:
+        """
+        Writes the full results to the snapshot, replacing it only once
+        the new one is complete, and then empties the journal. Records
+        left by a crash between the two are older than the snapshot and
+        skipped by recover. Suspicious transactions and patterns the
+        processor held before process started, such as results restored
+        from a deduplicator, are left out, since they are restored again
+        before the snapshot on recovery.
+
+        Args:
+            data_processor(DataProcessor): the processor to save.
+            position(int): the number of input transactions processed.
+
+        Returns:
+            None
+        """
+        temporary_path = f"{self.snapshot_path}.tmp"
+        with open(temporary_path, "w") as snapshot_file:
+            json.dump({
+                "input_fingerprint": self.__input_fingerprint,
+                "account_summaries": list(data_processor.account_summaries.values()),
+                "transaction_statistics": data_processor.transaction_statistics,
+                "suspicious_transactions": data_processor.suspicious_transactions[
+                    self.__base["suspicious_transactions"]:],
+                "transaction_patterns": data_processor.transaction_patterns[
+                    self.__base["transaction_patterns"]:],
+                "transaction_count": data_processor.version - self.__base["transaction_count"],
+                "position": position,
+                "sequence": self.__sequence
+            }, snapshot_file)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+
+        self.__start_journal()
+        self.__records_since_snapshot = 0
+        self.logger.info(f"Snapshot written at {position} transactions")
+
+    def process(self, data_processor, transactions: list,
+                batch_rows: int = 10_000, input_fingerprint: dict = None) -> dict:
+        """
+        Recovers any earlier run, then processes the rest of the
+        transactions in batches, journaling every batch and taking a
+        snapshot every snapshot_interval batches. The transactions before
+        the recovered position are not processed again, but their
+        Transaction IDs are given to the deduplicator again, and the ones
+        that were not duplicates are added to input_data and the transfer
+        graph, which are cheap to rebuild and not journaled.
+
+        Args:
+            data_processor(DataProcessor): a processor built with [] that
+            has not processed anything yet, with the deduplicator state
+            the job started from and the results restored from it.
+            transactions(list): the same transactions, in the same order,
+            in every run of the job.
+            batch_rows(int): the transactions in one journal record.
+            input_fingerprint(dict): the fingerprint of the input files
+            the transactions were read from, see input_fingerprint.
+
+        Returns:
+            the same dict as DataProcessor.process_data
+
+        Raises:
+            ValueError: the processor already holds transactions, which
+            would be counted twice, or the journal was written for other
+            input files
+        """
+        if data_processor.input_data:
+            raise ValueError("The processor must be built with [], "
+                             "its input_data is filled while processing")
+
+        self.__base = {"suspicious_transactions": len(data_processor.suspicious_transactions),
+                       "transaction_patterns": len(data_processor.transaction_patterns),
+                       "transaction_count": data_processor.version}
+        position = self.recover(data_processor, input_fingerprint)
+        for transaction in transactions[:position]:
+            if data_processor.is_duplicate(transaction):
+                continue
+            if data_processor.retain_transactions:
+                data_processor.input_data.append(transaction)
+            data_processor.update_transfer_graph(transaction)
+
+        for start in range(position, len(transactions), batch_rows):
+            batch = transactions[start:start + batch_rows]
+            pattern_count = len(data_processor.transaction_patterns)
+            changes = data_processor.process_transactions(batch)
+            self.append(changes,
+                        [transaction.get("Transaction ID") for transaction in batch],
+                        start + len(batch),
+                        data_processor.transaction_patterns[pattern_count:])
+
+            if self.__records_since_snapshot >= self.__snapshot_interval:
+                self.snapshot(data_processor, start + len(batch))
+
+        # Log info when processing is completed
+        self.logger.info("Data Processing Complete")
+
+        return {
+            "account_summaries": data_processor.account_summaries,
+            "suspicious_transactions": data_processor.suspicious_transactions,
+            "transaction_statistics": data_processor.transaction_statistics,
+            "transaction_patterns": data_processor.transaction_patterns,
+        }
+
+    def clear(self) -> None:
+        """
+        Removes the journal and the snapshot, so the next run of the job
+        starts from the beginning.
+
+        Returns:
+            None
+        """
+        for file_path in (self.journal_path, self.snapshot_path):
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+        self.__sequence = 0
+        self.__records_since_snapshot = 0
+
+    def __start_journal(self) -> None:
+        """
+        Replaces the journal with an empty one.
+        """
+        temporary_path = f"{self.journal_path}.tmp"
+        fingerprint = json.dumps(self.__input_fingerprint).encode()
+        with open(temporary_path, "wb") as journal_file:
+            journal_file.write(self.FILE_MAGIC + self.FINGERPRINT_HEADER.pack(len(fingerprint))
+                               + fingerprint)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(temporary_path, self.journal_path)
+
+    def __check_fingerprint(self, input_fingerprint: dict, file_path: str) -> None:
+        """
+        Refuses a journal or snapshot written for other input files.
+        """
+        if input_fingerprint != self.__input_fingerprint:
+            raise ValueError(f"{file_path} was written for other input files, "
+                             f"clear {self.__directory} to start the job again.")
+
+    @staticmethod
+    def __summaries(account_summaries: list) -> dict:
+        """
+        Keys saved account summaries by their account number again. JSON
+        only has text keys, so they are saved as a list to keep numeric
+        account numbers apart from text ones.
+        """
+        return {summary["account_number"]: summary for summary in account_summaries}
@@ -0,0 +1,155 @@
+"""
+Description: A class created to answer many questions about the results
+of a DataProcessor without scanning them for every question.
+Usage: To incorporate this class into a class or program,
+import this using:
+from results_query.results_query import ResultsQuery
+or call DataProcessor.query().
+"""
+
+from bisect import bisect_left, bisect_right
+
+class ResultsQuery:
+    """
+    A class that queries the results of a DataProcessor.
+
+    Every index is built the first time a query needs it and kept until
+    the processor's version changes, which happens whenever it processes
+    another transaction, so repeated questions between runs cost a
+    binary search or a dict lookup.
+
+    Attributes:
+        __data_processor (DataProcessor): the processor queried
+        __version (int): the processor version the indexes were built for
+        __indexes (dict): the indexes and cached statistics built so far
+
+    Methods (instance methods):
+        accounts_with_balance_below (list): accounts under a balance.
+        accounts_with_balance_between (list): accounts inside a balance range.
+        suspicious_for_account (list): suspicious rows of an account.
+        suspicious_for_currency (list): suspicious rows in a currency.
+        suspicious_between (list): suspicious rows inside a date range.
+        average_amounts (dict): the average amount of every transaction type.
+    """
+
+    def __init__(self, data_processor):
+        """
+        Initialize a new ResultsQuery over a DataProcessor.
+
+        Args:
+            data_processor(DataProcessor): the processor to query.
+
+        Returns:
+            None
+        """
+        self.__data_processor = data_processor
+        self.__version = None
+        self.__indexes = {}
+
+    def accounts_with_balance_below(self, balance: float) -> list:
+        """
+        Gets the summaries of accounts with a balance below the given one.
+
+        Args:
+            balance(float): the balance to compare with.
+
+        Returns:
+            the account summaries, lowest balance first
+        """
+        balances, summaries = self.__index("balances", self.__build_balances)
+        return summaries[:bisect_left(balances, balance)]
+
+    def accounts_with_balance_between(self, low: float, high: float) -> list:
+        """
+        Gets the summaries of accounts with low <= balance <= high.
+
+        Returns:
+            the account summaries, lowest balance first
+        """
+        balances, summaries = self.__index("balances", self.__build_balances)
+        return summaries[bisect_left(balances, low):bisect_right(balances, high)]
+
+    def suspicious_for_account(self, account_number) -> list:
+        """
+        Gets the suspicious transactions of an account.
+
+        Returns:
+            the suspicious transactions in the order they were found
+        """
+        postings = self.__index("accounts",
+                                lambda: self.__build_postings("Account number"))
+        return self.__rows(postings.get(account_number, []))
+
+    def suspicious_for_currency(self, currency: str) -> list:
+        """
+        Gets the suspicious transactions in a currency.
+
+        Returns:
+            the suspicious transactions in the order they were found
+        """
+        postings = self.__index("currencies",
+                                lambda: self.__build_postings("Currency"))
+        return self.__rows(postings.get(currency, []))
+
+    def suspicious_between(self, start_date: str, end_date: str) -> list:
+        """
+        Gets the suspicious transactions with start_date <= Date <= end_date.
+
+        Args:
+            start_date(str): the first date in YYYY-MM-DD format.
+            end_date(str): the last date in YYYY-MM-DD format.
+
+        Returns:
+            the suspicious transactions in date order
+        """
+        dates, positions = self.__index("dates", self.__build_dates)
+        return self.__rows(positions[bisect_left(dates, start_date):
+                                     bisect_right(dates, end_date)])
+
+    def average_amounts(self) -> dict:
+        """
+        Gets the average amount of every transaction type.
+
+        Returns:
+            a dict of transaction type to average amount
+        """
+        return self.__index("averages", lambda: {
+            transaction_type: self.__data_processor.get_average_transaction_amount(
+                transaction_type)
+            for transaction_type in self.__data_processor.transaction_statistics
+        })
+
+    def __index(self, name: str, build):
+        """
+        Returns a cached index, dropping every index first if the
+        processor has changed since they were built.
+        """
+        if self.__version != self.__data_processor.version:
+            self.__indexes = {}
+            self.__version = self.__data_processor.version
+
+        if name not in self.__indexes:
+            self.__indexes[name] = build()
+        return self.__indexes[name]
+
+    def __build_balances(self) -> tuple:
+        summaries = sorted(self.__data_processor.account_summaries.values(),
+                           key=lambda summary: summary["balance"])
+        return [summary["balance"] for summary in summaries], summaries
+
+    def __build_postings(self, field: str) -> dict:
+        postings = {}
+        for position, transaction in enumerate(
+                self.__data_processor.suspicious_transactions):
+            postings.setdefault(transaction[field], []).append(position)
+        return postings
+
+    def __build_dates(self) -> tuple:
+        transactions = self.__data_processor.suspicious_transactions
+        positions = sorted(range(len(transactions)),
+                           key=lambda position: transactions[position]["Date"])
+        return [transactions[position]["Date"] for position in positions], positions
+
+    def __rows(self, positions: list) -> list:
+        transactions = self.__data_processor.suspicious_transactions
+        return [transactions[position] for position in positions]
@@ -0,0 +1,219 @@
+"""
+Description: A class created to keep running and process transactions
+as they are appended to the input files, writing only what changed.
+Usage: To incorporate this class into a class or program,
+import this using:
+from tail_daemon.tail_daemon import TailDaemon
+To run from the terminal type:
+py -m tail_daemon.tail_daemon input/input_data.csv
+"""
+
+import argparse
+import logging
+import time
+from os import path
+from input_handler.input_handler import InputHandler
+from data_processor.data_processor import DataProcessor
+from output_handler.output_handler import OutputHandler
+from transaction_deduplicator.transaction_deduplicator import TransactionDeduplicator
+
+class TailDaemon:
+    """
+    A class that watches input files and processes appended rows.
+
+    Attributes:
+        __input_handlers (list): an InputHandler for every watched file
+        __offsets (dict): the byte offset already read from every file
+        __data_processor (DataProcessor): the resident processor
+        __output_handler (OutputHandler): writes the delta log and outputs
+
+    Methods (instance methods):
+        poll_once (dict): reads new rows from every file and processes them.
+        run(): polls until stopped or max_polls is reached.
+        save_dedup_state(): rewrites the whole dedup state.
+        write_outputs(): writes the full output files once.
+    """
+
+    def __init__(self, input_file_paths: list,
+                 delta_log_path: str,
+                 poll_interval: float = 0.5,
+                 log_file = None,
+                 dedup_state_path = None,
+                 database_path = None,
+                 dedup_save_interval: float = 60.0):
+        """
+        Initialize a new TailDaemon with the files to watch and the
+        delta log to append changes to.
+
+        Args:
+            input_file_paths(list): the csv files to watch.
+            delta_log_path(str): the file that changes are appended to.
+            poll_interval(float): seconds to wait when nothing changed.
+            log_file(str): the file that contains the logs
+            dedup_state_path(str): the file that keeps the processed
+            Transaction IDs and the results they produced between runs,
+            None to process every row
+            database_path(str): a SQLite database to upsert changes into
+            dedup_save_interval(float): seconds between rewrites of the whole
+            dedup state; in between, each poll only appends its new IDs
+            and the results they changed
+
+        Returns:
+            None
+        """
+        self.__dedup_state_path = dedup_state_path
+        self.__dedup_save_interval = dedup_save_interval
+        self.__dedup_saved_at = time.monotonic()
+        self.__deduplicator = None
+        if dedup_state_path:
+            self.__deduplicator = TransactionDeduplicator.load(dedup_state_path)
+
+        self.__input_handlers = [InputHandler(file_path)
+                                 for file_path in input_file_paths]
+        self.__offsets = {file_path: 0 for file_path in input_file_paths}
+        self.__delta_log_path = delta_log_path
+        self.__poll_interval = poll_interval
+        self.__database_path = database_path
+        self.__data_processor = DataProcessor([], log_file=log_file,
+                                              deduplicator=self.__deduplicator,
+                                              retain_transactions=False)
+        if self.__deduplicator is not None:
+            # The rows of earlier runs are skipped as duplicates, so their
+            # results come from the dedup state.
+            self.__deduplicator.restore_results(self.__data_processor)
+        self.__output_handler = OutputHandler(
+            self.__data_processor.account_summaries,
+            self.__data_processor.suspicious_transactions,
+            self.__data_processor.transaction_statistics)
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def data_processor(self) -> DataProcessor:
+        """
+        Accessor for the resident DataProcessor.
+        """
+        return self.__data_processor
+
+    @property
+    def offsets(self) -> dict:
+        """
+        Accessor for a dict of the byte offsets read from every file.
+        """
+        return self.__offsets
+
+    def poll_once(self) -> dict:
+        """
+        Reads the rows appended to every watched file since the last poll
+        and processes them. A file that became smaller than its offset was
+        truncated or rotated, so it is read again from the start.
+
+        Returns:
+            the delta from DataProcessor.process_transactions, or None if
+            no new transactions arrived
+        """
+        transactions = []
+
+        for input_handler in self.__input_handlers:
+            file_path = input_handler.file_path
+            if not path.isfile(file_path):
+                continue
+
+            offset = self.__offsets[file_path]
+            size = path.getsize(file_path)
+            if size < offset:
+                self.logger.warning(f"Input file truncated: {file_path}")
+                offset = 0
+            elif size == offset:
+                continue
+
+            new_transactions, self.__offsets[file_path] = \
+                input_handler.read_appended_data(offset)
+            transactions.extend(new_transactions)
+
+        if not transactions:
+            return None
+
+        delta = self.__data_processor.process_transactions(transactions)
+        self.__output_handler.write_delta_to_log(self.__delta_log_path, delta)
+        if self.__database_path:
+            self.__output_handler.write_delta_to_sqlite(self.__database_path, delta)
+        if self.__deduplicator is not None:
+            if time.monotonic() - self.__dedup_saved_at >= self.__dedup_save_interval:
+                self.save_dedup_state()
+            else:
+                self.__deduplicator.append_unsaved(self.__dedup_state_path, delta)
+        return delta
+
+    def save_dedup_state(self) -> None:
+        """
+        Rewrites the whole dedup state with the full results, which also
+        empties the log that the polls in between append their new IDs to.
+
+        Returns:
+            None
+        """
+        if self.__deduplicator is not None:
+            self.__deduplicator.save(self.__dedup_state_path, self.__data_processor)
+            self.__dedup_saved_at = time.monotonic()
+
+    def run(self, max_polls: int = None) -> None:
+        """
+        Polls the watched files until interrupted, sleeping for
+        poll_interval only when a poll found nothing new.
+
+        Args:
+            max_polls(int): stop after this many polls, None to run forever.
+
+        Returns:
+            None
+        """
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                if self.poll_once() is None:
+                    time.sleep(self.__poll_interval)
+        except KeyboardInterrupt:
+            self.logger.info("Tail daemon stopped")
+        finally:
+            self.save_dedup_state()
+
+    def write_outputs(self, file_paths: dict) -> None:
+        """
+        Writes the full account summaries, suspicious transactions and
+        transaction statistics, for example when the daemon stops.
+
+        Args:
+            file_paths(dict): the output file for each of
+            "account_summaries", "suspicious_transactions" and
+            "transaction_statistics".
+
+        Returns:
+            None
+        """
+        self.__output_handler.write_account_summaries_to_csv(
+            file_paths["account_summaries"])
+        self.__output_handler.write_suspicious_transactions_to_csv(
+            file_paths["suspicious_transactions"])
+        self.__output_handler.write_transaction_statistics_to_csv(
+            file_paths["transaction_statistics"])
+
+def main() -> None:
+    """Runs the tail daemon on the files given on the command line."""
+    parser = argparse.ArgumentParser(
+        description="Process transactions as they are appended to csv files.")
+    parser.add_argument("input_files", nargs="+")
+    parser.add_argument("--delta-log", default="output/output_data_delta.jsonl")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--log-file", default="output/fdp_team_8.log")
+    parser.add_argument("--dedup-state", default=None)
+    parser.add_argument("--sqlite", default=None)
+    args = parser.parse_args()
+
+    daemon = TailDaemon(args.input_files, args.delta_log,
+                        args.poll_interval, args.log_file,
+                        args.dedup_state, args.sqlite)
+    daemon.run()
+
+if __name__ == "__main__":
+    main()
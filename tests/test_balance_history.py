@@ -0,0 +1,68 @@
+"""
+Description: Unit tests for BalanceHistory Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_balance_history.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from balance_history.balance_history import BalanceHistory
+from output_handler.output_handler import OutputHandler
+
+
+class TestBalanceHistory(TestCase):
+    """Defines the unit tests for the BalanceHistory class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.transactions = [
+            {"Transaction ID": 3, "Account number": 1001, "Date": "2023-03-05",
+             "Transaction type": "withdrawal", "Amount": 200},
+            {"Transaction ID": 1, "Account number": 1001, "Date": "2023-03-01",
+             "Transaction type": "deposit", "Amount": 1000},
+            {"Transaction ID": 2, "Account number": 1002, "Date": "2023-03-02",
+             "Transaction type": "deposit", "Amount": 1500},
+            {"Transaction ID": 4, "Account number": 1001, "Date": "2023-03-06",
+             "Transaction type": "transfer", "Amount": 50}
+        ]
+
+    def test_history_is_sorted_running_balance(self):
+        # Act
+        history = BalanceHistory.build(self.transactions)
+
+        # Assert
+        self.assertEqual([("2023-03-01", 1, 1000.0), ("2023-03-05", 3, 800.0)],
+                         history.history(1001))
+        self.assertEqual([("2023-03-02", 2, 1500.0)], history.history(1002))
+
+    def test_balance_at(self):
+        # Arrange
+        history = BalanceHistory.build(self.transactions)
+
+        # Act and Assert
+        self.assertEqual(0, history.balance_at(1001, "2023-02-28"))
+        self.assertEqual(1000.0, history.balance_at(1001, "2023-03-04"))
+        self.assertEqual(800.0, history.balance_at(1001, "2023-03-05"))
+        self.assertEqual(0, history.balance_at(9999, "2023-03-05"))
+
+    def test_write_and_read_back(self):
+        # Arrange
+        history = BalanceHistory.build(self.transactions)
+        output_handler = OutputHandler({}, [], {})
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "balance_history.jsonl")
+
+            # Act
+            output_handler.write_balance_history(file_path, history)
+            restored = BalanceHistory.from_file(file_path)
+
+        # Assert
+        self.assertEqual(history.history(1001), restored.history(1001))
+        self.assertEqual(1500.0, restored.balance_at(1002, "2023-03-31"))
+
+if __name__ == "__main__":
+    unittest.main()
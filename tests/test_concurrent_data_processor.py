@@ -0,0 +1,95 @@
+"""
+Description: Unit tests for ConcurrentDataProcessor Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_concurrent_data_processor.py
+"""
+
+import math
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from concurrent_data_processor.concurrent_data_processor import ConcurrentDataProcessor
+from data_processor.data_processor import DataProcessor
+
+
+class TestConcurrentDataProcessor(TestCase):
+    """Defines the unit tests for the ConcurrentDataProcessor class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.transactions = [
+            {"Transaction ID": str(index), "Account number": str(1000 + index % 17),
+             "Date": f"2023-03-{index % 28 + 1:02d}",
+             "Transaction type": ["deposit", "withdrawal", "transfer"][index % 3],
+             "Amount": 20000.1 if index % 41 == 0 else index * 0.1,
+             "Currency": "LTC" if index % 29 == 0 else "CAD",
+             "Description": "Payment"}
+            for index in range(3000)
+        ]
+
+    def test_threads_match_single_threaded_results(self):
+        # Arrange
+        expected = DataProcessor(self.transactions).process_data()
+        processor = ConcurrentDataProcessor()
+        batches = [self.transactions[start:start + 100]
+                   for start in range(0, len(self.transactions), 100)]
+
+        # Act
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(processor.process, reversed(batches),
+                              reversed(range(len(batches)))))
+        actual = processor.finish()
+
+        # Assert
+        self.assertEqual(list(expected["account_summaries"]), list(actual["account_summaries"]))
+        for account_number, summary in expected["account_summaries"].items():
+            for field in ("balance", "total_deposits", "total_withdrawals"):
+                self.assertAlmostEqual(summary[field],
+                                       actual["account_summaries"][account_number][field],
+                                       places=6)
+        for transaction_type, statistic in expected["transaction_statistics"].items():
+            self.assertAlmostEqual(statistic["total_amount"],
+                                   actual["transaction_statistics"][transaction_type]["total_amount"],
+                                   places=6)
+            self.assertEqual(statistic["transaction_count"],
+                             actual["transaction_statistics"][transaction_type]["transaction_count"])
+        self.assertEqual(expected["suspicious_transactions"], actual["suspicious_transactions"])
+        self.assertEqual(expected["transaction_patterns"], actual["transaction_patterns"])
+        self.assertEqual(len(self.transactions), processor.data_processor.version)
+
+    def test_totals_are_exact_sums_whatever_the_batches(self):
+        # Arrange
+        deposits = math.fsum(float(transaction["Amount"]) for transaction in self.transactions
+                             if transaction["Transaction type"] == "deposit")
+        results = []
+
+        # Act
+        for batch_rows, workers in ((7, 3), (1000, 2)):
+            processor = ConcurrentDataProcessor(detect_patterns=False)
+            batches = [self.transactions[start:start + batch_rows]
+                       for start in range(0, len(self.transactions), batch_rows)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(processor.process, batches, range(len(batches))))
+            results.append(processor.finish())
+
+        # Assert
+        self.assertEqual(results[0]["account_summaries"], results[1]["account_summaries"])
+        self.assertEqual(results[0]["transaction_statistics"],
+                         results[1]["transaction_statistics"])
+        self.assertEqual(deposits, results[0]["transaction_statistics"]["deposit"]["total_amount"])
+
+    def test_process_rejects_repeated_sequence_and_late_batches(self):
+        # Arrange
+        processor = ConcurrentDataProcessor()
+        processor.process(self.transactions[:10], 0)
+
+        # Act and Assert
+        with self.assertRaises(ValueError):
+            processor.process(self.transactions[10:20], 0)
+        processor.finish()
+        with self.assertRaises(ValueError):
+            processor.process(self.transactions[10:20])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ Usage: to execute tests:
 __author__ = "Shannon Petkau"
 __version__ = "branch_issue_5"
 
+import importlib.util
 import unittest
 from unittest import TestCase
 from data_processor.data_processor import DataProcessor
@@ -219,6 +220,142 @@ class TestDataProcessor(TestCase):
             self.processor.check_suspicious_transactions(transaction)
             self.assertTrue(any("Suspicious transaction" in message for message in log.output))
 
+    def test_process_transactions_without_retaining_rows(self):
+        # Arrange
+        processor = DataProcessor([], retain_transactions=False)
+
+        # Act
+        delta = processor.process_transactions(self.transactions)
+
+        # Assert
+        self.assertEqual(["1001", "1002"], list(delta["account_summaries"]))
+        self.assertEqual([], processor.input_data)
+
+    def test_estimate_totals_scales_sample(self):
+        # Arrange
+        processor = DataProcessor(self.transactions)
+
+        # Act
+        estimates = processor.estimate_totals(sampled_rows=2, estimated_rows=200)
+
+        # Assert
+        self.assertTrue(estimates["estimate"])
+        deposits = estimates["transaction_types"]["deposit"]
+        self.assertEqual(250000, deposits["total_amount"]["estimate"])
+        self.assertEqual(200, deposits["transaction_count"]["estimate"])
+        self.assertLess(deposits["total_amount"]["low"], 250000)
+        self.assertEqual(0, estimates["suspicious_rate"]["estimate"])
+
+    def test_combine_estimates_adds_each_input_estimate(self):
+        # Arrange
+        large = DataProcessor(self.transactions).estimate_totals(sampled_rows=2,
+                                                                 estimated_rows=200)
+        small = DataProcessor([{
+            "Transaction ID": "9",
+            "Account number": "1003",
+            "Date": "2023-03-04",
+            "Transaction type": "deposit",
+            "Amount": 20000,
+            "Currency": "CAD",
+            "Description": "Bonus"
+        }]).estimate_totals(sampled_rows=1, estimated_rows=1)
+
+        # Act
+        combined = DataProcessor.combine_estimates([large, small])
+
+        # Assert
+        deposits = combined["transaction_types"]["deposit"]
+        self.assertEqual(270000, deposits["total_amount"]["estimate"])
+        self.assertEqual(201, deposits["transaction_count"]["estimate"])
+        self.assertEqual(201, combined["estimated_rows"])
+        self.assertAlmostEqual(1 / 201, combined["suspicious_rate"]["estimate"])
+
+    def test_process_columns_matches_process_data(self):
+        # Arrange
+        self.transactions.append({
+            "Transaction ID": "4",
+            "Account number": "1002",
+            "Date": "2023-03-03",
+            "Transaction type": "deposit",
+            "Amount": 13000,
+            "Currency": "CAD",
+            "Description": "Bonus"
+        })
+        columns = {field: [transaction[field] for transaction in self.transactions]
+                   for field in self.transactions[0]}
+        columns["Amount"].append(-5)
+        columns["Transaction ID"].append("3")
+        columns["Account number"].append("1001")
+        columns["Date"].append("2023-03-02")
+        columns["Transaction type"].append("deposit")
+        columns["Currency"].append("CAD")
+        columns["Description"].append("Invalid")
+        expected_processor = DataProcessor(self.transactions)
+        expected = expected_processor.process_data()
+
+        # Act
+        processor = DataProcessor([])
+        actual = processor.process_columns(columns)
+
+        # Assert
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["suspicious_transactions"],
+                         actual["suspicious_transactions"])
+        self.assertEqual(13000, actual["suspicious_transactions"][0]["Amount"])
+        self.assertIsInstance(actual["suspicious_transactions"][0]["Amount"], int)
+        self.assertEqual([], processor.input_data)
+        self.assertEqual(list(expected_processor.get_balance_history().to_records()),
+                         list(processor.get_balance_history().to_records()))
+        self.assertEqual(expected["transaction_statistics"], actual["transaction_statistics"])
+
+    def test_iter_sorted_account_summaries_yields_each_account_once(self):
+        # Arrange
+        self.transactions.append({
+            "Transaction ID": "3",
+            "Account number": "1002",
+            "Date": "2023-03-02",
+            "Transaction type": "withdrawal",
+            "Amount": 500,
+            "Currency": "CAD",
+            "Description": "Rent"
+        })
+        expected = DataProcessor([dict(transaction) for transaction in self.transactions])
+        expected = list(expected.process_data()["account_summaries"].values())
+        processor = DataProcessor(self.transactions)
+
+        # Act
+        sorted_input = processor.is_sorted_by_account()
+        actual = list(processor.iter_sorted_account_summaries())
+
+        # Assert
+        self.assertTrue(sorted_input)
+        self.assertEqual(expected, actual)
+        self.assertEqual({}, processor.account_summaries)
+        self.assertEqual(3, processor.transaction_statistics["deposit"]["transaction_count"]
+                         + processor.transaction_statistics["withdrawal"]["transaction_count"])
+
+    def test_iter_sorted_account_summaries_rejects_unsorted_input(self):
+        # Arrange
+        processor = DataProcessor(list(reversed(self.transactions)))
+
+        # Act and Assert
+        self.assertFalse(processor.is_sorted_by_account())
+        with self.assertRaises(ValueError):
+            list(processor.iter_sorted_account_summaries(sorted_by_account=True))
+
+    @unittest.skipUnless(importlib.util.find_spec("pandas"), "pandas is not installed")
+    def test_process_table_and_to_pandas(self):
+        # Arrange
+        import pandas
+        processor = DataProcessor([])
+
+        # Act
+        processor.process_table(pandas.DataFrame(self.transactions))
+        frames = processor.to_pandas()
+
+        # Assert
+        self.assertEqual(["1001", "1002"], frames["account_summaries"]["account_number"].tolist())
+
     def test_log_file(self):
         # Arrange
         with self.assertLogs(level='INFO') as log:
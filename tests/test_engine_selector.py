@@ -0,0 +1,151 @@
+"""
+Description: Unit tests for EngineSelector Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_engine_selector.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from unittest.mock import patch
+from data_processor.data_processor import DataProcessor
+from engine_selector.engine_selector import EngineSelector
+from input_handler.input_handler import InputHandler
+from transaction_deduplicator.transaction_deduplicator import TransactionDeduplicator
+
+
+class TestEngineSelector(TestCase):
+    """Defines the unit tests for the EngineSelector class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.transactions = [
+            {"Transaction ID": str(index), "Account number": str(1000 + index % 7),
+             "Date": f"2023-03-{index % 28 + 1:02d}",
+             "Transaction type": ["deposit", "withdrawal", "transfer"][index % 3],
+             "Amount": 20000 if index % 11 == 0 else index * 10,
+             "Currency": "XRP" if index % 13 == 0 else "CAD",
+             "Description": "Payment"}
+            for index in range(200)
+        ]
+
+    def test_choose_row_engine_for_small_input(self):
+        # Arrange
+        engine_selector = EngineSelector()
+
+        # Act
+        choice = engine_selector.choose(["input/input_data.csv"])
+
+        # Assert
+        self.assertEqual("row", choice["engine"])
+        self.assertGreater(choice["estimated_rows"], 0)
+        self.assertGreaterEqual(choice["cores"], 1)
+
+    def test_choose_columnar_engine_only_for_inputs_read_as_columns(self):
+        # Arrange
+        engine_selector = EngineSelector()
+
+        # Act
+        with patch.object(EngineSelector, "estimate_rows", return_value=100_000):
+            as_transactions = engine_selector.choose(["input/input_data.csv"])
+            as_columns = engine_selector.choose(["input/input_data.csv"],
+                                                read_columns=True)
+
+        # Assert
+        self.assertEqual("row", as_transactions["engine"])
+        self.assertEqual("columnar", as_columns["engine"])
+
+    def test_choose_rejects_unknown_engine(self):
+        # Act and Assert
+        with self.assertRaises(ValueError):
+            EngineSelector().choose(["input/input_data.csv"], "vectorized")
+
+    def test_engines_match_row_engine_and_record_timing(self):
+        # Arrange
+        expected = DataProcessor([dict(row) for row in self.transactions]).process_data()
+
+        with tempfile.TemporaryDirectory() as directory:
+            timing_log_path = os.path.join(directory, "timings.jsonl")
+            engine_selector = EngineSelector(timing_log_path)
+
+            # Act
+            results = {}
+            for engine, batch_rows, workers in (("columnar", 64, 1), ("multiprocess", 1, 2)):
+                choice = {"engine": engine, "estimated_rows": 200, "cores": 2,
+                          "memory_bytes": None, "batch_rows": batch_rows, "workers": workers}
+                _, results[engine] = engine_selector.process(
+                    [dict(row) for row in self.transactions], choice)
+
+            with open(timing_log_path) as timing_log:
+                entries = [json.loads(line) for line in timing_log]
+
+        # Assert
+        for actual in results.values():
+            self.assertEqual(list(expected["account_summaries"]), list(actual["account_summaries"]))
+            for account_number, summary in expected["account_summaries"].items():
+                self.assertAlmostEqual(summary["balance"],
+                                       actual["account_summaries"][account_number]["balance"])
+            self.assertEqual(
+                [row["Transaction ID"] for row in expected["suspicious_transactions"]],
+                [row["Transaction ID"] for row in actual["suspicious_transactions"]])
+            self.assertEqual(expected["transaction_patterns"], actual["transaction_patterns"])
+        self.assertEqual(["columnar", "multiprocess"], [entry["engine"] for entry in entries])
+        self.assertEqual(200, entries[1]["rows"])
+
+    def test_columnar_engine_keeps_only_processed_rows_when_deduplicating(self):
+        # Arrange
+        replayed = [dict(row) for row in self.transactions] \
+            + [dict(row) for row in self.transactions[:50]]
+        expected_processor = DataProcessor([dict(row) for row in replayed],
+                                           deduplicator=TransactionDeduplicator())
+        expected_processor.process_data()
+        choice = {"engine": "columnar", "estimated_rows": 250, "cores": 1,
+                  "memory_bytes": None, "batch_rows": 64, "workers": 1}
+
+        # Act
+        data_processor, _ = EngineSelector().process(replayed, choice,
+                                                     TransactionDeduplicator())
+
+        # Assert
+        self.assertEqual(list(expected_processor.get_balance_history().to_records()),
+                         list(data_processor.get_balance_history().to_records()))
+
+    def test_process_encoded_matches_row_engine(self):
+        # Arrange
+        fields = list(self.transactions[0])
+        expected = DataProcessor([dict(row) for row in self.transactions]).process_data()
+        choice = {"engine": "columnar", "estimated_rows": 200, "cores": 1,
+                  "memory_bytes": None, "batch_rows": 200, "workers": 1}
+
+        with tempfile.TemporaryDirectory() as directory:
+            encoded_inputs = []
+            for part, rows in enumerate((self.transactions[:120], self.transactions[120:])):
+                file_path = os.path.join(directory, f"input_{part}.csv")
+                with open(file_path, "w") as input_file:
+                    input_file.write(",".join(fields) + "\n")
+                    for row in rows:
+                        input_file.write(",".join(str(row[field]) for field in fields) + "\n")
+                encoded_inputs.append(InputHandler(file_path).read_encoded_data())
+            timing_log_path = os.path.join(directory, "timings.jsonl")
+
+            # Act
+            _, actual = EngineSelector(timing_log_path).process_encoded(encoded_inputs, choice)
+            with open(timing_log_path) as timing_log:
+                entries = [json.loads(line) for line in timing_log]
+
+        # Assert
+        self.assertEqual(list(expected["account_summaries"]), list(actual["account_summaries"]))
+        for account_number, summary in expected["account_summaries"].items():
+            self.assertAlmostEqual(summary["balance"],
+                                   actual["account_summaries"][account_number]["balance"])
+        self.assertEqual(
+            [row["Transaction ID"] for row in expected["suspicious_transactions"]],
+            [row["Transaction ID"] for row in actual["suspicious_transactions"]])
+        self.assertEqual(expected["transaction_statistics"], actual["transaction_statistics"])
+        self.assertEqual(200, entries[0]["rows"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Description: Unit tests for IngestionServer Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_ingestion_server.py
+"""
+
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+from ingestion_server.ingestion_server import (IngestionServer,
+                                               send_request,
+                                               generate_load)
+
+
+class TestIngestionServer(IsolatedAsyncioTestCase):
+    """Defines the unit tests for the IngestionServer class."""
+
+    async def asyncSetUp(self):
+        """Starts a server on a free port and opens a connection to it."""
+        self.server = IngestionServer(port=0, batch_size=50,
+                                      batch_interval=0.01)
+        self.port = await self.server.start()
+        self.reader, self.writer = await asyncio.open_connection(
+            "127.0.0.1", self.port)
+        self.transactions = [
+            {
+                "Transaction ID": 1,
+                "Account number": 1001,
+                "Date": "2023-03-01",
+                "Transaction type": "deposit",
+                "Amount": 12000,
+                "Currency": "CAD",
+                "Description": "Car Sale"
+            },
+            {
+                "Transaction ID": 2,
+                "Account number": 1001,
+                "Date": "2023-03-02",
+                "Transaction type": "invalid_deposit",
+                "Amount": 100,
+                "Currency": "CAD",
+                "Description": "Salary"
+            }
+        ]
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.stop()
+
+    async def test_post_json_is_validated_and_processed(self):
+        # Act
+        status, response = await send_request(self.reader, self.writer, "POST",
+                                               "/transactions", self.transactions)
+        _, summary = await send_request(self.reader, self.writer, "GET",
+                                        "/account_summaries/1001")
+        _, suspicious = await send_request(self.reader, self.writer, "GET",
+                                           "/suspicious_transactions")
+
+        # Assert
+        self.assertEqual(200, status)
+        self.assertEqual({"accepted": 1, "rejected": 1}, response)
+        self.assertEqual(12000, summary["balance"])
+        self.assertEqual(1, len(suspicious))
+
+    async def test_post_rejects_account_number_that_is_not_a_value(self):
+        # Arrange
+        record = dict(self.transactions[0], **{"Account number": [1001]})
+
+        # Act
+        status, _ = await send_request(self.reader, self.writer, "POST",
+                                       "/transactions", record)
+        next_status, _ = await send_request(self.reader, self.writer, "POST",
+                                            "/transactions", self.transactions[0])
+
+        # Assert
+        self.assertEqual(400, status)
+        self.assertEqual(200, next_status)
+
+    async def test_failed_request_is_answered_and_loop_keeps_running(self):
+        # Arrange
+        data_processor = self.server.data_processor
+        with patch.object(data_processor, "process_transactions",
+                          side_effect=TypeError("unhashable type")):
+            # Act
+            status, response = await send_request(self.reader, self.writer, "POST",
+                                                  "/transactions", self.transactions[0])
+        next_status, _ = await send_request(self.reader, self.writer, "POST",
+                                            "/transactions", self.transactions[0])
+
+        # Assert
+        self.assertEqual(500, status)
+        self.assertIn("unhashable type", response["error"])
+        self.assertEqual(0, response["accepted"])
+        self.assertEqual(200, next_status)
+        self.assertEqual(1, self.server.metrics["failed_transactions"])
+
+    async def test_failed_transaction_does_not_fail_the_rest_of_the_batch(self):
+        # Arrange
+        data_processor = self.server.data_processor
+        process_transactions = data_processor.process_transactions
+        other = dict(self.transactions[0], **{"Transaction ID": 3, "Account number": 1002})
+        failing = dict(self.transactions[0], **{"Transaction ID": 4})
+
+        def fail_transaction_4(transactions):
+            if transactions[0]["Transaction ID"] == 4:
+                raise TypeError("unhashable type")
+            return process_transactions(transactions)
+
+        other_reader, other_writer = await asyncio.open_connection("127.0.0.1", self.port)
+        with patch.object(data_processor, "process_transactions",
+                          side_effect=fail_transaction_4):
+            # Act
+            (status, response), (other_status, other_response) = await asyncio.gather(
+                send_request(self.reader, self.writer, "POST", "/transactions",
+                             [self.transactions[0], failing]),
+                send_request(other_reader, other_writer, "POST", "/transactions", other))
+        other_writer.close()
+
+        # Assert
+        self.assertEqual(200, status)
+        self.assertEqual(1, response["accepted"])
+        self.assertEqual(1, response["failed"])
+        self.assertEqual(200, other_status)
+        self.assertEqual({"accepted": 1, "rejected": 0}, other_response)
+        self.assertEqual({1001, 1002}, set(data_processor.account_summaries))
+
+    async def test_post_rejects_transfer_without_date_before_applying_any(self):
+        # Arrange
+        transfer = dict(self.transactions[0], **{"Transaction ID": 3,
+                                                 "Transaction type": "transfer",
+                                                 "Counterparty account": 1002})
+        del transfer["Date"]
+
+        # Act
+        status, _ = await send_request(self.reader, self.writer, "POST",
+                                       "/transactions", [self.transactions[0], transfer])
+        bad_date_status, _ = await send_request(
+            self.reader, self.writer, "POST", "/transactions",
+            dict(transfer, Date="03/01/2023"))
+
+        # Assert
+        self.assertEqual(400, status)
+        self.assertEqual(400, bad_date_status)
+        self.assertEqual({}, self.server.data_processor.account_summaries)
+
+    async def test_post_csv(self):
+        # Arrange
+        body = ("Transaction ID,Account number,Date,Transaction type,"
+                "Amount,Currency,Description\n"
+                "1,1001,2023-03-01,deposit,1000,CAD,Salary\n").encode()
+
+        # Act
+        self.writer.write(b"POST /transactions HTTP/1.1\r\n"
+                          b"Content-Type: text/csv\r\n"
+                          + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                          + body)
+        await self.reader.readuntil(b"\r\n\r\n")
+        await self.reader.readuntil(b"}")
+        _, statistics = await send_request(self.reader, self.writer, "GET",
+                                           "/transaction_statistics")
+
+        # Assert
+        self.assertEqual({"deposit": {"total_amount": 1000,
+                                      "transaction_count": 1}}, statistics)
+
+    async def test_post_missing_fields(self):
+        # Act
+        status, _ = await send_request(self.reader, self.writer, "POST",
+                                       "/transactions", [{"Amount": 1}])
+
+        # Assert
+        self.assertEqual(400, status)
+
+    async def test_generate_load_batches_requests(self):
+        # Act
+        result = await generate_load(port=self.port, requests=40,
+                                     records_per_request=5, concurrency=4)
+
+        # Assert
+        self.assertEqual(200, self.server.metrics["transactions"])
+        self.assertLess(self.server.metrics["batches"], 40)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+if __name__ == "__main__":
+    unittest.main()
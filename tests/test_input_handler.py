@@ -11,8 +11,11 @@ __version__ = "branch_issue_01"
 import unittest
 from unittest import TestCase
 from input_handler.input_handler import InputHandler
+from data_processor.data_processor import DataProcessor
 from unittest.mock import patch, mock_open
 import csv
+import os
+import tempfile
 
 # CLASS
 class InputHandlerTests(TestCase):
@@ -293,5 +296,217 @@ class InputHandlerTests(TestCase):
 
 
 
+    def test_read_sample_data_small_file_is_exact(self):
+        # Arrange
+        input_handler = InputHandler("input/input_data.csv")
+
+        # Act
+        actual = input_handler.read_sample_data(sample_size=5, seed=1)
+
+        # Assert
+        self.assertEqual(31, actual["estimated_rows"])
+        self.assertEqual(5, actual["sampled_rows"])
+        self.assertTrue(actual["exact"])
+        self.assertTrue(all(isinstance(row["Amount"], int) for row in actual["transactions"]))
+
+
+    def test_read_sample_data_large_file_is_estimated(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "large.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS.split("\n")[0] + "\n")
+                for index in range(20000):
+                    input_file.write(f"{index},1001,2023-03-01,deposit,100,CAD,Salary\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            actual = input_handler.read_sample_data(sample_size=10, seed=1)
+
+        # Assert
+        self.assertFalse(actual["exact"])
+        self.assertAlmostEqual(20000, actual["estimated_rows"], delta=2000)
+
+
+    def test_read_sample_data_large_file_is_not_biased_by_row_length(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "large.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS.split("\n")[0] + "\n")
+                for index in range(20000):
+                    description = "Salary" if index % 2 else "Salary" * 40
+                    input_file.write(f"{index},1001,2023-03-01,deposit,100,CAD,{description}\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            actual = input_handler.read_sample_data(sample_size=1000, seed=1)
+
+        # Assert
+        short_rows = sum(1 for row in actual["transactions"] if row["Description"] == "Salary")
+        self.assertAlmostEqual(500, short_rows, delta=75)
+        self.assertAlmostEqual(20000, actual["estimated_rows"], delta=2000)
+
+
+
+    def test_read_filtered_data_pushes_down_filters(self):
+        # Arrange
+        input_handler = InputHandler("input/input_data.csv")
+
+        # Act
+        actual = input_handler.read_filtered_data(account_numbers=[1002],
+                                                  transaction_types=["deposit"],
+                                                  currencies=["CAD"])
+
+        # Assert
+        self.assertEqual(["2", "8"], [row["Transaction ID"] for row in actual])
+
+
+    def test_read_filtered_data_without_filtering_matches_read_input_data(self):
+        # Arrange
+        input_handler = InputHandler("input/input_data.csv")
+
+        # Act
+        expected = input_handler.read_input_data()
+        actual = input_handler.read_filtered_data(start_date="1900-01-01")
+
+        # Assert
+        self.assertEqual(30, len(expected))
+        self.assertEqual(expected, actual)
+
+
+    def test_read_filtered_data_sorted_by_date_matches_full_scan(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sorted.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS.split("\n")[0] + "\n")
+                for index in range(300):
+                    input_file.write(f"{index},1001,2023-{index // 28 % 12 + 1:02d}-"
+                                     f"{index % 28 + 1:02d},deposit,100,CAD,Salary\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            expected = input_handler.read_filtered_data("2023-03-10", "2023-04-02")
+            actual = input_handler.read_filtered_data("2023-03-10", "2023-04-02",
+                                                      sorted_by_date=True)
+
+        # Assert
+        self.assertEqual(expected, actual)
+        self.assertEqual("2023-03-10", actual[0]["Date"])
+        self.assertEqual("2023-04-02", actual[-1]["Date"])
+
+
+
+    def test_read_account_transactions_uses_sidecar_index(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "input.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS + "\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            actual = input_handler.read_account_transactions(1001)
+            index_built = os.path.isfile(input_handler.get_index_path())
+            with open(file_path, "a") as input_file:
+                input_file.write("4,1001,2023-03-04,deposit,50,CAD,Refund\n")
+            after_append = input_handler.read_account_transactions("1001", start_date="2023-03-02")
+
+        # Assert
+        self.assertTrue(index_built)
+        self.assertEqual(["1", "3"], [row["Transaction ID"] for row in actual])
+        self.assertEqual(200, actual[1]["Amount"])
+        self.assertEqual(["3", "4"], [row["Transaction ID"] for row in after_append])
+
+
+    def test_build_account_index_writes_fixed_width_entries(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "input.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS + "\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            header = input_handler.build_account_index()
+            index_size = os.path.getsize(input_handler.get_index_path())
+            missing = input_handler.read_account_transactions(9999)
+            row_count = len(input_handler.read_account_transactions(1001)) \
+                + len(input_handler.read_account_transactions(1002))
+
+        # Assert
+        self.assertEqual(2, header["accounts"])
+        self.assertEqual(4, header["key_width"])
+        self.assertEqual(InputHandler.INDEX_HEADER.size + 2 * (4 + 16) + row_count * 8,
+                         index_size)
+        self.assertEqual([], missing)
+
+
+    def test_data_validation_shares_repeated_strings(self):
+        # Arrange
+        input_handler = InputHandler("input.csv")
+        transactions = [
+            {"Amount": 10, "Transaction type": "".join(["depo", "sit"]),
+             "Currency": "".join(["CA", "D"]), "Description": "Salary"},
+            {"Amount": 20, "Transaction type": "".join(["dep", "osit"]),
+             "Currency": "".join(["C", "AD"]), "Description": "Salary"}
+        ]
+
+        # Act
+        actual = input_handler.data_validation(transactions)
+
+        # Assert
+        self.assertIs(actual[0]["Transaction type"], actual[1]["Transaction type"])
+        self.assertIs(actual[0]["Currency"], actual[1]["Currency"])
+        self.assertEqual(["deposit"], input_handler.get_symbol_table("Transaction type"))
+
+    def test_read_encoded_data_matches_process_data(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "input.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS + "\n4,1002,2023-03-03,refund,5,CAD,Bad\n")
+            input_handler = InputHandler(file_path)
+            expected = DataProcessor(input_handler.data_validation(
+                [input_handler.convert_amount(row) for row in input_handler.read_csv_data()]
+            )).process_data()
+
+            # Act
+            encoded = input_handler.read_encoded_data()
+            actual = DataProcessor([]).process_columns(encoded["columns"], encoded["symbols"])
+
+        # Assert
+        self.assertEqual([0, 0, 1], list(encoded["columns"]["Transaction type"]))
+        self.assertEqual(["deposit", "withdrawal"], encoded["symbols"]["Transaction type"])
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["transaction_statistics"], actual["transaction_statistics"])
+
+
+    def test_read_encoded_data_keeps_raw_values_once_symbol_table_is_full(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "input.csv")
+            with open(file_path, "w") as input_file:
+                input_file.write(self.FILE_CONTENTS + "\n4,1002,2023-03-04,deposit,13000,XRP,Bonus\n")
+            input_handler = InputHandler(file_path)
+
+            # Act
+            with patch.object(InputHandler, "MAX_SYMBOLS", 2):
+                encoded = input_handler.read_encoded_data()
+            processor = DataProcessor([])
+            actual = processor.process_columns(encoded["columns"], encoded["symbols"])
+
+        # Assert
+        self.assertEqual(["Salary", "Salary", "Groceries", "Bonus"],
+                         encoded["columns"]["Description"])
+        self.assertNotIn("Description", encoded["symbols"])
+        self.assertEqual(["CAD", "XRP"], encoded["symbols"]["Currency"])
+        self.assertEqual([("XRP", "Bonus")],
+                         [(row["Currency"], row["Description"])
+                          for row in actual["suspicious_transactions"]])
+
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Description: Unit tests for the command line entry point.
+Usage: to execute tests:
+    py -m unittest -v tests/test_main.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+import main
+
+
+class TestMain(TestCase):
+    """Defines the unit tests for main.main."""
+
+    def test_main_writes_outputs_to_output_dir(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = ["--input", "input/input_data.json",
+                         "--output-dir", directory,
+                         "--prefix", "test",
+                         "--log-file", os.path.join(directory, "test.log"),
+                         "--sort-accounts", "balance"]
+
+            # Act
+            main.main(arguments)
+
+            # Assert
+            with open(os.path.join(directory, "test_account_summaries.csv")) as output_file:
+                lines = output_file.readlines()
+            self.assertEqual("Account number,Balance,Total Deposits,Total Withdrawals\n", lines[0])
+            self.assertEqual("1002", lines[1].split(",")[0])
+            self.assertTrue(os.path.isfile(os.path.join(directory, "test_transfer_graph.csv")))
+
+    def test_main_streams_sorted_account_summaries(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.json")
+            with open(input_path, "w") as input_file:
+                json.dump([
+                    {"Transaction ID": "1", "Account number": "1001", "Date": "2023-03-01",
+                     "Transaction type": "deposit", "Amount": 100, "Currency": "CAD",
+                     "Description": "Salary"},
+                    {"Transaction ID": "2", "Account number": "1001", "Date": "2023-03-02",
+                     "Transaction type": "withdrawal", "Amount": 40, "Currency": "CAD",
+                     "Description": "Rent"},
+                    {"Transaction ID": "3", "Account number": "1002", "Date": "2023-03-01",
+                     "Transaction type": "deposit", "Amount": 20000, "Currency": "CAD",
+                     "Description": "Bonus"}
+                ], input_file)
+            arguments = ["--input", input_path,
+                         "--output-dir", directory,
+                         "--prefix", "test",
+                         "--log-file", os.path.join(directory, "test.log"),
+                         "--sorted-by-account"]
+
+            # Act
+            main.main(arguments)
+
+            # Assert
+            with open(os.path.join(directory, "test_account_summaries.csv")) as output_file:
+                lines = output_file.read().splitlines()
+            with open(os.path.join(directory, "test_suspicious_transactions.csv")) as output_file:
+                suspicious = output_file.read().splitlines()
+            self.assertEqual(["1001,60.0,100.0,40.0", "1002,20000.0,20000.0,0"], lines[1:])
+            self.assertEqual(2, len(suspicious))
+            self.assertTrue(os.path.isfile(os.path.join(directory, "test_SUCCESS")))
+
+    def test_main_keeps_old_outputs_when_sorted_stream_fails(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.json")
+            with open(input_path, "w") as input_file:
+                json.dump([
+                    {"Transaction ID": "1", "Account number": "1002", "Date": "2023-03-01",
+                     "Transaction type": "deposit", "Amount": 100, "Currency": "CAD",
+                     "Description": "Salary"},
+                    {"Transaction ID": "2", "Account number": "1001", "Date": "2023-03-02",
+                     "Transaction type": "deposit", "Amount": 40, "Currency": "CAD",
+                     "Description": "Refund"}
+                ], input_file)
+            summaries_path = os.path.join(directory, "test_account_summaries.csv")
+            marker_path = os.path.join(directory, "test_SUCCESS")
+            for file_path in (summaries_path, marker_path):
+                with open(file_path, "w") as output_file:
+                    output_file.write("old\n")
+            arguments = ["--input", input_path,
+                         "--output-dir", directory,
+                         "--prefix", "test",
+                         "--log-file", os.path.join(directory, "test.log"),
+                         "--sorted-by-account"]
+
+            # Act
+            with self.assertRaises(ValueError):
+                main.main(arguments)
+
+            # Assert
+            with open(summaries_path) as output_file:
+                self.assertEqual("old\n", output_file.read())
+            self.assertTrue(os.path.isfile(marker_path))
+            self.assertEqual([], [name for name in os.listdir(directory)
+                                  if name.startswith(".")])
+
+    def test_main_with_journal_matches_run_without_it(self):
+        # Arrange
+        outputs = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for prefix, options in (("plain", []),
+                                    ("journaled", ["--journal", os.path.join(directory, "journal")])):
+                arguments = ["--input", "input/input_data.json",
+                             "--output-dir", directory,
+                             "--prefix", prefix,
+                             "--log-file", os.path.join(directory, "test.log")] + options
+
+                # Act
+                main.main(arguments)
+
+                outputs[prefix] = {}
+                for filename in ("account_summaries.csv", "balance_history.jsonl"):
+                    with open(os.path.join(directory, f"{prefix}_{filename}")) as output_file:
+                        outputs[prefix][filename] = output_file.read()
+
+        # Assert
+        self.assertEqual(outputs["plain"], outputs["journaled"])
+        histories = [json.loads(line)
+                     for line in outputs["journaled"]["balance_history.jsonl"].splitlines()]
+        self.assertEqual(12, sum(len(history["balances"]) for history in histories))
+        self.assertIn("1001,13910.0,", outputs["journaled"]["account_summaries.csv"])
+
+    def test_main_replays_archive_with_columnar_engine(self):
+        # Arrange
+        outputs = {}
+        with tempfile.TemporaryDirectory() as directory:
+            archive_path = os.path.join(directory, "history.txa")
+            main.main(["--input", "input/input_data.csv", "--output-dir", directory,
+                       "--prefix", "plain", "--archive", archive_path,
+                       "--log-file", os.path.join(directory, "test.log")])
+
+            # Act
+            main.main(["--input", archive_path, "--output-dir", directory,
+                       "--prefix", "replayed", "--engine", "columnar",
+                       "--log-file", os.path.join(directory, "test.log")])
+
+            for prefix in ("plain", "replayed"):
+                outputs[prefix] = {}
+                for filename in ("account_summaries.csv", "suspicious_transactions.csv",
+                                 "transaction_statistics.csv"):
+                    with open(os.path.join(directory, f"{prefix}_{filename}")) as output_file:
+                        outputs[prefix][filename] = output_file.read()
+            with open(os.path.join(directory, "replayed_engine_timings.jsonl")) as timing_log:
+                timing = json.loads(timing_log.readline())
+
+        # Assert
+        self.assertEqual(outputs["plain"], outputs["replayed"])
+        self.assertEqual(timing["estimated_rows"], timing["rows"])
+
+    def test_main_with_dedup_state_keeps_results_of_skipped_transactions(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            first_path = os.path.join(directory, "first.csv")
+            second_path = os.path.join(directory, "second.csv")
+            header = ("Transaction ID,Account number,Date,Transaction type,"
+                      "Amount,Currency,Description\n")
+            with open(first_path, "w") as input_file:
+                input_file.write(header + "1,1001,2023-03-01,deposit,12800,CAD,Car Sale\n"
+                                          "2,1002,2023-03-01,deposit,200,CAD,Salary\n")
+            with open(second_path, "w") as input_file:
+                input_file.write(header + "1,1001,2023-03-01,deposit,12800,CAD,Car Sale\n"
+                                          "3,1001,2023-03-02,deposit,5,CAD,Interest\n")
+            database_path = os.path.join(directory, "results.db")
+            arguments = ["--output-dir", directory,
+                         "--dedup-state", os.path.join(directory, "seen.bin"),
+                         "--sqlite", database_path,
+                         "--log-file", os.path.join(directory, "test.log")]
+            summaries_path = os.path.join(directory, "output_data_account_summaries.csv")
+
+            # Act
+            main.main(["--input", first_path] + arguments)
+            main.main(["--input", first_path] + arguments)
+            with open(summaries_path) as output_file:
+                resent = output_file.read()
+            main.main(["--input", second_path] + arguments)
+            with open(summaries_path) as output_file:
+                added = output_file.read()
+            with open(os.path.join(directory,
+                                   "output_data_suspicious_transactions.csv")) as output_file:
+                suspicious = output_file.read()
+            import sqlite3
+            connection = sqlite3.connect(database_path)
+            balance = connection.execute("SELECT balance FROM account_summaries "
+                                         "WHERE account_number = '1001'").fetchone()[0]
+            deposits = connection.execute("SELECT total_amount, transaction_count "
+                                          "FROM transaction_statistics "
+                                          "WHERE transaction_type = 'deposit'").fetchone()
+            connection.close()
+
+        # Assert
+        self.assertIn("1001,12800.0,", resent)
+        self.assertIn("1002,200.0,", resent)
+        self.assertIn("1001,12805.0,", added)
+        self.assertEqual(1, suspicious.count("Car Sale"))
+        self.assertEqual(12805, balance)
+        self.assertEqual((13005, 3), deposits)
+
+    def test_parse_arguments_defaults(self):
+        # Act
+        arguments = main.parse_arguments([])
+
+        # Assert
+        self.assertEqual(1, len(arguments.input_files))
+        self.assertFalse(arguments.daemon)
+        self.assertEqual(0, arguments.preview)
+
+if __name__ == "__main__":
+    unittest.main()
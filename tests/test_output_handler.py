@@ -5,8 +5,11 @@ __author__ = "RajanDeep Kaur"
 __version__ = "3.11"
 
 from unittest import TestCase, main
-from output_handler.output_handler import OutputHandler
+from output_handler.output_handler import OutputHandler, external_sort
 from unittest.mock import patch, mock_open
+import os
+import sqlite3
+import tempfile
 
 class TestOutputHandler(TestCase):
     """Defines the unit tests for the OutputHandler class."""
@@ -101,5 +104,141 @@ class TestOutputHandler(TestCase):
             handle.write.assert_called_once_with("Account number,Balance,Total Deposits,Total Withdrawals\n")
             handle.write.assert_called_once()
 
+    def test_write_results_to_sqlite_upserts(self):
+        """Tests loading into SQLite and upserting a changed account."""
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+        delta = {
+            "account_summaries": {"1001": {"account_number": "1001", "balance": 75,
+                                           "total_deposits": 125, "total_withdrawals": 50}},
+            "suspicious_transactions": [],
+            "transaction_statistics": {}
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = os.path.join(directory, "results.db")
+            output_handler.write_results_to_sqlite(database_path)
+            output_handler.write_delta_to_sqlite(database_path, delta)
+
+            connection = sqlite3.connect(database_path)
+            accounts = connection.execute("SELECT COUNT(*) FROM account_summaries").fetchone()[0]
+            balance = connection.execute("SELECT balance FROM account_summaries "
+                                         "WHERE account_number = '1001'").fetchone()[0]
+            currency = connection.execute("SELECT currency FROM suspicious_transactions "
+                                          "WHERE account_number = '1001'").fetchone()[0]
+            connection.close()
+
+        self.assertEqual(3, accounts)
+        self.assertEqual(75, balance)
+        self.assertEqual("XRP", currency)
+
+    def test_write_partitioned_outputs_manifest(self):
+        """Tests that every row lands in exactly one listed partition."""
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = output_handler.write_partitioned_outputs(directory, partition_count=2)
+            hashed_rows = sum(partition["rows"] for partition in manifest["outputs"]["account_summaries"])
+            files_exist = all(os.path.isfile(os.path.join(directory, partition["file"]))
+                              for partition in manifest["outputs"]["suspicious_transactions"])
+            ranged = output_handler.write_partitioned_outputs(directory, partition_count=2,
+                                                              partition_by="range")
+
+        self.assertEqual(3, hashed_rows)
+        self.assertTrue(files_exist)
+        self.assertEqual([1, 2], [partition["rows"] for partition in ranged["outputs"]["account_summaries"]])
+        self.assertEqual(64, len(ranged["outputs"]["account_summaries"][0]["sha256"]))
+
+    def test_write_partitioned_outputs_ranges_text_accounts_numerically(self):
+        """Tests that csv text account numbers get the same ranges as numbers."""
+        def summaries(account_numbers):
+            return {account_number: {"account_number": account_number, "balance": 1,
+                                     "total_deposits": 1, "total_withdrawals": 0}
+                    for account_number in account_numbers}
+
+        with tempfile.TemporaryDirectory() as directory:
+            partitions = {}
+            for name, account_numbers in (("text", ["1001", "999", "1003", "1002"]),
+                                          ("number", [1001, 999, 1003, 1002])):
+                output_directory = os.path.join(directory, name)
+                manifest = OutputHandler(summaries(account_numbers), [], {}) \
+                    .write_partitioned_outputs(output_directory, partition_count=2,
+                                               partition_by="range")
+                partitions[name] = []
+                for partition in manifest["outputs"]["account_summaries"]:
+                    with open(os.path.join(output_directory, partition["file"])) as partition_file:
+                        partitions[name].append(sorted(line.split(",")[0] for line
+                                                       in partition_file.read().splitlines()[1:]))
+
+        self.assertEqual([["1001", "999"], ["1002", "1003"]], partitions["text"])
+        self.assertEqual(partitions["number"], partitions["text"])
+
+    def test_external_sort_spills_and_merges(self):
+        """Tests that a sort over the memory budget matches sorted()."""
+        rows = [[value % 97, value] for value in range(2500)]
+
+        actual = list(external_sort(rows, key=lambda row: row[0], reverse=True,
+                                    memory_budget_rows=300))
+
+        self.assertEqual(sorted(rows, key=lambda row: row[0], reverse=True), actual)
+
+    def test_write_sorted_account_summaries_to_csv(self):
+        """Tests sorting account summaries by balance, largest first."""
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sorted.csv")
+            output_handler.write_sorted_account_summaries_to_csv(file_path, "balance", reverse=True,
+                                                                 memory_budget_rows=1)
+            with open(file_path) as output_file:
+                account_numbers = [line.split(",")[0] for line in output_file.readlines()[1:]]
+
+        self.assertEqual(["1003", "1002", "1001"], account_numbers)
+
+    def test_write_files_atomically_publishes_with_marker(self):
+        """Tests that all files and the marker are published together."""
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+
+        with tempfile.TemporaryDirectory() as directory:
+            summaries_path = os.path.join(directory, "summaries.csv")
+            statistics_path = os.path.join(directory, "statistics.csv")
+            marker_path = os.path.join(directory, "_SUCCESS")
+            output_handler.write_files_atomically({
+                summaries_path: output_handler.write_account_summaries_to_csv,
+                statistics_path: output_handler.write_transaction_statistics_to_csv
+            }, marker_path)
+
+            with open(marker_path) as marker_file:
+                marker = marker_file.read()
+            leftovers = [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+        self.assertIn("summaries.csv", marker)
+        self.assertIn("statistics.csv", marker)
+        self.assertEqual([], leftovers)
+
+    def test_write_files_atomically_keeps_old_files_on_failure(self):
+        """Tests that a failing writer leaves the previous outputs intact."""
+        output_handler = OutputHandler(self.account_summaries, self.suspicious_transactions, self.transaction_statistics)
+
+        def failing_writer(file_path):
+            raise OSError("disk full")
+
+        with tempfile.TemporaryDirectory() as directory:
+            summaries_path = os.path.join(directory, "summaries.csv")
+            with open(summaries_path, "w") as old_file:
+                old_file.write("old")
+
+            with self.assertRaises(OSError):
+                output_handler.write_files_atomically({
+                    summaries_path: output_handler.write_account_summaries_to_csv,
+                    os.path.join(directory, "statistics.csv"): failing_writer
+                }, os.path.join(directory, "_SUCCESS"))
+
+            with open(summaries_path) as summaries_file:
+                contents = summaries_file.read()
+            names = sorted(os.listdir(directory))
+
+        self.assertEqual("old", contents)
+        self.assertEqual(["summaries.csv"], names)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Description: Unit tests for PatternDetector Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_pattern_detector.py
+"""
+
+import unittest
+from unittest import TestCase
+from pattern_detector.pattern_detector import PatternDetector
+
+
+class TestPatternDetector(TestCase):
+    """Defines the unit tests for the PatternDetector class."""
+
+    def transaction(self, transaction_id, amount, description="Payment",
+                    day="2023-03-01", account_number="1001"):
+        """Builds a CAD transaction with the given fields."""
+        return {
+            "Transaction ID": transaction_id,
+            "Account number": account_number,
+            "Date": day,
+            "Transaction type": "deposit",
+            "Amount": amount,
+            "Currency": "CAD",
+            "Description": description
+        }
+
+    def test_near_duplicate_with_different_descriptions(self):
+        # Arrange
+        detector = PatternDetector(min_duplicates=3)
+
+        # Act
+        detector.check_transaction(self.transaction(1, 500, "Payment #1"))
+        detector.check_transaction(self.transaction(2, 500.40, "PAYMENT 2"))
+        detector.check_transaction(self.transaction(3, 500, "payment-3"))
+
+        # Assert
+        self.assertEqual(1, len(detector.findings))
+        self.assertEqual("near_duplicate", detector.findings[0]["Pattern"])
+        self.assertEqual(3, detector.findings[0]["Transaction ID"])
+
+    def test_split_group_just_over_threshold(self):
+        # Arrange
+        detector = PatternDetector(threshold=10000)
+
+        # Act
+        detector.check_transaction(self.transaction(1, 4000, "Rent"))
+        detector.check_transaction(self.transaction(2, 3500, "Car"))
+        detector.check_transaction(self.transaction(3, 2600, "Boat"))
+
+        # Assert
+        self.assertEqual("split", detector.findings[0]["Pattern"])
+        self.assertEqual([1, 2, 3], detector.findings[0]["Related transactions"])
+
+    def test_window_expires_old_transactions(self):
+        # Arrange
+        detector = PatternDetector(window_days=7, min_duplicates=2)
+
+        # Act
+        detector.check_transaction(self.transaction(1, 500, day="2023-03-01"))
+        detector.check_transaction(self.transaction(2, 500, day="2023-03-20"))
+
+        # Assert
+        self.assertEqual([], detector.findings)
+
+    def test_max_accounts_bounds_memory(self):
+        # Arrange
+        detector = PatternDetector(max_accounts=1, min_duplicates=2)
+
+        # Act
+        detector.check_transaction(self.transaction(1, 500, account_number="1001"))
+        detector.check_transaction(self.transaction(2, 500, account_number="1002"))
+        detector.check_transaction(self.transaction(3, 500, account_number="1001"))
+
+        # Assert
+        self.assertEqual([], detector.findings)
+
+if __name__ == "__main__":
+    unittest.main()
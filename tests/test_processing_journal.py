@@ -0,0 +1,179 @@
+"""
+Description: Unit tests for ProcessingJournal Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_processing_journal.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from processing_journal.processing_journal import ProcessingJournal
+from transaction_deduplicator.transaction_deduplicator import TransactionDeduplicator
+
+
+class TestProcessingJournal(TestCase):
+    """Defines the unit tests for the ProcessingJournal class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.transactions = [
+            {"Transaction ID": str(index), "Account number": 1000 + index % 5,
+             "Date": f"2023-03-{index % 28 + 1:02d}",
+             "Transaction type": ["deposit", "withdrawal", "transfer"][index % 3],
+             "Amount": 15000 if index % 9 == 0 else index,
+             "Currency": "CAD",
+             "Description": "Payment"}
+            for index in range(95)
+        ]
+
+    def tearDown(self):
+        """This function is invoked after executing a unit test
+        function."""
+        self.directory.cleanup()
+
+    def test_recover_after_crash_matches_uninterrupted_run(self):
+        # Arrange
+        expected = DataProcessor(list(self.transactions), detect_patterns=False).process_data()
+        journal = ProcessingJournal(self.directory.name, snapshot_interval=3, sync=False)
+        data_processor = DataProcessor([], detect_patterns=False)
+        journal.process(data_processor, self.transactions[:70], batch_rows=10)
+        with open(journal.journal_path, "ab") as journal_file:
+            journal_file.write(b"\x10\x00\x00")
+
+        # Act
+        recovered = DataProcessor([], detect_patterns=False)
+        actual = ProcessingJournal(self.directory.name, snapshot_interval=3).process(
+            recovered, self.transactions, batch_rows=10)
+
+        # Assert
+        self.assertTrue(os.path.isfile(journal.snapshot_path))
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["transaction_statistics"], actual["transaction_statistics"])
+        self.assertEqual(expected["suspicious_transactions"], actual["suspicious_transactions"])
+        self.assertEqual(len(self.transactions), recovered.version)
+        self.assertEqual(len(self.transactions), len(recovered.input_data))
+
+    def test_recover_replays_only_records_after_snapshot(self):
+        # Arrange
+        journal = ProcessingJournal(self.directory.name, snapshot_interval=2, sync=False)
+        journal.process(DataProcessor([], detect_patterns=False),
+                        self.transactions[:50], batch_rows=10)
+
+        # Act
+        position = ProcessingJournal(self.directory.name).recover(
+            DataProcessor([], detect_patterns=False))
+        journal.clear()
+        cleared_position = ProcessingJournal(self.directory.name).recover(
+            DataProcessor([], detect_patterns=False))
+
+        # Assert
+        self.assertEqual(50, position)
+        self.assertEqual(0, cleared_position)
+
+    def test_recover_registers_processed_ids_with_deduplicator(self):
+        # Arrange
+        replayed = self.transactions[:60] + self.transactions[:20]
+        expected_processor = DataProcessor([], detect_patterns=False,
+                                           deduplicator=TransactionDeduplicator())
+        expected = expected_processor.process_transactions(list(replayed))
+        journal = ProcessingJournal(self.directory.name, snapshot_interval=100, sync=False)
+        journal.process(DataProcessor([], detect_patterns=False,
+                                      deduplicator=TransactionDeduplicator()),
+                        replayed[:50], batch_rows=10)
+
+        # Act
+        recovered = DataProcessor([], detect_patterns=False,
+                                  deduplicator=TransactionDeduplicator())
+        actual = ProcessingJournal(self.directory.name).process(recovered, replayed,
+                                                                batch_rows=10)
+
+        # Assert
+        self.assertEqual(expected_processor.account_summaries, actual["account_summaries"])
+        self.assertEqual(60, recovered.version)
+        self.assertEqual(60, len(recovered.input_data))
+
+    def test_recover_refuses_journal_of_other_input_files(self):
+        # Arrange
+        input_path = os.path.join(self.directory.name, "input.csv")
+        with open(input_path, "w") as input_file:
+            input_file.write("Transaction ID\n1\n")
+        journal_directory = os.path.join(self.directory.name, "journal")
+        fingerprint = ProcessingJournal.input_fingerprint([input_path])
+        journal = ProcessingJournal(journal_directory, snapshot_interval=2, sync=False)
+        journal.process(DataProcessor([], detect_patterns=False), self.transactions[:30],
+                        batch_rows=10, input_fingerprint=fingerprint)
+        with open(input_path, "a") as input_file:
+            input_file.write("2\n")
+
+        # Act
+        position = ProcessingJournal(journal_directory).recover(
+            DataProcessor([], detect_patterns=False), fingerprint)
+
+        # Assert
+        self.assertEqual(30, position)
+        with self.assertRaises(ValueError):
+            ProcessingJournal(journal_directory).recover(
+                DataProcessor([], detect_patterns=False),
+                ProcessingJournal.input_fingerprint([input_path]))
+        with self.assertRaises(ValueError):
+            ProcessingJournal(journal_directory).recover(
+                DataProcessor([], detect_patterns=False),
+                ProcessingJournal.input_fingerprint([input_path], {"types": ["deposit"]}))
+
+    def test_snapshot_is_json_and_keeps_numeric_account_numbers(self):
+        # Arrange
+        journal = ProcessingJournal(self.directory.name, snapshot_interval=2, sync=False)
+        journal.process(DataProcessor([], detect_patterns=False), self.transactions[:25],
+                        batch_rows=10)
+
+        # Act
+        with open(journal.snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        recovered = DataProcessor([], detect_patterns=False)
+        ProcessingJournal(self.directory.name).recover(recovered)
+
+        # Assert
+        self.assertEqual(20, snapshot["position"])
+        self.assertIn(1000, recovered.account_summaries)
+        self.assertEqual(1000, recovered.account_summaries[1000]["account_number"])
+
+    def test_snapshot_leaves_out_results_restored_before_the_job(self):
+        # Arrange
+        earlier = DataProcessor(list(self.transactions[:40]), detect_patterns=False)
+        earlier.process_data()
+        expected = DataProcessor(list(self.transactions), detect_patterns=False).process_data()
+
+        def restored_processor() -> DataProcessor:
+            data_processor = DataProcessor([], detect_patterns=False)
+            data_processor.restore(earlier.account_summaries, earlier.transaction_statistics,
+                                   earlier.suspicious_transactions, (), earlier.version)
+            return data_processor
+
+        journal = ProcessingJournal(self.directory.name, snapshot_interval=2, sync=False)
+        journal.process(restored_processor(), self.transactions[40:75], batch_rows=10)
+
+        # Act
+        recovered = restored_processor()
+        actual = ProcessingJournal(self.directory.name, snapshot_interval=2).process(
+            recovered, self.transactions[40:], batch_rows=10)
+
+        # Assert
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["suspicious_transactions"], actual["suspicious_transactions"])
+        self.assertEqual(len(self.transactions), recovered.version)
+
+    def test_process_rejects_processor_holding_transactions(self):
+        # Arrange
+        journal = ProcessingJournal(self.directory.name, sync=False)
+
+        # Act and Assert
+        with self.assertRaises(ValueError):
+            journal.process(DataProcessor(list(self.transactions)), self.transactions)
+
+if __name__ == "__main__":
+    unittest.main()
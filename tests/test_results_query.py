@@ -0,0 +1,69 @@
+"""
+Description: Unit tests for ResultsQuery Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_results_query.py
+"""
+
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+
+
+class TestResultsQuery(TestCase):
+    """Defines the unit tests for the ResultsQuery class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.processor = DataProcessor([
+            {"Transaction ID": 1, "Account number": 1001, "Date": "2023-03-03",
+             "Transaction type": "deposit", "Amount": 12000, "Currency": "CAD",
+             "Description": "Car Sale"},
+            {"Transaction ID": 2, "Account number": 1002, "Date": "2023-03-01",
+             "Transaction type": "deposit", "Amount": 500, "Currency": "XRP",
+             "Description": "Crypto"},
+            {"Transaction ID": 3, "Account number": 1003, "Date": "2023-03-02",
+             "Transaction type": "withdrawal", "Amount": 100, "Currency": "CAD",
+             "Description": "Bills"}
+        ], detect_patterns=False)
+        self.processor.process_data()
+
+    def test_accounts_with_balance(self):
+        # Act
+        query = self.processor.query()
+
+        # Assert
+        self.assertEqual([1003], [summary["account_number"]
+                                  for summary in query.accounts_with_balance_below(0)])
+        self.assertEqual([1002, 1001], [summary["account_number"]
+                                        for summary in query.accounts_with_balance_between(0, 20000)])
+
+    def test_suspicious_indexes(self):
+        # Act
+        query = self.processor.query()
+
+        # Assert
+        self.assertEqual([1], [row["Transaction ID"] for row in query.suspicious_for_account(1001)])
+        self.assertEqual([2], [row["Transaction ID"] for row in query.suspicious_for_currency("XRP")])
+        self.assertEqual([2, 1], [row["Transaction ID"]
+                                  for row in query.suspicious_between("2023-03-01", "2023-03-31")])
+
+    def test_indexes_invalidated_by_new_transactions(self):
+        # Arrange
+        query = self.processor.query()
+        self.assertEqual({"deposit": 6250, "withdrawal": 100}, query.average_amounts())
+
+        # Act
+        self.processor.process_transactions([
+            {"Transaction ID": 4, "Account number": 1003, "Date": "2023-03-04",
+             "Transaction type": "deposit", "Amount": 500, "Currency": "LTC",
+             "Description": "Crypto"}
+        ])
+
+        # Assert
+        self.assertAlmostEqual(13000 / 3, query.average_amounts()["deposit"])
+        self.assertEqual(2, len(query.suspicious_for_currency("LTC") + query.suspicious_for_currency("XRP")))
+        self.assertEqual([], query.accounts_with_balance_below(0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Description: Unit tests for TailDaemon Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_tail_daemon.py
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from tail_daemon.tail_daemon import TailDaemon
+
+
+class TestTailDaemon(TestCase):
+    """Defines the unit tests for the TailDaemon class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+
+        Creates a csv input file with a header and two rows in a
+        temporary directory.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.directory.name, "input.csv")
+        self.delta_log = os.path.join(self.directory.name, "delta.jsonl")
+        with open(self.input_file, "w") as input_file:
+            input_file.write("Transaction ID,Account number,Date,"
+                             "Transaction type,Amount,Currency,Description\n"
+                             "1,1001,2023-03-01,deposit,1000,CAD,Salary\n"
+                             "2,1002,2023-03-01,deposit,1500,CAD,Salary\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_poll_once_reads_only_appended_rows(self):
+        # Arrange
+        daemon = TailDaemon([self.input_file], self.delta_log)
+        daemon.poll_once()
+        with open(self.input_file, "a") as input_file:
+            input_file.write("3,1001,2023-03-02,withdrawal,12000,CAD,Car\n")
+
+        # Act
+        delta = daemon.poll_once()
+
+        # Assert
+        self.assertEqual(["1001"], list(delta["account_summaries"]))
+        self.assertEqual(-11000, delta["account_summaries"]["1001"]["balance"])
+        self.assertEqual("3", delta["suspicious_transactions"][0]["Transaction ID"])
+        self.assertEqual(3, daemon.data_processor.version)
+        self.assertEqual([], daemon.data_processor.input_data)
+
+    def test_poll_once_waits_for_complete_row(self):
+        # Arrange
+        daemon = TailDaemon([self.input_file], self.delta_log)
+        daemon.poll_once()
+        with open(self.input_file, "a") as input_file:
+            input_file.write("3,1001,2023-03-02,withdrawal,")
+
+        # Act
+        delta = daemon.poll_once()
+        with open(self.input_file, "a") as input_file:
+            input_file.write("200,CAD,Groceries\n")
+        completed_delta = daemon.poll_once()
+
+        # Assert
+        self.assertIsNone(delta)
+        self.assertEqual(800, completed_delta["account_summaries"]["1001"]["balance"])
+
+    def test_delta_log_has_one_line_per_poll(self):
+        # Arrange
+        daemon = TailDaemon([self.input_file], self.delta_log)
+
+        # Act
+        daemon.poll_once()
+        daemon.poll_once()
+
+        # Assert
+        with open(self.delta_log) as delta_log:
+            lines = delta_log.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertEqual(2, len(json.loads(lines[0])["account_summaries"]))
+
+    def test_poll_appends_new_ids_and_run_saves_dedup_state(self):
+        # Arrange
+        state_path = os.path.join(self.directory.name, "seen.bin")
+        daemon = TailDaemon([self.input_file], self.delta_log,
+                            dedup_state_path=state_path)
+
+        # Act
+        daemon.poll_once()
+        logged_only = (os.path.isfile(f"{state_path}.log")
+                       and not os.path.isfile(state_path))
+        daemon.run(max_polls=1)
+        restarted = TailDaemon([self.input_file], self.delta_log,
+                               dedup_state_path=state_path)
+        replayed = restarted.poll_once()
+        restarted.save_dedup_state()
+
+        # Assert
+        self.assertTrue(logged_only)
+        self.assertTrue(os.path.isfile(state_path))
+        self.assertEqual({}, replayed["account_summaries"])
+
+    def test_restarted_daemon_restores_results_of_skipped_rows(self):
+        # Arrange
+        state_path = os.path.join(self.directory.name, "seen.bin")
+        daemon = TailDaemon([self.input_file], self.delta_log,
+                            dedup_state_path=state_path)
+        daemon.poll_once()
+
+        # Act
+        from_log = TailDaemon([self.input_file], self.delta_log,
+                              dedup_state_path=state_path)
+        from_log.poll_once()
+        with open(self.input_file, "a") as input_file:
+            input_file.write("3,1001,2023-03-02,deposit,5,CAD,Interest\n")
+        delta = from_log.poll_once()
+        from_log.save_dedup_state()
+        from_state = TailDaemon([self.input_file], self.delta_log,
+                                dedup_state_path=state_path)
+        from_state.poll_once()
+
+        # Assert
+        self.assertEqual(1005, delta["account_summaries"]["1001"]["balance"])
+        self.assertEqual(1005, from_state.data_processor.account_summaries["1001"]["balance"])
+        self.assertEqual(1500, from_state.data_processor.account_summaries["1002"]["balance"])
+        self.assertEqual(
+            {"total_amount": 2505, "transaction_count": 3},
+            from_state.data_processor.transaction_statistics["deposit"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Description: Unit tests for TransactionArchive Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_transaction_archive.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from input_handler.input_handler import InputHandler
+from transaction_archive.transaction_archive import TransactionArchive
+
+
+class TestTransactionArchive(TestCase):
+    """Defines the unit tests for the TransactionArchive class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.directory.name, "history.txa")
+        self.transactions = [
+            {"Transaction ID": str(index + 1), "Account number": 1001 + index % 3,
+             "Date": f"2023-{index // 28 + 1:02d}-{index % 28 + 1:02d}",
+             "Transaction type": ["deposit", "withdrawal", "transfer"][index % 3],
+             "Amount": [1200, 45.5, 12000.25][index % 3],
+             "Currency": "XRP" if index % 10 == 0 else "CAD",
+             "Description": "Salary"}
+            for index in range(100)
+        ]
+        self.transactions[2]["Counterparty account"] = 1001
+
+    def tearDown(self):
+        """This function is invoked after executing a unit test
+        function."""
+        self.directory.cleanup()
+
+    def test_write_and_read_round_trip(self):
+        # Arrange
+        archive = TransactionArchive(self.archive_path)
+
+        # Act
+        summary = archive.write(self.transactions, block_rows=30)
+        actual = archive.read_transactions()
+
+        # Assert
+        self.assertEqual({"rows": 100, "blocks": 4}, {key: summary[key] for key in ("rows", "blocks")})
+        self.assertEqual(self.transactions, actual)
+        self.assertEqual("2023-01-01", archive.blocks()[0]["min_date"])
+
+    def test_read_columns_skips_blocks_outside_filters(self):
+        # Arrange
+        archive = TransactionArchive(self.archive_path)
+        archive.write(self.transactions, block_rows=28)
+
+        # Act
+        blocks = list(archive.read_columns(start_date="2023-02-05", end_date="2023-02-06"))
+        accounts = archive.read_transactions(account_numbers=[1002])
+
+        # Assert
+        self.assertEqual(1, len(blocks))
+        self.assertEqual(["33", "34"], blocks[0]["Transaction ID"])
+        self.assertEqual(33, len(accounts))
+        self.assertTrue(all(row["Account number"] == 1002 for row in accounts))
+
+    def test_input_handler_reads_archive(self):
+        # Arrange
+        TransactionArchive(self.archive_path).write(self.transactions)
+        input_handler = InputHandler(self.archive_path)
+
+        # Act
+        actual = input_handler.read_input_data()
+        filtered = input_handler.read_filtered_data(currencies=["XRP"])
+
+        # Assert
+        self.assertEqual(100, len(actual))
+        self.assertEqual(10, len(filtered))
+
+    def test_dictionaries_are_stored_in_blocks(self):
+        # Arrange
+        archive = TransactionArchive(self.archive_path)
+        archive.write(self.transactions, block_rows=30)
+
+        # Act
+        encodings = [block["columns"]["Description"] for block in archive.blocks()]
+        with open(self.archive_path, "rb") as archive_file:
+            contents = archive_file.read()
+
+        # Assert
+        self.assertTrue(all(encoding == {"kind": "dictionary", "size": encoding["size"]}
+                            for encoding in encodings))
+        self.assertNotIn(b"Salary", contents)
+        self.assertEqual(self.transactions, archive.read_transactions())
+
+    def test_encoded_archive_replays_through_process_columns(self):
+        # Arrange
+        TransactionArchive(self.archive_path).write(self.transactions, block_rows=30)
+        expected = DataProcessor([dict(row) for row in self.transactions]).process_data()
+
+        # Act
+        encoded = InputHandler(self.archive_path).read_encoded_data()
+        actual = DataProcessor([]).process_columns(encoded["columns"], encoded["symbols"])
+
+        # Assert
+        self.assertEqual(expected["account_summaries"], actual["account_summaries"])
+        self.assertEqual(expected["suspicious_transactions"], actual["suspicious_transactions"])
+        self.assertEqual(["deposit", "withdrawal", "transfer"],
+                         encoded["symbols"]["Transaction type"])
+        self.assertEqual([0, 1, 2, 0], list(encoded["columns"]["Transaction type"][:4]))
+        self.assertEqual(self.transactions[2]["Amount"], encoded["columns"]["Amount"][2])
+
+    def test_read_rejects_other_files(self):
+        # Arrange
+        with open(self.archive_path, "w") as archive_file:
+            archive_file.write("Transaction ID,Account number\n")
+
+        # Act and Assert
+        with self.assertRaises(ValueError):
+            TransactionArchive(self.archive_path).blocks()
+
+if __name__ == "__main__":
+    unittest.main()
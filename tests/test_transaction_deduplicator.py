@@ -0,0 +1,163 @@
+"""
+Description: Unit tests for TransactionDeduplicator Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_transaction_deduplicator.py
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from transaction_deduplicator.transaction_deduplicator import (RoaringBitmap,
+                                                               TransactionDeduplicator)
+
+
+class TestTransactionDeduplicator(TestCase):
+    """Defines the unit tests for the TransactionDeduplicator class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function."""
+        self.transactions = [
+            {
+                "Transaction ID": "1",
+                "Account number": "1001",
+                "Date": "2023-03-01",
+                "Transaction type": "deposit",
+                "Amount": 1000,
+                "Currency": "CAD",
+                "Description": "Salary"
+            },
+            {
+                "Transaction ID": "1",
+                "Account number": "1001",
+                "Date": "2023-03-01",
+                "Transaction type": "deposit",
+                "Amount": 1000,
+                "Currency": "CAD",
+                "Description": "Salary"
+            }
+        ]
+
+    def test_roaring_bitmap_converts_to_bitmap_container(self):
+        # Arrange
+        bitmap = RoaringBitmap()
+
+        # Act
+        for value in range(0, 20000, 2):
+            bitmap.add(value)
+        restored = RoaringBitmap.from_bytes(bitmap.to_bytes())
+
+        # Assert
+        self.assertEqual(10000, len(restored))
+        self.assertIn(19998, restored)
+        self.assertNotIn(19999, restored)
+        self.assertFalse(restored.add(4))
+
+    def test_is_duplicate_dense_and_sparse_ids(self):
+        # Arrange
+        deduplicator = TransactionDeduplicator(expected_sparse_ids=100)
+
+        # Act and Assert
+        self.assertFalse(deduplicator.is_duplicate(7))
+        self.assertTrue(deduplicator.is_duplicate("7"))
+        self.assertFalse(deduplicator.is_duplicate("TX-7"))
+        self.assertTrue(deduplicator.is_duplicate("TX-7"))
+        self.assertFalse(deduplicator.is_duplicate("TX-8"))
+
+    def test_save_and_load(self):
+        # Arrange
+        deduplicator = TransactionDeduplicator(expected_sparse_ids=100)
+        deduplicator.is_duplicate(70000)
+        deduplicator.is_duplicate("TX-7")
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "seen.bin")
+
+            # Act
+            deduplicator.save(file_path)
+            restored = TransactionDeduplicator.load(file_path)
+
+            # Assert
+            self.assertEqual(2, len(restored))
+            self.assertTrue(restored.is_duplicate("70000"))
+            self.assertTrue(restored.is_duplicate("TX-7"))
+            self.assertFalse(restored.is_duplicate("TX-8"))
+            restored.close()
+
+    def test_saved_sparse_ids_are_merged_and_logged_ids_reloaded(self):
+        # Arrange
+        deduplicator = TransactionDeduplicator(expected_sparse_ids=1000)
+        for index in range(300):
+            deduplicator.is_duplicate(f"TX-{index}")
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "seen.bin")
+            deduplicator.save(file_path)
+            for index in range(300, 400):
+                deduplicator.is_duplicate(f"TX-{index}")
+            deduplicator.is_duplicate(5)
+
+            # Act
+            appended = deduplicator.append_unsaved(file_path)
+            logged = TransactionDeduplicator.load(file_path)
+            deduplicator.save(file_path)
+            deduplicator.close()
+            saved = TransactionDeduplicator.load(file_path)
+
+            # Assert
+            self.assertEqual(101, appended)
+            self.assertFalse(os.path.isfile(f"{file_path}.log"))
+            for restored in (logged, saved):
+                self.assertEqual(401, len(restored))
+                self.assertTrue(restored.is_duplicate("TX-0"))
+                self.assertTrue(restored.is_duplicate("TX-250"))
+                self.assertTrue(restored.is_duplicate("TX-399"))
+                self.assertTrue(restored.is_duplicate(5))
+                self.assertFalse(restored.is_duplicate("TX-400"))
+                restored.close()
+
+    def test_results_are_saved_and_logged_with_ids(self):
+        # Arrange
+        deduplicator = TransactionDeduplicator()
+        processor = DataProcessor([dict(self.transactions[0])], deduplicator=deduplicator)
+        processor.process_data()
+        later = dict(self.transactions[0], **{"Transaction ID": "TX-2", "Amount": 5})
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "seen.bin")
+            deduplicator.save(file_path, processor)
+            changes = processor.process_transactions([later])
+            deduplicator.append_unsaved(file_path, changes)
+            with open(f"{file_path}.log", "ab") as log_file:
+                log_file.write(b"\x10\x00")
+
+            # Act
+            loaded = TransactionDeduplicator.load(file_path)
+            restored = DataProcessor([], deduplicator=loaded)
+            loaded.restore_results(restored)
+            loaded.restore_results(restored)
+            loaded.close()
+            deduplicator.close()
+
+        # Assert
+        self.assertEqual(processor.account_summaries, restored.account_summaries)
+        self.assertEqual(processor.transaction_statistics, restored.transaction_statistics)
+        self.assertEqual(processor.version, restored.version)
+        self.assertTrue(loaded.is_duplicate("TX-2"))
+
+    def test_process_data_skips_replayed_transaction(self):
+        # Arrange
+        processor = DataProcessor(self.transactions,
+                                  deduplicator=TransactionDeduplicator())
+
+        # Act
+        processed_data = processor.process_data()
+
+        # Assert
+        self.assertEqual(1000, processed_data["account_summaries"]["1001"]["balance"])
+        self.assertEqual(1, processed_data["transaction_statistics"]["deposit"]["transaction_count"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Description: Unit tests for TransferGraph Class.
+Usage: to execute tests:
+    py -m unittest -v tests/test_transfer_graph.py
+"""
+
+import unittest
+from unittest import TestCase
+from data_processor.data_processor import DataProcessor
+from transfer_graph.transfer_graph import TransferGraph
+
+
+class TestTransferGraph(TestCase):
+    """Defines the unit tests for the TransferGraph class."""
+
+    def setUp(self):
+        """This function is invoked before executing a unit test
+        function.
+
+        Builds a graph with the cycle 1001 -> 1002 -> 1003 -> 1001 and a
+        hub 2000 that sends to three accounts.
+        """
+        self.graph = TransferGraph()
+        self.graph.add_transfer("1001", "1002", "2023-03-01")
+        self.graph.add_transfer("1002", "1003", "2023-03-02")
+        self.graph.add_transfer("1003", "1001", "2023-03-03")
+        self.graph.add_transfer("2000", "1001", "2023-03-01")
+        self.graph.add_transfer("2000", "1004", "2023-03-01")
+        self.graph.add_transfer("2000", "1005", "2023-03-01")
+
+    def test_strongly_connected_components(self):
+        # Act
+        components = self.graph.strongly_connected_components()
+
+        # Assert
+        self.assertEqual(1, len(components))
+        self.assertEqual({"1001", "1002", "1003"}, set(components[0]))
+
+    def test_high_degree_accounts(self):
+        # Act
+        hubs = self.graph.high_degree_accounts(min_degree=3)
+
+        # Assert
+        self.assertEqual([{"account_number": "2000",
+                           "in_degree": 0,
+                           "out_degree": 3}], hubs)
+
+    def test_short_cycles_within_window(self):
+        # Act
+        cycles = self.graph.short_cycles(max_length=3, window_days=7)
+        late_cycles = self.graph.short_cycles(max_length=3, window_days=1)
+
+        # Assert
+        self.assertEqual([{"accounts": ["1001", "1002", "1003", "1001"],
+                           "start_date": "2023-03-01",
+                           "end_date": "2023-03-03"}], cycles)
+        self.assertEqual([], late_cycles)
+
+    def test_data_processor_adds_transfers_with_counterparty(self):
+        # Arrange
+        transactions = [
+            {
+                "Transaction ID": "1",
+                "Account number": "1001",
+                "Date": "2023-03-01",
+                "Transaction type": "transfer",
+                "Amount": 500,
+                "Currency": "CAD",
+                "Description": "Transfer",
+                "Counterparty account": "1002"
+            },
+            {
+                "Transaction ID": "2",
+                "Account number": "1002",
+                "Date": "2023-03-01",
+                "Transaction type": "transfer",
+                "Amount": 500,
+                "Currency": "CAD",
+                "Description": "Transfer to Savings"
+            }
+        ]
+        processor = DataProcessor(transactions)
+
+        # Act
+        processor.process_data()
+
+        # Assert
+        self.assertEqual(1, processor.transfer_graph.edge_count)
+
+if __name__ == "__main__":
+    unittest.main()
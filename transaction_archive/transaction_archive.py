@@ -0,0 +1,380 @@
+"""
+Description: A class created to archive validated transactions in a
+compressed columnar file, so history can be replayed through a
+DataProcessor without parsing the original csv files again.
+Usage: To incorporate this class into a class or program,
+import this using:
+from transaction_archive.transaction_archive import TransactionArchive
+Files ending in .txa can also be given to InputHandler.
+"""
+
+import json
+import os
+import struct
+import zlib
+from array import array
+from datetime import date
+from itertools import accumulate
+from account_number.account_number import account_number_key
+
+class TransactionArchive:
+    """
+    A class that writes and reads a transaction archive.
+
+    The archive is a series of blocks of up to block_rows transactions.
+    Every field of a block is stored as its own zlib-compressed column:
+    dates and numeric IDs as the difference from the previous row,
+    amounts as integers when they are whole numbers or whole cents, and
+    text such as types, currencies and descriptions as a dictionary of
+    the distinct values with a small integer code per row. A dictionary
+    is stored inside its block's compressed column, so it is only read
+    with that block. A JSON footer lists every block with its offset,
+    its column sizes and its smallest and largest Date and Account
+    number, so a reader only decompresses the blocks a filter can match.
+
+    Attributes:
+        __file_path (str): the archive file
+
+    Methods (instance methods):
+        write (dict): writes transactions to the archive.
+        blocks (list): gets the footer entry of every block.
+        fields (list): gets the fields of the archived transactions.
+        read_columns (generator): yields the matching rows of each block
+                                    as columns, for DataProcessor.process_columns.
+        read_encoded_columns (generator): yields every block as columns with
+                                    its dictionary columns still as codes.
+        read_transactions (list): gets the matching rows as transactions.
+    """
+
+    MAGIC = b"TXARCH02"
+    """
+    The first and last bytes of every archive.
+    """
+
+    OLD_MAGIC = b"TXARCH01"
+    """
+    The magic of archives that kept their dictionaries in the footer,
+    which can still be read.
+    """
+
+    DICTIONARY_HEADER = struct.Struct("<I")
+    """
+    Length of the JSON dictionary at the start of a dictionary column.
+    """
+
+    FIELDS = ["Transaction ID", "Account number", "Date", "Transaction type",
+              "Amount", "Currency", "Description"]
+    """
+    Fields every archived transaction has. Other fields, such as
+    "Counterparty account", are archived when any transaction has them.
+    """
+
+    DICTIONARY_FIELDS = ["Transaction type", "Currency", "Description",
+                         "Counterparty account"]
+    """
+    Fields with few distinct values, stored as dictionary codes.
+    """
+
+    DELTA_LIMIT = 2 ** 62
+    """
+    Largest numeric ID stored as a delta, so differences fit in 64 bits.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initialize a new TransactionArchive.
+
+        Args:
+            file_path(str): the archive file.
+
+        Returns:
+            None
+        """
+        self.__file_path = file_path
+
+    @property
+    def file_path(self) -> str:
+        """
+        Accessor for the archive file.
+        """
+        return self.__file_path
+
+    def write(self, transactions: list, block_rows: int = 65_536) -> dict:
+        """
+        Writes transactions to the archive, replacing it. The archive is
+        written to a temporary file first, so readers never see part of it.
+
+        Args:
+            transactions(list): validated transactions, for example from
+            InputHandler.read_input_data.
+            block_rows(int): the most transactions in one block.
+
+        Returns:
+            rows, blocks and bytes of the archive
+
+        Raises:
+            ValueError: a transaction is missing one of FIELDS
+        """
+        fields = list(self.FIELDS)
+        for transaction in transactions:
+            missing = [field for field in self.FIELDS if field not in transaction]
+            if missing:
+                raise ValueError(f"Transaction is missing fields: {missing}")
+            fields.extend(field for field in transaction if field not in fields)
+
+        temporary_path = self.__file_path + ".tmp"
+        blocks = []
+        with open(temporary_path, "wb") as archive_file:
+            archive_file.write(self.MAGIC)
+            for start in range(0, len(transactions), block_rows):
+                block = transactions[start:start + block_rows]
+                entry = {"offset": archive_file.tell(), "rows": len(block), "columns": {}}
+
+                for field in fields:
+                    values = [transaction.get(field) for transaction in block]
+                    encoding, payload = self.__encode(field, values)
+                    encoding["size"] = archive_file.write(zlib.compress(payload))
+                    entry["columns"][field] = encoding
+
+                dates = [transaction["Date"] for transaction in block]
+                accounts = [account_number_key(transaction["Account number"])
+                            for transaction in block]
+                entry.update(min_date=min(dates), max_date=max(dates),
+                             min_account=min(accounts), max_account=max(accounts))
+                blocks.append(entry)
+
+            footer = json.dumps({"fields": fields, "blocks": blocks}).encode()
+            archive_file.write(footer)
+            archive_file.write(struct.pack("<Q", len(footer)) + self.MAGIC)
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+            size = archive_file.tell()
+        os.replace(temporary_path, self.__file_path)
+
+        return {"rows": len(transactions), "blocks": len(blocks), "bytes": size}
+
+    def blocks(self) -> list:
+        """
+        Gets the footer entry of every block, with its rows, its offset and
+        the smallest and largest Date and Account number.
+
+        Returns:
+            list
+
+        Raises:
+            ValueError: the file is not a transaction archive
+        """
+        return self.__footer()["blocks"]
+
+    def fields(self) -> list:
+        """
+        Gets the fields of the archived transactions, in column order.
+
+        Returns:
+            list
+
+        Raises:
+            ValueError: the file is not a transaction archive
+        """
+        return self.__footer()["fields"]
+
+    def read_columns(self, start_date: str = None, end_date: str = None,
+                     account_numbers = None):
+        """
+        Reads the archive block by block, skipping blocks whose Date or
+        Account number range cannot match the filters without
+        decompressing them.
+
+        Args:
+            start_date(str): the first Date to keep, in YYYY-MM-DD format.
+            end_date(str): the last Date to keep, in YYYY-MM-DD format.
+            account_numbers: the account numbers to keep.
+
+        Returns:
+            a generator of dicts with a list of values per field
+
+        Raises:
+            ValueError: the file is not a transaction archive
+        """
+        footer = self.__footer()
+        accounts = None
+        account_keys = []
+        if account_numbers is not None:
+            accounts = {str(account_number) for account_number in account_numbers}
+            account_keys = sorted(account_number_key(account) for account in accounts)
+
+        with open(self.__file_path, "rb") as archive_file:
+            for block in footer["blocks"]:
+                if (start_date is not None and block["max_date"] < start_date) \
+                    or (end_date is not None and block["min_date"] > end_date) \
+                    or (accounts is not None and not any(
+                        tuple(block["min_account"]) <= key <= tuple(block["max_account"])
+                        for key in account_keys)):
+                    continue
+
+                archive_file.seek(block["offset"])
+                columns = {}
+                for field in footer["fields"]:
+                    encoding = block["columns"][field]
+                    payload = zlib.decompress(archive_file.read(encoding["size"]))
+                    columns[field] = self.__decode(encoding, payload)
+
+                if start_date is not None or end_date is not None or accounts is not None:
+                    keep = [index for index, (transaction_date, account_number) in enumerate(
+                                zip(columns["Date"], columns["Account number"]))
+                            if (start_date is None or transaction_date >= start_date)
+                            and (end_date is None or transaction_date <= end_date)
+                            and (accounts is None or str(account_number) in accounts)]
+                    if len(keep) < block["rows"]:
+                        columns = {field: [values[index] for index in keep]
+                                   for field, values in columns.items()}
+
+                yield columns
+
+    def read_encoded_columns(self):
+        """
+        Reads every block like read_columns, but leaves the dictionary
+        columns as the codes of each row, in an array("I"), with the
+        block's dictionary of values, so InputHandler.read_encoded_data
+        only has to renumber the dictionary instead of every row.
+
+        Returns:
+            a generator of dicts with columns (the codes or the list of
+            values of every field) and dictionaries (the values of every
+            dictionary column)
+
+        Raises:
+            ValueError: the file is not a transaction archive
+        """
+        footer = self.__footer()
+
+        with open(self.__file_path, "rb") as archive_file:
+            for block in footer["blocks"]:
+                archive_file.seek(block["offset"])
+                columns = {}
+                dictionaries = {}
+                for field in footer["fields"]:
+                    encoding = block["columns"][field]
+                    payload = zlib.decompress(archive_file.read(encoding["size"]))
+                    if encoding["kind"] == "dictionary":
+                        dictionaries[field], columns[field] = \
+                            self.__dictionary_codes(encoding, payload)
+                    else:
+                        columns[field] = self.__decode(encoding, payload)
+
+                yield {"columns": columns, "dictionaries": dictionaries}
+
+    def read_transactions(self, start_date: str = None, end_date: str = None,
+                          account_numbers = None) -> list:
+        """
+        Reads the matching rows like read_columns, as transactions.
+
+        Returns:
+            list
+        """
+        transactions = []
+        for columns in self.read_columns(start_date, end_date, account_numbers):
+            fields = list(columns)
+            transactions.extend(
+                {field: value for field, value in zip(fields, row)
+                 if value is not None or field in self.FIELDS}
+                for row in zip(*columns.values()))
+        return transactions
+
+    def __footer(self) -> dict:
+        """
+        Reads the footer from the end of the archive.
+        """
+        with open(self.__file_path, "rb") as archive_file:
+            if archive_file.read(len(self.MAGIC)) not in (self.MAGIC, self.OLD_MAGIC):
+                raise ValueError(f"File: {self.__file_path} is not a transaction archive.")
+            archive_file.seek(-8 - len(self.MAGIC), os.SEEK_END)
+            footer_size = struct.unpack("<Q", archive_file.read(8))[0]
+            archive_file.seek(-8 - len(self.MAGIC) - footer_size, os.SEEK_END)
+            return json.loads(archive_file.read(footer_size))
+
+    def __encode(self, field: str, values: list) -> tuple:
+        """
+        Picks the smallest encoding that gives the values back exactly.
+        """
+        if field == "Date":
+            try:
+                ordinals = [date.fromisoformat(value).toordinal() for value in values]
+                if all(date.fromordinal(ordinal).isoformat() == value
+                       for ordinal, value in zip(ordinals, values)):
+                    return {"kind": "date"}, self.__deltas(ordinals)
+            except (TypeError, ValueError):
+                pass
+
+        if field == "Amount":
+            if all(type(value) is int for value in values):
+                return {"kind": "integer", "scale": 1}, array("q", values).tobytes()
+            if all(type(value) in (int, float) for value in values):
+                cents = [round(value * 100) for value in values]
+                if all(cent / 100 == value for cent, value in zip(cents, values)):
+                    return {"kind": "integer", "scale": 100}, array("q", cents).tobytes()
+                return {"kind": "float"}, array("d", values).tobytes()
+
+        if field in self.DICTIONARY_FIELDS:
+            codes = {}
+            for value in values:
+                codes.setdefault(value, len(codes))
+            dictionary = json.dumps(list(codes)).encode()
+            return ({"kind": "dictionary"},
+                    self.DICTIONARY_HEADER.pack(len(dictionary)) + dictionary
+                    + array("I", [codes[value] for value in values]).tobytes())
+
+        if all(type(value) is int and abs(value) < self.DELTA_LIMIT for value in values):
+            return {"kind": "delta", "text": False}, self.__deltas(values)
+        if all(type(value) is str and value.isascii() and value.isdecimal()
+               and (value == "0" or not value.startswith("0"))
+               and len(value) < 18 for value in values):
+            return {"kind": "delta", "text": True}, self.__deltas([int(value) for value in values])
+
+        return {"kind": "json"}, json.dumps(values).encode()
+
+    def __decode(self, encoding: dict, payload: bytes) -> list:
+        """
+        Gives back the values of a column encoded by __encode.
+        """
+        kind = encoding["kind"]
+        if kind == "json":
+            return json.loads(payload)
+        if kind == "dictionary":
+            dictionary, codes = self.__dictionary_codes(encoding, payload)
+            return [dictionary[code] for code in codes]
+
+        numbers = array("d" if kind == "float" else "q")
+        numbers.frombytes(payload)
+
+        if kind == "date":
+            return [date.fromordinal(ordinal).isoformat() for ordinal in accumulate(numbers)]
+        if kind == "delta":
+            return [str(value) for value in accumulate(numbers)] if encoding["text"] \
+                else list(accumulate(numbers))
+        if kind == "integer":
+            return numbers.tolist() if encoding["scale"] == 1 \
+                else [value / encoding["scale"] for value in numbers]
+        return numbers.tolist()
+
+    def __dictionary_codes(self, encoding: dict, payload: bytes) -> tuple:
+        """
+        Gives back the dictionary and the codes of a dictionary column.
+        Archives written before the dictionaries moved into the blocks
+        keep them in the footer.
+        """
+        dictionary = encoding.get("values")
+        if dictionary is None:
+            dictionary_size = self.DICTIONARY_HEADER.unpack_from(payload)[0]
+            start = self.DICTIONARY_HEADER.size
+            dictionary = json.loads(payload[start:start + dictionary_size])
+            payload = payload[start + dictionary_size:]
+
+        codes = array("I")
+        codes.frombytes(payload)
+        return dictionary, codes
+
+    @staticmethod
+    def __deltas(values: list) -> bytes:
+        return array("q", [value - previous for previous, value
+                           in zip([0] + values, values)]).tobytes()
@@ -0,0 +1,668 @@
+"""
+Description: Classes created to remember which Transaction IDs have
+already been processed, so re-sent files are not counted twice.
+Usage: To incorporate this class into a class or program,
+import this using:
+from transaction_deduplicator.transaction_deduplicator import TransactionDeduplicator
+"""
+
+import heapq
+import json
+import math
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from hashlib import blake2b
+
+class RoaringBitmap:
+    """
+    A compressed set of non-negative integers in the style of a
+    roaring bitmap. Integers are grouped by their high bits into
+    containers of 65536 values. A container is a sorted array while it
+    holds few values and becomes an 8 KB bitmap once that is smaller.
+
+    Methods (instance methods):
+        add (bool): adds a value and returns True if it was new.
+        to_bytes (bytes): serializes the bitmap.
+        from_bytes (RoaringBitmap): class method to read it back.
+    """
+
+    ARRAY_CONTAINER_LIMIT = 4096
+    """
+    Largest number of values kept in a sorted array container, where the
+    array and the bitmap both take 8 KB.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty RoaringBitmap.
+        """
+        self.__containers = {}
+        self.__length = 0
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __contains__(self, value: int) -> bool:
+        container = self.__containers.get(value >> 16)
+        if container is None:
+            return False
+
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def add(self, value: int) -> bool:
+        """
+        Adds a value to the bitmap.
+
+        Args:
+            value(int): a non-negative integer.
+
+        Returns:
+            True if the value was not in the bitmap yet
+        """
+        high, low = value >> 16, value & 0xFFFF
+        container = self.__containers.get(high)
+        if container is None:
+            container = self.__containers[high] = array("H")
+
+        if isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return False
+            container.insert(index, low)
+            if len(container) > self.ARRAY_CONTAINER_LIMIT:
+                self.__containers[high] = self.__to_bitmap(container)
+
+        self.__length += 1
+        return True
+
+    def to_bytes(self) -> bytes:
+        """
+        Serializes the bitmap as a count of containers followed by each
+        container's key, kind, value count and payload.
+
+        Returns:
+            bytes
+        """
+        parts = [struct.pack("<Q", len(self.__containers))]
+        for high, container in self.__containers.items():
+            if isinstance(container, bytearray):
+                count = int.from_bytes(container, "little").bit_count()
+                parts.append(struct.pack("<QBI", high, 1, count))
+                parts.append(bytes(container))
+            else:
+                parts.append(struct.pack("<QBI", high, 0, len(container)))
+                parts.append(container.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RoaringBitmap":
+        """
+        Reads a bitmap written by to_bytes.
+
+        Args:
+            data(bytes): the serialized bitmap.
+
+        Returns:
+            RoaringBitmap
+        """
+        bitmap = cls()
+        (container_count,) = struct.unpack_from("<Q", data, 0)
+        offset = 8
+        for _ in range(container_count):
+            high, kind, count = struct.unpack_from("<QBI", data, offset)
+            offset += struct.calcsize("<QBI")
+            if kind == 1:
+                container = bytearray(data[offset:offset + 8192])
+                offset += 8192
+            else:
+                container = array("H")
+                container.frombytes(data[offset:offset + 2 * count])
+                offset += 2 * count
+            bitmap.__containers[high] = container
+            bitmap.__length += count
+        return bitmap
+
+    def __to_bitmap(self, container: array) -> bytearray:
+        bitmap = bytearray(8192)
+        for low in container:
+            bitmap[low >> 3] |= 1 << (low & 7)
+        return bitmap
+
+class BloomFilter:
+    """
+    A Bloom filter over strings, used to answer "never seen" without
+    touching the exact set of sparse IDs.
+
+    Methods (instance methods):
+        add(): adds a value.
+        might_contain (bool): False means the value was never added.
+    """
+
+    def __init__(self, expected_items: int = 1_000_000,
+                 false_positive_rate: float = 0.001,
+                 bits: bytearray = None,
+                 hash_count: int = None):
+        """
+        Initialize a BloomFilter sized for the expected number of items.
+
+        Args:
+            expected_items(int): how many values the filter should hold.
+            false_positive_rate(float): the target false positive rate.
+            bits(bytearray): existing bits when loading a saved filter.
+            hash_count(int): the hash count of a saved filter.
+        """
+        bit_count = math.ceil(-expected_items * math.log(false_positive_rate)
+                              / math.log(2) ** 2)
+        self.__bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+        self.__bit_count = len(self.__bits) * 8
+        self.__hash_count = hash_count or max(
+            1, round(self.__bit_count / expected_items * math.log(2)))
+
+    @property
+    def bits(self) -> bytearray:
+        """
+        Accessor for the bits of the filter.
+        """
+        return self.__bits
+
+    @property
+    def hash_count(self) -> int:
+        """
+        Accessor for the number of hash functions.
+        """
+        return self.__hash_count
+
+    def add(self, value: str) -> None:
+        """
+        Adds a value to the filter.
+        """
+        for position in self.__positions(value):
+            self.__bits[position >> 3] |= 1 << (position & 7)
+
+    def might_contain(self, value: str) -> bool:
+        """
+        Checks a value against the filter.
+
+        Returns:
+            False if the value was never added, True if it may have been
+        """
+        return all(self.__bits[position >> 3] & (1 << (position & 7))
+                   for position in self.__positions(value))
+
+    def __positions(self, value: str):
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.__hash_count):
+            yield (first + index * second) % self.__bit_count
+
+class TransactionDeduplicator:
+    """
+    A class that remembers processed Transaction IDs between runs.
+
+    Dense integer IDs are kept in a RoaringBitmap. Other IDs are checked
+    against a BloomFilter first, and only when the filter says they may
+    have been seen are they verified exactly. IDs saved by an earlier run
+    are verified against a sorted run of IDs in the state file, of which
+    only every FENCE_INTERVAL-th ID is kept in memory to find the block
+    to read, so memory does not grow with the IDs of past runs.
+
+    A processed ID stands for results that a run counted, so the results
+    of the DataProcessor are saved with the IDs, in the same file and
+    the same log record, and restore_results gives them to the next
+    processor. A run that skips a re-sent transaction then still reports
+    what it counted the first time.
+
+    Attributes:
+        __dense_ids (RoaringBitmap): the integer IDs seen
+        __bloom_filter (BloomFilter): the filter over the other IDs
+        __new_sparse_ids (set): the other IDs seen since the last save
+        __unsaved_ids (list): the IDs not yet saved or appended to the log
+        __run (dict): where the sorted run of saved sparse IDs is, and its fences
+        __saved_results (list): the results saved with the IDs and logged after them
+        __rewrite_log (bool): the log was read in the layout without records
+
+    Methods (instance methods):
+        is_duplicate (bool): checks an ID and records it as seen.
+        append_unsaved (int): appends the new IDs and results to the state's log.
+        save(): writes every seen ID and the results to a file and empties its log.
+        restore_results(): gives the loaded results to a new DataProcessor.
+        close(): closes the state file.
+        load (TransactionDeduplicator): class method to read them back.
+    """
+
+    FILE_MAGIC = b"TXDEDUP3"
+    """
+    The first bytes of a saved deduplicator file.
+    """
+
+    RUN_FILE_MAGIC = b"TXDEDUP2"
+    """
+    The first bytes of a file saved before the results were kept with
+    the IDs. It is still read, without results.
+    """
+
+    OLD_FILE_MAGIC = b"TXDEDUP1"
+    """
+    The first bytes of a file saved before the sparse IDs were kept on
+    disk. It is still read and is rewritten in the new layout by save.
+    """
+
+    FILE_HEADER = struct.Struct("<QIQQQQQQ")
+    """
+    The lengths of the dense IDs, Bloom filter bits, sparse ID run and
+    fence IDs, the hash count, the fence count, the sparse ID count and
+    the length of the JSON results.
+    """
+
+    RUN_FILE_HEADER = struct.Struct("<QIQQQQQ")
+    """
+    FILE_HEADER without the length of the results, of a file saved with
+    RUN_FILE_MAGIC.
+    """
+
+    LOG_MAGIC = b"TXDLOG01"
+    """
+    The first bytes of a log of records. A log without them holds only
+    IDs, each ended by a zero byte.
+    """
+
+    LOG_RECORD_HEADER = struct.Struct("<II")
+    """
+    The payload length and CRC-32 of the payload that start every log
+    record, so a record cut short by a crash is found and dropped.
+    """
+
+    FENCE_INTERVAL = 128
+    """
+    The sparse IDs per block of the run; the first ID of each block is
+    kept in memory.
+    """
+
+    def __init__(self, expected_sparse_ids: int = 1_000_000,
+                 false_positive_rate: float = 0.001):
+        """
+        Initialize an empty TransactionDeduplicator.
+
+        Args:
+            expected_sparse_ids(int): how many non-integer IDs to size the
+            Bloom filter for.
+            false_positive_rate(float): the Bloom filter false positive rate.
+        """
+        self.__dense_ids = RoaringBitmap()
+        self.__bloom_filter = BloomFilter(expected_sparse_ids, false_positive_rate)
+        self.__new_sparse_ids = set()
+        self.__unsaved_ids = []
+        self.__run = None
+        self.__run_file = None
+        self.__saved_results = []
+        self.__rewrite_log = False
+
+    def __len__(self) -> int:
+        saved_sparse_ids = self.__run["count"] if self.__run else 0
+        return len(self.__dense_ids) + saved_sparse_ids + len(self.__new_sparse_ids)
+
+    def is_duplicate(self, transaction_id) -> bool:
+        """
+        Checks whether a Transaction ID was seen before and records it.
+
+        Args:
+            transaction_id(int or str): the Transaction ID of a row.
+
+        Returns:
+            True if the ID was already seen
+        """
+        if isinstance(transaction_id, int) and transaction_id >= 0:
+            dense_id = transaction_id
+        else:
+            transaction_id = str(transaction_id)
+            dense_id = int(transaction_id) \
+                if transaction_id.isdecimal() and transaction_id.isascii() else None
+
+        if dense_id is not None:
+            if not self.__dense_ids.add(dense_id):
+                return True
+            self.__unsaved_ids.append(str(dense_id))
+            return False
+
+        if self.__bloom_filter.might_contain(transaction_id) \
+            and (transaction_id in self.__new_sparse_ids
+                 or self.__in_run(transaction_id.encode())):
+            return True
+
+        self.__bloom_filter.add(transaction_id)
+        self.__new_sparse_ids.add(transaction_id)
+        self.__unsaved_ids.append(transaction_id)
+        return False
+
+    def append_unsaved(self, file_path: str, changes: dict = None) -> int:
+        """
+        Appends the IDs seen since the last save or append to the log next
+        to a state file, in one record with the results they changed, so
+        a long-running program only writes what is new each time. load
+        reads the log back after the state file.
+
+        Args:
+            file_path(str): the state file given to save and load.
+            changes(dict): the changes returned by
+            DataProcessor.process_transactions for these IDs, None to
+            append only the IDs.
+
+        Returns:
+            the number of IDs appended
+        """
+        if not self.__unsaved_ids and not changes:
+            return 0
+
+        payload = json.dumps({
+            "transaction_ids": self.__unsaved_ids,
+            "results": None if not changes else self.__results(
+                changes["account_summaries"], changes["transaction_statistics"],
+                changes["suspicious_transactions"], [], len(self.__unsaved_ids))
+        }).encode()
+        record = self.LOG_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        log_path = f"{file_path}.log"
+        if self.__rewrite_log or not os.path.isfile(log_path):
+            # A new log, or one in the layout without records, is replaced
+            # whole; the IDs of the old layout are in this first record.
+            temporary_path = f"{log_path}.tmp"
+            with open(temporary_path, "wb") as log_file:
+                log_file.write(self.LOG_MAGIC + record)
+                log_file.flush()
+                os.fsync(log_file.fileno())
+            os.replace(temporary_path, log_path)
+            self.__rewrite_log = False
+        else:
+            with open(log_path, "ab") as log_file:
+                log_file.write(record)
+                log_file.flush()
+                os.fsync(log_file.fileno())
+
+        appended = len(self.__unsaved_ids)
+        self.__unsaved_ids = []
+        return appended
+
+    def save(self, file_path: str, data_processor = None) -> None:
+        """
+        Writes the seen IDs and the results they produced to a file,
+        replacing it only once the new file is complete, and then removes
+        its log. The saved run of sparse IDs is merged with the new ones
+        without reading it into memory.
+
+        Args:
+            file_path(str): the file to write.
+            data_processor(DataProcessor): the processor that counted the
+            transactions of these IDs, None to save only the IDs.
+        """
+        results = b""
+        if data_processor is not None:
+            results = json.dumps(self.__results(
+                data_processor.account_summaries, data_processor.transaction_statistics,
+                data_processor.suspicious_transactions, data_processor.transaction_patterns,
+                data_processor.version)).encode()
+        dense_ids = self.__dense_ids.to_bytes()
+        bloom_bits = bytes(self.__bloom_filter.bits)
+        new_ids = sorted(transaction_id.encode() for transaction_id in self.__new_sparse_ids)
+
+        fence_ids = []
+        fence_offsets = array("Q")
+        run_length = 0
+        count = 0
+
+        temporary_path = f"{file_path}.tmp"
+        with open(temporary_path, "wb") as output_file:
+            output_file.write(self.FILE_MAGIC)
+            output_file.write(bytes(self.FILE_HEADER.size))
+            output_file.write(dense_ids)
+            output_file.write(bloom_bits)
+            run_offset = output_file.tell()
+
+            for transaction_id in heapq.merge(self.__iter_run(), new_ids):
+                if count % self.FENCE_INTERVAL == 0:
+                    fence_ids.append(transaction_id)
+                    fence_offsets.append(run_length)
+                run_length += output_file.write(transaction_id + b"\0")
+                count += 1
+
+            fence_bytes = b"\0".join(fence_ids)
+            output_file.write(fence_offsets.tobytes())
+            output_file.write(fence_bytes)
+            output_file.write(results)
+
+            output_file.seek(len(self.FILE_MAGIC))
+            output_file.write(self.FILE_HEADER.pack(
+                len(dense_ids), self.__bloom_filter.hash_count, len(bloom_bits),
+                run_length, len(fence_bytes), len(fence_ids), count, len(results)))
+            output_file.flush()
+            os.fsync(output_file.fileno())
+
+        self.close()
+        os.replace(temporary_path, file_path)
+        self.__run = None
+        if os.path.isfile(f"{file_path}.log"):
+            os.remove(f"{file_path}.log")
+
+        self.__run = {"path": file_path, "offset": run_offset, "length": run_length,
+                      "fence_ids": fence_ids, "fence_offsets": fence_offsets,
+                      "count": count}
+        self.__run_file = open(file_path, "rb")
+        self.__new_sparse_ids = set()
+        self.__unsaved_ids = []
+        self.__saved_results = [json.loads(results)] if results else []
+        self.__rewrite_log = False
+
+    def restore_results(self, data_processor) -> None:
+        """
+        Gives the results loaded with the IDs to a DataProcessor that has
+        not processed anything yet, so the transactions it skips as
+        duplicates are still counted. They are given only once.
+
+        Args:
+            data_processor(DataProcessor): the processor to restore into.
+
+        Returns:
+            None
+        """
+        for results in self.__saved_results:
+            data_processor.restore(
+                {summary["account_number"]: summary for summary in results["account_summaries"]},
+                results["transaction_statistics"],
+                results["suspicious_transactions"],
+                results["transaction_patterns"],
+                results["transaction_count"])
+        self.__saved_results = []
+
+    def close(self) -> None:
+        """
+        Closes the state file. It is opened again by name if a saved
+        sparse ID has to be checked afterwards.
+        """
+        if self.__run_file is not None:
+            self.__run_file.close()
+            self.__run_file = None
+
+    @classmethod
+    def load(cls, file_path: str) -> "TransactionDeduplicator":
+        """
+        Reads the seen IDs and results written by save, and then the IDs
+        and results appended to its log. A missing file gives an empty
+        deduplicator so the first run needs no special case. Only the
+        fences of the sparse ID run are read; the run stays on disk. A log
+        record cut short by a crash is removed.
+
+        Args:
+            file_path(str): the file to read.
+
+        Returns:
+            TransactionDeduplicator
+
+        Raises:
+            ValueError: "... is not a transaction deduplicator file."
+        """
+        deduplicator = cls()
+        if os.path.isfile(file_path):
+            with open(file_path, "rb") as input_file:
+                magic = input_file.read(len(cls.FILE_MAGIC))
+                if magic == cls.OLD_FILE_MAGIC:
+                    deduplicator.__load_old(input_file)
+                elif magic in (cls.FILE_MAGIC, cls.RUN_FILE_MAGIC):
+                    deduplicator.__load_run(input_file, file_path, magic == cls.FILE_MAGIC)
+                else:
+                    raise ValueError(f"{file_path} is not a transaction deduplicator file.")
+
+        if os.path.isfile(f"{file_path}.log"):
+            with open(f"{file_path}.log", "r+b") as log_file:
+                log = log_file.read()
+                if log.startswith(cls.LOG_MAGIC):
+                    deduplicator.__load_log(log_file, log)
+                else:
+                    # A crash may leave the last ID without its terminator.
+                    for transaction_id in log.split(b"\0")[:-1]:
+                        deduplicator.is_duplicate(transaction_id.decode())
+                    # Kept as unsaved, so the next append writes them to a
+                    # log of records.
+                    deduplicator.__rewrite_log = True
+                    return deduplicator
+        deduplicator.__unsaved_ids = []
+        return deduplicator
+
+    def __load_log(self, log_file, log: bytes) -> None:
+        """
+        Reads the records of a log, removing a record cut short at its end.
+        """
+        offset = len(self.LOG_MAGIC)
+        while offset < len(log):
+            header = log[offset:offset + self.LOG_RECORD_HEADER.size]
+            payload = b""
+            if len(header) == self.LOG_RECORD_HEADER.size:
+                length, checksum = self.LOG_RECORD_HEADER.unpack(header)
+                start = offset + self.LOG_RECORD_HEADER.size
+                payload = log[start:start + length]
+            if len(header) < self.LOG_RECORD_HEADER.size or len(payload) < length \
+                or zlib.crc32(payload) != checksum:
+                log_file.truncate(offset)
+                break
+
+            record = json.loads(payload)
+            for transaction_id in record["transaction_ids"]:
+                self.is_duplicate(transaction_id)
+            if record["results"] is not None:
+                self.__saved_results.append(record["results"])
+            offset += self.LOG_RECORD_HEADER.size + length
+
+    def __load_run(self, input_file, file_path: str, has_results: bool) -> None:
+        """
+        Reads the dense IDs, the Bloom filter, the fences of the run and
+        the results. A file saved with RUN_FILE_MAGIC has no results length.
+        """
+        header = self.FILE_HEADER if has_results else self.RUN_FILE_HEADER
+        dense_length, hash_count, bloom_length, run_length, fence_length, \
+            fence_count, count, *results_length = header.unpack(input_file.read(header.size))
+
+        self.__dense_ids = RoaringBitmap.from_bytes(input_file.read(dense_length))
+        self.__bloom_filter = BloomFilter(bits=bytearray(input_file.read(bloom_length)),
+                                          hash_count=hash_count)
+        run_offset = input_file.tell()
+        input_file.seek(run_length, os.SEEK_CUR)
+
+        fence_offsets = array("Q")
+        fence_offsets.frombytes(input_file.read(fence_count * fence_offsets.itemsize))
+        fence_bytes = input_file.read(fence_length)
+        if results_length and results_length[0]:
+            self.__saved_results = [json.loads(input_file.read(results_length[0]))]
+        self.__run = {"path": file_path, "offset": run_offset, "length": run_length,
+                      "fence_ids": fence_bytes.split(b"\0") if fence_count else [],
+                      "fence_offsets": fence_offsets, "count": count}
+        # Opened now, so the run read is the one these fences describe even
+        # if another program replaces the file later.
+        self.__run_file = open(file_path, "rb")
+
+    def __load_old(self, input_file) -> None:
+        """
+        Reads a file saved with OLD_FILE_MAGIC, keeping its sparse IDs as
+        new ones so the next save writes them to a run.
+        """
+        dense_length, hash_count, bloom_length, sparse_length = \
+            struct.unpack("<QIQQ", input_file.read(struct.calcsize("<QIQQ")))
+        self.__dense_ids = RoaringBitmap.from_bytes(input_file.read(dense_length))
+        self.__bloom_filter = BloomFilter(bits=bytearray(input_file.read(bloom_length)),
+                                          hash_count=hash_count)
+        sparse_ids = input_file.read(sparse_length).decode()
+        self.__new_sparse_ids = set(sparse_ids.split("\0")) if sparse_ids else set()
+
+    @staticmethod
+    def __results(account_summaries: dict, transaction_statistics: dict,
+                  suspicious_transactions: list, transaction_patterns: list,
+                  transaction_count: int) -> dict:
+        """
+        Turns results into JSON. JSON only has text keys, so the account
+        summaries are a list, keyed by their account_number again on restore.
+        """
+        return {"account_summaries": list(account_summaries.values()),
+                "transaction_statistics": transaction_statistics,
+                "suspicious_transactions": suspicious_transactions,
+                "transaction_patterns": list(transaction_patterns),
+                "transaction_count": transaction_count}
+
+    def __in_run(self, transaction_id: bytes) -> bool:
+        """
+        Checks a sparse ID against the saved run by reading the one block
+        its fence points to.
+        """
+        if self.__run is None or not self.__run["count"]:
+            return False
+
+        fence_ids = self.__run["fence_ids"]
+        block = bisect_right(fence_ids, transaction_id) - 1
+        if block < 0:
+            return False
+
+        fence_offsets = self.__run["fence_offsets"]
+        start = fence_offsets[block]
+        end = fence_offsets[block + 1] if block + 1 < len(fence_offsets) \
+            else self.__run["length"]
+
+        run_file = self.__open_run()
+        run_file.seek(self.__run["offset"] + start)
+        return transaction_id in run_file.read(end - start).split(b"\0")
+
+    def __iter_run(self):
+        """
+        Yields the saved sparse IDs in order, reading the run in chunks.
+        """
+        if self.__run is None or not self.__run["count"]:
+            return
+
+        run_file = self.__open_run()
+        offset = self.__run["offset"]
+        remaining = self.__run["length"]
+        rest = b""
+        while remaining:
+            run_file.seek(offset)
+            chunk = run_file.read(min(remaining, 1 << 20))
+            offset += len(chunk)
+            remaining -= len(chunk)
+            *transaction_ids, rest = (rest + chunk).split(b"\0")
+            yield from transaction_ids
+
+    def __open_run(self):
+        """
+        Returns the open state file, opening it again after close.
+        """
+        if self.__run_file is None:
+            self.__run_file = open(self.__run["path"], "rb")
+        return self.__run_file
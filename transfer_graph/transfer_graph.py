@@ -0,0 +1,280 @@
+"""
+Description: A class created to link accounts by the transfers between
+them and find the cycles and hubs that anti-money-laundering reviews
+look for.
+Usage: To incorporate this class into a class or program,
+import this using:
+from transfer_graph.transfer_graph import TransferGraph
+"""
+
+from array import array
+from datetime import date
+
+class TransferGraph:
+    """
+    A class that stores transfers as a sparse directed graph.
+
+    Edges are appended to flat arrays as transactions stream in and are
+    turned into compressed sparse row (CSR) arrays only when an analysis
+    runs, so memory stays a few machine words per edge.
+
+    Attributes:
+        __account_index (dict): the node index of every account number
+        __account_numbers (list): the account number of every node index
+        __sources (array): the source node of every edge
+        __targets (array): the target node of every edge
+        __days (array): the date ordinal of every edge
+
+    Methods (instance methods):
+        add_transfer(): adds one transfer edge.
+        strongly_connected_components (list): groups of accounts that can
+                                                all reach each other.
+        high_degree_accounts (list): accounts with many counterparties.
+        short_cycles (list): cycles of transfers inside a time window.
+        analyze (dict): runs all of the above.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty TransferGraph.
+        """
+        self.__account_index = {}
+        self.__account_numbers = []
+        self.__sources = array("q")
+        self.__targets = array("q")
+        self.__days = array("l")
+        self.__csr = None
+
+    @property
+    def account_count(self) -> int:
+        """
+        Accessor for the number of accounts in the graph.
+        """
+        return len(self.__account_numbers)
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Accessor for the number of transfers in the graph.
+        """
+        return len(self.__sources)
+
+    def add_transfer(self, source, target, transaction_date: str) -> None:
+        """
+        Adds a transfer from one account to another.
+
+        Args:
+            source: the account number the money left.
+            target: the account number the money went to.
+            transaction_date(str): the date in YYYY-MM-DD format.
+
+        Returns:
+            None
+        """
+        self.__sources.append(self.__node(source))
+        self.__targets.append(self.__node(target))
+        self.__days.append(date.fromisoformat(transaction_date).toordinal())
+        self.__csr = None
+
+    def strongly_connected_components(self, min_size: int = 2) -> list:
+        """
+        Finds groups of accounts where money can flow from every account
+        to every other one, using an iterative version of Tarjan's
+        algorithm so deep graphs do not hit the recursion limit.
+
+        Args:
+            min_size(int): the smallest group to return.
+
+        Returns:
+            a list of lists of account numbers
+        """
+        return [[self.__account_numbers[node] for node in component]
+                for component in self.__components()
+                if len(component) >= min_size]
+
+    def high_degree_accounts(self, min_degree: int = 10) -> list:
+        """
+        Finds fan-in and fan-out hubs: accounts that receive transfers
+        from, or send transfers to, at least min_degree counterparties.
+
+        Args:
+            min_degree(int): the smallest number of distinct counterparties.
+
+        Returns:
+            a list of dicts with account_number, in_degree and out_degree
+        """
+        offsets, targets, _ = self.__build()
+        node_count = self.account_count
+        out_degree = [0] * node_count
+        in_degree = [0] * node_count
+
+        for node in range(node_count):
+            neighbours = set(targets[offsets[node]:offsets[node + 1]])
+            out_degree[node] = len(neighbours)
+            for neighbour in neighbours:
+                in_degree[neighbour] += 1
+
+        return [{
+            "account_number": self.__account_numbers[node],
+            "in_degree": in_degree[node],
+            "out_degree": out_degree[node]
+        } for node in range(node_count)
+            if in_degree[node] >= min_degree or out_degree[node] >= min_degree]
+
+    def short_cycles(self, max_length: int = 4, window_days: int = 7) -> list:
+        """
+        Finds cycles of at most max_length transfers whose dates all fall
+        inside window_days. Cycles can only exist inside a strongly
+        connected component, so the search is limited to those, and each
+        cycle is reported once, starting from its lowest node.
+
+        Args:
+            max_length(int): the most transfers in a cycle.
+            window_days(int): the most days between the first and last transfer.
+
+        Returns:
+            a list of dicts with accounts, start_date and end_date
+        """
+        offsets, targets, days = self.__build()
+        component_of = {}
+        for component_number, component in enumerate(self.__components()):
+            if len(component) > 1:
+                for node in component:
+                    component_of[node] = component_number
+
+        cycles = []
+        seen = set()
+        for start in sorted(component_of):
+            component = component_of[start]
+            stack = [(start, [start], None, None)]
+            while stack:
+                node, path, first_day, last_day = stack.pop()
+                for edge in range(offsets[node], offsets[node + 1]):
+                    target = targets[edge]
+                    if component_of.get(target) != component or target < start:
+                        continue
+
+                    day = days[edge]
+                    low = day if first_day is None else min(first_day, day)
+                    high = day if last_day is None else max(last_day, day)
+                    if high - low > window_days:
+                        continue
+
+                    if target == start:
+                        key = tuple(path)
+                        if key not in seen:
+                            seen.add(key)
+                            cycles.append({
+                                "accounts": [self.__account_numbers[step]
+                                             for step in path + [start]],
+                                "start_date": date.fromordinal(low).isoformat(),
+                                "end_date": date.fromordinal(high).isoformat()
+                            })
+                    elif len(path) < max_length and target not in path:
+                        stack.append((target, path + [target], low, high))
+        return cycles
+
+    def analyze(self, min_degree: int = 10,
+                max_cycle_length: int = 4,
+                window_days: int = 7) -> dict:
+        """
+        Runs every graph pass.
+
+        Returns:
+            components: the strongly connected components
+            hubs: the high degree accounts
+            cycles: the short cycles
+        """
+        return {
+            "components": self.strongly_connected_components(),
+            "hubs": self.high_degree_accounts(min_degree),
+            "cycles": self.short_cycles(max_cycle_length, window_days)
+        }
+
+    def __node(self, account_number) -> int:
+        node = self.__account_index.get(account_number)
+        if node is None:
+            node = self.__account_index[account_number] = len(self.__account_numbers)
+            self.__account_numbers.append(account_number)
+        return node
+
+    def __build(self) -> tuple:
+        """
+        Builds the CSR arrays with a counting sort of the edges by source.
+
+        Returns:
+            offsets, targets and days, where the edges of node n are
+            targets[offsets[n]:offsets[n + 1]]
+        """
+        if self.__csr is not None:
+            return self.__csr
+
+        node_count = self.account_count
+        offsets = array("q", bytes(8 * (node_count + 1)))
+        for source in self.__sources:
+            offsets[source + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+
+        positions = array("q", offsets)
+        targets = array("q", bytes(8 * self.edge_count))
+        days = array("l", bytes(self.__days.itemsize * self.edge_count))
+        for source, target, day in zip(self.__sources, self.__targets, self.__days):
+            position = positions[source]
+            targets[position] = target
+            days[position] = day
+            positions[source] = position + 1
+
+        self.__csr = (offsets, targets, days)
+        return self.__csr
+
+    def __components(self) -> list:
+        offsets, targets, _ = self.__build()
+        node_count = self.account_count
+        index = [-1] * node_count
+        lowlink = [0] * node_count
+        on_stack = [False] * node_count
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(node_count):
+            if index[root] != -1:
+                continue
+
+            work = [(root, offsets[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = targets[edge]
+                    if index[target] == -1:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, offsets[target]))
+                    elif on_stack[target]:
+                        lowlink[node] = min(lowlink[node], index[target])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components